@@ -9,8 +9,62 @@ class Settings(BaseSettings):
     refresh_token_expire_days: int = 7
     deepseek_api_key: str = ""
     deepseek_base_url: str = "https://api.deepseek.com/v1"
+    ai_tool_cache_ttl_seconds: int = 20  # bounds staleness from writes in other processes
+    ai_transport_mode: str = "live"  # live | record | replay
+    ai_fixture_path: str = "fixtures/ai_exchanges.jsonl"
+    ai_search_dim: int = 512  # hashing embedder buckets
+    ai_search_refresh_seconds: float = 2.0  # how often a process checks for rows written by others
+    llm_fast_model: str = "deepseek-chat"
+    llm_fast_temperature: float = 0.3
+    llm_large_model: str = "deepseek-chat"
+    llm_large_temperature: float = 0.7
+    llm_route_long_message_chars: int = 400
+    llm_route_max_fast_tools: int = 12
+    llm_route_followup_iteration: int = 2  # tool rounds before summarizing needs the large model
+    llm_max_concurrency: int = 4  # per worker
+    llm_max_retries: int = 3
+    llm_backoff_base_seconds: float = 0.5
+    llm_backoff_max_seconds: float = 8.0
+    llm_circuit_failure_threshold: int = 5
+    llm_circuit_reset_seconds: float = 30.0
+    ws_chat_max_concurrent_turns: int = 3  # per socket
+    ws_ping_interval_seconds: float = 25.0
+    ws_idle_timeout_seconds: float = 90.0  # no frames, including pongs
+    upload_dir: str = "/app/uploads"
+    receipt_max_attempts: int = 3
+    receipt_timeout_seconds: int = 120  # visibility timeout of a receipts.extract job
+    receipt_max_batch: int = 50  # files per submission
+    notification_push_queue_size: int = 100  # per socket
+    notification_listen_retry_seconds: float = 5.0
+    notification_resume_limit: int = 100
+    notification_retention_days: int = 90  # read notifications older than this are archived; 0 disables
+    notification_retention_batch: int = 1000
+    notification_retention_cron: str = "30 3 * * *"
+    notification_digest_cron: str = "0 * * * *"  # one digest per user per window
+    notification_digest_batch_users: int = 200
     resend_api_key: str = ""
     from_email: str = "noreply@dom.app"
+    email_backend: str = "resend"  # resend | http | memory
+    email_stub_url: str = "http://localhost:8025/emails/batch"
+    email_batch_size: int = 50  # Resend accepts up to 100
+    email_claim_seconds: int = 300  # lease on a claimed batch before another run may take it
+    email_outbox_cron: str = "* * * * *"  # retries; new mail wakes the job directly
+    email_max_attempts: int = 6
+    email_backoff_base_seconds: float = 30.0
+    email_backoff_max_seconds: float = 3600.0
+    recurring_income_cron: str = "10 0 * * *"  # idempotent, so daily catches a missed 1st
+    recurring_income_backfill_months: int = 12
+    task_reminder_cron: str = "0 6 * * *"
+    task_due_soon_days: int = 1  # due today or tomorrow
+    task_reminder_channel: str = "both"
+    task_sweep_batch: int = 5000
+    job_worker_concurrency: int = 4  # per `python -m app.worker` process
+    job_poll_seconds: float = 1.0
+    job_default_timeout_seconds: int = 300  # visibility timeout before a running job is reclaimed
+    job_default_max_attempts: int = 3
+    job_backoff_base_seconds: float = 10.0
+    job_backoff_max_seconds: float = 3600.0
+    job_keep_done_days: int = 7
     cors_origins: str = "http://localhost:5173"
     login_rate_limit: int = 5  # max attempts per minute
 
@@ -4,7 +4,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.routers import ai_chat, auth, categories, finance, notes, notifications, schedules, tasks, timecard, uploads, users
+from app.routers import ai_chat, auth, categories, finance, jobs, notes, notifications, schedules, tasks, timecard, uploads, users
 
 logger = logging.getLogger(__name__)
 
@@ -25,10 +25,12 @@ app.include_router(schedules.router)
 app.include_router(tasks.router)
 app.include_router(finance.router)
 app.include_router(notifications.router)
+app.include_router(notifications.ws_router)
 app.include_router(notes.router)
 app.include_router(timecard.router)
 app.include_router(uploads.router)
 app.include_router(ai_chat.router)
+app.include_router(jobs.router)
 
 
 @app.on_event("startup")
@@ -86,6 +88,35 @@ def seed_categories():
         db.close()
 
 
+@app.on_event("startup")
+async def start_event_bus():
+    import app.services.event_handlers  # noqa: F401  registers the handlers
+    from app.services.events import bus
+
+    bus.start()
+
+
+@app.on_event("shutdown")
+async def stop_event_bus():
+    from app.services.events import bus
+
+    await bus.stop()
+
+
+@app.on_event("startup")
+async def start_notification_push():
+    from app.services.notification_push import hub
+
+    await hub.start()
+
+
+@app.on_event("shutdown")
+async def stop_notification_push():
+    from app.services.notification_push import hub
+
+    await hub.stop()
+
+
 @app.get("/api/health")
 def health():
     return {"status": "ok"}
@@ -1,21 +1,23 @@
 from app.models.user import User, RoleEnum
 from app.models.schedule import Schedule, ScheduleChangeRequest, ScheduleStatus
-from app.models.task import Task, PriorityEnum, StatusEnum
-from app.models.finance import Payroll, Expense, Income, PayrollStatus, ExpenseCategory
-from app.models.ai import AiConversation, AiMessage
-from app.models.notification import Notification, NotificationType
+from app.models.task import Task, PriorityEnum, StatusEnum, TaskReminder
+from app.models.finance import Payroll, Expense, Income, PayrollStatus, ExpenseCategory, ReceiptJob, ReceiptJobStatus
+from app.models.ai import AiConversation, AiMessage, AiTurnUsage
+from app.models.notification import EmailOutbox, EmailStatus, Notification, NotificationArchive, NotificationType
 from app.models.timecard import TimeCard
+from app.models.job import Job, JobStatus
 from app.models.category import FinanceCategory
 from app.models.note import Note, NoteColor
 
 __all__ = [
     "User", "RoleEnum",
     "Schedule", "ScheduleChangeRequest", "ScheduleStatus",
-    "Task", "PriorityEnum", "StatusEnum",
-    "Payroll", "Expense", "Income", "PayrollStatus", "ExpenseCategory",
-    "AiConversation", "AiMessage",
-    "Notification", "NotificationType",
+    "Task", "PriorityEnum", "StatusEnum", "TaskReminder",
+    "Payroll", "Expense", "Income", "PayrollStatus", "ExpenseCategory", "ReceiptJob", "ReceiptJobStatus",
+    "AiConversation", "AiMessage", "AiTurnUsage",
+    "Notification", "NotificationArchive", "NotificationType", "EmailOutbox", "EmailStatus",
     "TimeCard",
+    "Job", "JobStatus",
     "FinanceCategory",
     "Note", "NoteColor",
 ]
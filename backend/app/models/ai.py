@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKey, JSON, String, func
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, JSON, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -29,3 +29,24 @@ class AiMessage(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
 
     conversation = relationship("AiConversation", back_populates="messages")
+
+
+class AiTurnUsage(Base):
+    """LLM cost and latency of one chat turn, keyed by its assistant message."""
+
+    __tablename__ = "ai_turn_usage"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    message_id: Mapped[int] = mapped_column(ForeignKey("ai_messages.id"), unique=True)
+    conversation_id: Mapped[int] = mapped_column(ForeignKey("ai_conversations.id"), index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    iterations: Mapped[int] = mapped_column(Integer, default=0)  # LLM calls; 0 on the intent fast path
+    tool_calls: Mapped[int] = mapped_column(Integer, default=0)
+    prompt_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    completion_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    llm_ms: Mapped[float] = mapped_column(Float, default=0)
+    total_ms: Mapped[float] = mapped_column(Float, default=0)
+    details: Mapped[Optional[list]] = mapped_column(JSON)  # per iteration: model, route, ms, tokens, tool calls
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), index=True)
+
+    message = relationship("AiMessage")
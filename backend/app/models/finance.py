@@ -2,12 +2,19 @@ import enum
 import datetime as dt
 from typing import Optional
 
-from sqlalchemy import Date, DateTime, Enum, ForeignKey, Numeric, String, func
+from sqlalchemy import Date, DateTime, Enum, ForeignKey, Integer, Numeric, String, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
 
 
+class ReceiptJobStatus(str, enum.Enum):
+    queued = "queued"
+    processing = "processing"
+    done = "done"
+    failed = "failed"
+
+
 class PayrollStatus(str, enum.Enum):
     pending = "pending"
     paid = "paid"
@@ -21,7 +28,15 @@ class ExpenseCategory(str, enum.Enum):
     other = "other"
 
 
+def category_name(category: str) -> str:
+    """Expense.category as stored. Loaded rows hold a plain string, but an
+    object assigned an ExpenseCategory keeps it until expired, and str() of
+    that gives "ExpenseCategory.food"."""
+    return category.value if isinstance(category, enum.Enum) else category
+
+
 class ExpenseStatus(str, enum.Enum):
+    draft = "draft"  # created from a receipt, awaiting review
     pending = "pending"
     approved = "approved"
     rejected = "rejected"
@@ -58,6 +73,8 @@ class Expense(Base):
     approved_by: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"))
     created_by: Mapped[int] = mapped_column(ForeignKey("users.id"))
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, server_default=func.now())
+    # Lets each process's search index pick up rows written elsewhere
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
     status: Mapped[str] = mapped_column(String(20), default="pending")
 
     approver = relationship("User", foreign_keys=[approved_by])
@@ -66,6 +83,7 @@ class Expense(Base):
 
 class Income(Base):
     __tablename__ = "income"
+    __table_args__ = (UniqueConstraint("recurring_source_id", "recurring_period", name="uq_income_recurring_period"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     source: Mapped[str] = mapped_column(String(255))
@@ -76,6 +94,10 @@ class Income(Base):
     receipt_url: Mapped[Optional[str]] = mapped_column(String(500))
     payment_source: Mapped[Optional[str]] = mapped_column(String(20), default="cash")
     is_recurring: Mapped[bool] = mapped_column(default=False)
+    # Set on rows the recurring-income job generated: the template row and
+    # the first day of the month it was generated for
+    recurring_source_id: Mapped[Optional[int]] = mapped_column(ForeignKey("income.id", ondelete="SET NULL"))
+    recurring_period: Mapped[Optional[dt.date]] = mapped_column(Date)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, server_default=func.now())
 
 
@@ -93,3 +115,23 @@ class CashAdvance(Base):
 
     user = relationship("User", foreign_keys=[user_id])
     creator = relationship("User", foreign_keys=[created_by])
+
+
+class ReceiptJob(Base):
+    __tablename__ = "receipt_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    batch_id: Mapped[str] = mapped_column(String(32), index=True)
+    receipt_url: Mapped[str] = mapped_column(String(500))
+    status: Mapped[ReceiptJobStatus] = mapped_column(Enum(ReceiptJobStatus), default=ReceiptJobStatus.queued, index=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[Optional[str]] = mapped_column(String(500))
+    merchant: Mapped[Optional[str]] = mapped_column(String(255))
+    amount: Mapped[Optional[float]] = mapped_column(Numeric(12, 2))
+    date: Mapped[Optional[dt.date]] = mapped_column(Date)
+    expense_id: Mapped[Optional[int]] = mapped_column(ForeignKey("expenses.id"))
+    created_by: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, server_default=func.now())
+    finished_at: Mapped[Optional[dt.datetime]] = mapped_column(DateTime)
+
+    expense = relationship("Expense")
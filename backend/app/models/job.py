@@ -0,0 +1,44 @@
+import enum
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Enum, Index, Integer, JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"  # gave up after max_attempts
+
+
+class Job(Base):
+    """A unit of background work, claimed by app.worker processes."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_claim", "status", "priority", "run_at"),
+        Index("ix_jobs_finished", "finished_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(100))
+    payload: Mapped[dict] = mapped_column(JSON, default=dict)
+    priority: Mapped[int] = mapped_column(Integer, default=0)  # higher runs first
+    status: Mapped[JobStatus] = mapped_column(Enum(JobStatus), default=JobStatus.queued)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3)
+    timeout_seconds: Mapped[int] = mapped_column(Integer, default=300)
+    # Scheduled jobs use "<name>@<slot>" so each slot is enqueued once
+    dedupe_key: Mapped[Optional[str]] = mapped_column(String(200), unique=True)
+    # Naive UTC, set in Python like the email outbox
+    run_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    locked_by: Mapped[Optional[str]] = mapped_column(String(100))
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    last_error: Mapped[Optional[str]] = mapped_column(String(1000))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
@@ -27,4 +27,4 @@ class Note(Base):
     content: Mapped[str] = mapped_column(Text, default="")
     color: Mapped[NoteColor] = mapped_column(Enum(NoteColor), default=NoteColor.yellow)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
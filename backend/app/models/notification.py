@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import enum
 from datetime import datetime
+from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, String, func
+from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Index, Integer, String, Text, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -16,8 +17,35 @@ class NotificationType(str, enum.Enum):
     system = "system"
 
 
+class EmailStatus(str, enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    dead = "dead"  # gave up after email_max_attempts
+
+
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # The list endpoint walks a user's history newest-first by id
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+        # Holds only unread rows, so the badge count and its ETag are read
+        # from a small index instead of the whole history
+        Index(
+            "ix_notifications_unread",
+            "user_id",
+            "id",
+            postgresql_where=text("NOT is_read"),
+            sqlite_where=text("is_read = 0"),
+        ),
+        Index(
+            "ix_notifications_digest_pending",
+            "user_id",
+            postgresql_where=text("digest_pending"),
+            sqlite_where=text("digest_pending = 1"),
+        ),
+    )
+    # Fetch created_at with the INSERT so new rows can be pushed without a reload
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -26,4 +54,45 @@ class Notification(Base):
     type: Mapped[NotificationType] = mapped_column(Enum(NotificationType))
     is_read: Mapped[bool] = mapped_column(Boolean, default=False)
     channel: Mapped[str] = mapped_column(String(20), default="in_app")
+    # Waiting for the recipient's next email digest
+    digest_pending: Mapped[bool] = mapped_column(Boolean, default=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+
+class NotificationArchive(Base):
+    """Read notifications moved out of the hot table by the retention job."""
+
+    __tablename__ = "notifications_archive"
+    __table_args__ = (Index("ix_notifications_archive_user_id_id", "user_id", "id"),)
+
+    # Keeps the id the row had in notifications
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    title: Mapped[str] = mapped_column(String(255))
+    message: Mapped[str] = mapped_column(String(1000))
+    type: Mapped[NotificationType] = mapped_column(Enum(NotificationType))
+    is_read: Mapped[bool] = mapped_column(Boolean, default=True)
+    channel: Mapped[str] = mapped_column(String(20), default="in_app")
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+
+class EmailOutbox(Base):
+    """An email waiting to be sent, written in the same transaction as its cause."""
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (Index("ix_email_outbox_due", "status", "next_attempt_at"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    notification_id: Mapped[Optional[int]] = mapped_column(ForeignKey("notifications.id"))
+    to_email: Mapped[str] = mapped_column(String(255))
+    subject: Mapped[str] = mapped_column(String(255))
+    html_body: Mapped[str] = mapped_column(Text)
+    status: Mapped[EmailStatus] = mapped_column(Enum(EmailStatus), default=EmailStatus.pending)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(String(500))
+    provider_id: Mapped[Optional[str]] = mapped_column(String(100))
+    # Naive UTC, set in Python so the worker compares like with like
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
@@ -2,7 +2,7 @@ import enum
 import datetime as dt
 from typing import Optional
 
-from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, String, func
+from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, Index, String, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -21,8 +21,29 @@ class StatusEnum(str, enum.Enum):
     done = "done"
 
 
+class TaskReminder(str, enum.Enum):
+    due_soon = "due_soon"
+    overdue = "overdue"
+
+
+# Tasks still owed a reminder. Kept as literal SQL so the sweep query
+# matches the partial index predicate on every dialect
+REMINDER_PENDING = "reminder IS NULL OR reminder <> 'overdue'"
+
+
 class Task(Base):
     __tablename__ = "tasks"
+    # Tasks by due date for the reminder sweep; tasks already reminded as
+    # overdue leave the index, so old backlog is not rescanned every run
+    __table_args__ = (
+        Index(
+            "ix_tasks_status_due_date",
+            "status",
+            "due_date",
+            postgresql_where=text(REMINDER_PENDING),
+            sqlite_where=text(REMINDER_PENDING),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     assigned_to: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -34,7 +55,11 @@ class Task(Base):
     status: Mapped[StatusEnum] = mapped_column(Enum(StatusEnum), default=StatusEnum.pending)
     due_date: Mapped[Optional[dt.date]] = mapped_column(Date)
     image_url: Mapped[Optional[str]] = mapped_column(String(500))
+    # Last reminder sent, so each stage is announced once per due date
+    reminder: Mapped[Optional[TaskReminder]] = mapped_column(Enum(TaskReminder))
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, server_default=func.now())
+    # Lets each process's search index pick up rows written elsewhere
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
 
     assignee = relationship("User", foreign_keys=[assigned_to])
     creator = relationship("User", foreign_keys=[created_by])
@@ -1,93 +1,277 @@
+import asyncio
+import datetime as dt
+import itertools
 import json
 import logging
+import time
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.database import get_db, SessionLocal
-from app.models.user import User
+from app.config import settings
+from app.database import engine, get_db, SessionLocal
+from app.middleware.rbac import require_role
+from app.models.ai import AiTurnUsage
+from app.models.user import RoleEnum, User
+from app.services import ai_intents, ai_routing
 from app.services.ai_agent import DeepSeekAgent
-from app.utils.security import decode_token
+from app.services.auth import authenticate_websocket
+from app.services.llm_scheduler import scheduler
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["ai_chat"])
 agent = DeepSeekAgent()
 
+chat_stats = {"open_sockets": 0, "turns_in_flight": 0, "idle_closed": 0, "cancelled_on_disconnect": 0}
+
 
 @router.websocket("/ws/chat")
 async def websocket_chat(websocket: WebSocket):
-    # Authenticate via token query param
-    token = websocket.query_params.get("token")
-    if not token:
-        await websocket.close(code=4001, reason="Missing token")
-        return
+    """Chat socket; several turns can run at once.
 
-    payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
-        await websocket.close(code=4001, reason="Invalid token")
-        return
+    Client frames:
+      {"id": "r1", "message": "...", "conversation_id": 12}  start a turn
+      {"type": "cancel", "id": "r1"}                         cancel a turn
+      {"type": "pong"}                                       reply to a ping
 
-    user_id = payload.get("sub")
-    if not user_id:
-        await websocket.close(code=4001, reason="Invalid token payload")
+    A turn streams typing, then tool_started and action for each tool call
+    as it runs, then message and typing false. Every server frame for a turn
+    echoes its "id". A turn with an id and no conversation_id starts a new
+    conversation. Frames without an id keep the original protocol: they run
+    one at a time and continue the socket's current conversation.
+    """
+    # Authenticate via token query param
+    user = await authenticate_websocket(websocket)
+    if not user:
         return
 
-    db = SessionLocal()
+    await websocket.accept()
+    chat_stats["open_sockets"] += 1
     try:
-        user = db.query(User).filter(User.id == int(user_id)).first()
-        if not user or not user.is_active:
-            await websocket.close(code=4001, reason="User not found")
-            return
+        send_lock = asyncio.Lock()
+        legacy_lock = asyncio.Lock()
+        legacy_state = {"conversation_id": None}
+        turns: Dict[str, asyncio.Task] = {}
+        legacy_keys = itertools.count()
 
-        await websocket.accept()
+        async def send(frame: Dict[str, Any], request_id: Optional[str]) -> None:
+            if request_id is not None:
+                frame["id"] = request_id
+            async with send_lock:
+                try:
+                    await websocket.send_json(frame)
+                except Exception:
+                    # The client went away; the turn's own result is already persisted
+                    pass
 
-        conversation_id = None
-
-        while True:
+        async def run_turn(request_id: Optional[str], user_message: str, conversation_id: Optional[int]) -> None:
+            turn_db = SessionLocal()
+            chat_stats["turns_in_flight"] += 1
             try:
-                data = await websocket.receive_text()
-                message_data = json.loads(data)
-                user_message = message_data.get("message") or message_data.get("content", "")
-                conversation_id = message_data.get("conversation_id", conversation_id)
-
                 # Send typing indicator
-                await websocket.send_json({"type": "typing", "typing": True})
+                await send({"type": "typing", "typing": True}, request_id)
 
-                # Call AI agent
-                result = await agent.chat(
+                # Forward agent events as they happen
+                async for event in agent.chat_events(
                     user=user,
                     message=user_message,
                     conversation_id=conversation_id,
-                    db=db,
-                )
-
-                conversation_id = result.get("conversation_id")
-
-                # Send action cards if any
-                for action in result.get("actions", []):
-                    await websocket.send_json({
-                        "type": "action",
-                        "tool": action["tool"],
-                        "args": action["args"],
-                        "result": action["result"],
-                    })
-
-                # Send assistant message
-                await websocket.send_json({
-                    "type": "message",
-                    "content": result.get("content", ""),
-                    "conversation_id": conversation_id,
-                })
-
+                    db=turn_db,
+                ):
+                    if event["type"] == "tool_started":
+                        await send({"type": "tool_started", "tool": event["tool"], "args": event["args"]}, request_id)
+                    elif event["type"] == "tool_finished":
+                        # Action card, rendered as soon as the tool completes
+                        await send({
+                            "type": "action",
+                            "tool": event["tool"],
+                            "args": event["args"],
+                            "result": event["result"],
+                        }, request_id)
+                    elif event["type"] == "message":
+                        if request_id is None:
+                            legacy_state["conversation_id"] = event["conversation_id"]
+                        await send({
+                            "type": "message",
+                            "content": event["content"],
+                            "conversation_id": event["conversation_id"],
+                        }, request_id)
+            except asyncio.CancelledError:
+                turn_db.rollback()
+                await send({"type": "cancelled"}, request_id)
+                raise
+            except Exception as e:
+                logger.error(f"WebSocket error: {e}")
+                turn_db.rollback()
+                await send({"type": "error", "message": "Произошла внутренняя ошибка"}, request_id)
+            finally:
                 # Stop typing indicator
-                await websocket.send_json({"type": "typing", "typing": False})
+                await send({"type": "typing", "typing": False}, request_id)
+                turn_db.close()
+                chat_stats["turns_in_flight"] -= 1
+
+        async def run_legacy_turn(user_message: str, conversation_id: Optional[int]) -> None:
+            async with legacy_lock:
+                await run_turn(None, user_message, conversation_id or legacy_state["conversation_id"])
 
+        last_seen = time.monotonic()
+        while True:
+            try:
+                data = await asyncio.wait_for(websocket.receive_text(), timeout=settings.ws_ping_interval_seconds)
+            except asyncio.TimeoutError:
+                # Nothing from the client, not even a pong: the socket is dead
+                if time.monotonic() - last_seen > settings.ws_idle_timeout_seconds:
+                    chat_stats["idle_closed"] += 1
+                    await websocket.close(code=4000, reason="Idle timeout")
+                    break
+                await send({"type": "ping"}, None)
+                continue
             except WebSocketDisconnect:
                 break
+
+            last_seen = time.monotonic()
+            try:
+                message_data = json.loads(data)
             except json.JSONDecodeError:
-                await websocket.send_json({"type": "error", "message": "Invalid JSON"})
-            except Exception as e:
-                logger.error(f"WebSocket error: {e}")
-                await websocket.send_json({"type": "error", "message": "Произошла внутренняя ошибка"})
+                await send({"type": "error", "message": "Invalid JSON"}, None)
+                continue
+
+            if message_data.get("type") == "pong":
+                continue
+
+            request_id = message_data.get("id")
+            if request_id is not None:
+                request_id = str(request_id)
+
+            if message_data.get("type") == "cancel":
+                # Free the slot right away rather than when the task unwinds
+                task = turns.pop(request_id, None)
+                if task:
+                    task.cancel()
+                continue
+
+            if len(turns) >= settings.ws_chat_max_concurrent_turns:
+                await send({"type": "error", "message": "Слишком много одновременных запросов"}, request_id)
+                continue
+            if request_id is not None and request_id in turns:
+                await send({"type": "error", "message": "Duplicate request id"}, request_id)
+                continue
+
+            user_message = message_data.get("message") or message_data.get("content", "")
+            conversation_id = message_data.get("conversation_id")
+            if request_id is None:
+                key = f"_legacy:{next(legacy_keys)}"
+                task = asyncio.create_task(run_legacy_turn(user_message, conversation_id))
+            else:
+                key = request_id
+                task = asyncio.create_task(run_turn(request_id, user_message, conversation_id))
+            turns[key] = task
+            # A cancelled turn may finish after its id was reused; leave the new one
+            task.add_done_callback(lambda t, key=key: turns.get(key) is t and turns.pop(key))
     finally:
-        db.close()
+        chat_stats["open_sockets"] -= 1
+        # Nobody is left to read the answers: stop pending LLM calls and
+        # remaining iterations, each turn rolls back its uncommitted work
+        pending = [task for task in turns.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            chat_stats["cancelled_on_disconnect"] += len(pending)
+            logger.info(f"Chat socket for user {user.id} closed, cancelled {len(pending)} turn(s)")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+@router.get("/api/ai/scheduler")
+def scheduler_stats(
+    current_user: User = Depends(require_role(RoleEnum.owner)),
+):
+    return scheduler.snapshot()
+
+
+@router.get("/api/ai/intents")
+def intent_stats(
+    current_user: User = Depends(require_role(RoleEnum.owner)),
+):
+    return ai_intents.snapshot()
+
+
+@router.get("/api/ai/models")
+def model_stats(
+    current_user: User = Depends(require_role(RoleEnum.owner)),
+):
+    return ai_routing.stats.snapshot()
+
+
+@router.get("/api/ai/sockets")
+def socket_stats(
+    current_user: User = Depends(require_role(RoleEnum.owner)),
+):
+    return {**chat_stats, "db_connections_held": engine.pool.checkedout()}
+
+
+@router.get("/api/ai/usage")
+def usage_stats(
+    date_from: Optional[dt.date] = Query(None),
+    date_to: Optional[dt.date] = Query(None),
+    current_user: User = Depends(require_role(RoleEnum.owner)),
+    db: Session = Depends(get_db),
+):
+    """LLM tokens, iterations and latency per user per day, plus the costliest conversations."""
+    query = db.query(AiTurnUsage)
+    if date_from:
+        query = query.filter(AiTurnUsage.created_at >= date_from)
+    if date_to:
+        query = query.filter(AiTurnUsage.created_at < date_to + dt.timedelta(days=1))
+
+    day = func.date(AiTurnUsage.created_at)
+    daily = query.join(User, User.id == AiTurnUsage.user_id).with_entities(
+        AiTurnUsage.user_id,
+        User.full_name,
+        day,
+        func.count(AiTurnUsage.id),
+        func.sum(AiTurnUsage.iterations),
+        func.sum(AiTurnUsage.tool_calls),
+        func.sum(AiTurnUsage.prompt_tokens),
+        func.sum(AiTurnUsage.completion_tokens),
+        func.avg(AiTurnUsage.total_ms),
+        func.max(AiTurnUsage.total_ms),
+    ).group_by(AiTurnUsage.user_id, User.full_name, day).order_by(day.desc(), AiTurnUsage.user_id).all()
+
+    tokens = func.sum(AiTurnUsage.prompt_tokens + AiTurnUsage.completion_tokens)
+    costliest = query.with_entities(
+        AiTurnUsage.conversation_id,
+        AiTurnUsage.user_id,
+        func.count(AiTurnUsage.id),
+        tokens,
+        func.max(AiTurnUsage.total_ms),
+    ).group_by(AiTurnUsage.conversation_id, AiTurnUsage.user_id).order_by(tokens.desc()).limit(10).all()
+
+    return {
+        "daily": [
+            {
+                "user_id": user_id,
+                "full_name": full_name,
+                "day": str(day_value),
+                "turns": turns,
+                "iterations": int(iterations or 0),
+                "tool_calls": int(tool_calls or 0),
+                "prompt_tokens": int(prompt_tokens or 0),
+                "completion_tokens": int(completion_tokens or 0),
+                "avg_ms": round(float(avg_ms or 0), 1),
+                "max_ms": round(float(max_ms or 0), 1),
+            }
+            for user_id, full_name, day_value, turns, iterations, tool_calls, prompt_tokens, completion_tokens, avg_ms, max_ms in daily
+        ],
+        "costliest_conversations": [
+            {
+                "conversation_id": conversation_id,
+                "user_id": user_id,
+                "turns": turns,
+                "tokens": int(total_tokens or 0),
+                "max_ms": round(float(max_ms or 0), 1),
+            }
+            for conversation_id, user_id, turns, total_tokens, max_ms in costliest
+        ],
+    }
@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session, joinedload
 
 from app.database import get_db
 from app.middleware.rbac import require_role
-from app.models.finance import CashAdvance, Expense, Income, Payroll
+from app.models.finance import CashAdvance, Expense, Income, Payroll, PayrollStatus
 from app.models.user import RoleEnum, User
 from app.schemas.finance import (
     AutoIncomeRequest,
@@ -28,8 +28,13 @@ from app.schemas.finance import (
     PayrollCreate,
     PayrollResponse,
     PayrollUpdate,
+    RecurringIncomeRequest,
+    RecurringIncomeResult,
 )
+from app.services import events
 from app.services.auth import get_current_user
+from app.services.events import ExpenseApproved, PayrollPaid
+from app.services.recurring_income import materialize
 
 router = APIRouter(prefix="/api", tags=["finance"])
 
@@ -76,6 +81,7 @@ def update_payroll(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payroll record not found")
 
     update_data = data.dict(exclude_unset=True)
+    was_paid = payroll.status == PayrollStatus.paid
     for field, value in update_data.items():
         setattr(payroll, field, value)
 
@@ -83,6 +89,9 @@ def update_payroll(
     if any(k in update_data for k in ("base_salary", "bonuses", "deductions")):
         payroll.net_amount = payroll.base_salary + payroll.bonuses - payroll.deductions
 
+    if payroll.status == PayrollStatus.paid and not was_paid:
+        events.record(db, PayrollPaid.from_payroll(payroll))
+
     db.commit()
     db.refresh(payroll)
     return payroll
@@ -146,7 +155,7 @@ def list_expenses(
     if current_user.role not in (RoleEnum.owner, RoleEnum.manager):
         query = query.filter(Expense.created_by == current_user.id)
 
-    if status_filter and status_filter not in ("pending", "approved", "rejected"):
+    if status_filter and status_filter not in ("draft", "pending", "approved", "rejected"):
         raise HTTPException(status_code=400, detail="Invalid status filter")
 
     if status_filter:
@@ -209,6 +218,7 @@ def approve_expense(
 
     expense.status = data.status
     expense.approved_by = current_user.id
+    events.record(db, ExpenseApproved.from_expense(expense))
     db.commit()
     db.refresh(expense)
     return expense
@@ -311,6 +321,17 @@ def auto_generate_income(
     return records
 
 
+@router.post("/income/recurring", response_model=RecurringIncomeResult)
+def materialize_recurring_income(
+    data: RecurringIncomeRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(RoleEnum.owner, RoleEnum.manager)),
+):
+    """Generate recurring income now instead of waiting for the daily job."""
+    rows = materialize(db, data.month or dt.date.today(), data.backfill)
+    return RecurringIncomeResult(created=len(rows))
+
+
 # --- Cash Advances ---
 
 @router.get("/cash-advances", response_model=List[CashAdvanceResponse])
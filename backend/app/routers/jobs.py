@@ -0,0 +1,68 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.middleware.rbac import require_role
+from app.models.job import Job, JobStatus
+from app.models.user import RoleEnum, User
+from app.schemas.job import JobEnqueue, JobResponse
+from app.services import jobs
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+# Registers handler names and schedules for validation and metrics; the
+# jobs themselves run in app.worker
+jobs.load_job_modules()
+
+
+@router.get("", response_model=List[JobResponse])
+def list_jobs(
+    job_status: Optional[JobStatus] = Query(None, alias="status"),
+    name: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(RoleEnum.owner)),
+):
+    query = db.query(Job)
+    if job_status:
+        query = query.filter(Job.status == job_status)
+    if name:
+        query = query.filter(Job.name == name)
+    return query.order_by(Job.id.desc()).limit(limit).all()
+
+
+@router.get("/metrics")
+def job_metrics(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(RoleEnum.owner)),
+):
+    return jobs.metrics(db)
+
+
+@router.post("/{name}/run", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def run_job(
+    name: str,
+    data: JobEnqueue,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(RoleEnum.owner)),
+):
+    """Queue a registered job now, e.g. to rerun a scheduled one."""
+    if name not in jobs.REGISTRY:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown job")
+    job = jobs.new_job(name, data.payload, priority=data.priority)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+@router.post("/{job_id}/retry", status_code=status.HTTP_204_NO_CONTENT)
+def retry_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(RoleEnum.owner)),
+):
+    if not jobs.retry(db, job_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Failed job not found")
@@ -1,31 +1,137 @@
+import asyncio
+import datetime as dt
+import time
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models.notification import Notification, NotificationType
-from app.models.user import User
-from app.schemas.notification import NotificationResponse
-from app.services.auth import get_current_user
+from app.config import settings
+from app.database import SessionLocal, get_db
+from app.middleware.rbac import require_role
+from app.models.notification import EmailOutbox, EmailStatus, Notification, NotificationArchive, NotificationType
+from app.models.user import RoleEnum, User
+from app.schemas.notification import (
+    NotificationBulkCreate,
+    NotificationBulkResponse,
+    NotificationPreferences,
+    NotificationResponse,
+    UnreadCountResponse,
+)
+from app.services.auth import authenticate_websocket, get_current_user
+from app.services.email import wake_outbox
+from app.services.notification import create_notifications_bulk
+from app.services.notification_push import hub, serialize
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
+ws_router = APIRouter(tags=["notifications"])
+
+
+def _page(model, user_id: int, type: Optional[NotificationType], before_id: Optional[int], limit: int, offset: int, db: Session):
+    query = db.query(model).filter(model.user_id == user_id)
+
+    if type:
+        query = query.filter(model.type == type)
+    # Keyset paging: pass the last id of the previous page as before_id to
+    # stay on the (user_id, id) index however deep the history goes
+    if before_id:
+        query = query.filter(model.id < before_id)
+
+    return query.order_by(model.id.desc()).offset(offset).limit(limit).all()
 
 
 @router.get("", response_model=List[NotificationResponse])
 def list_notifications(
     type: Optional[NotificationType] = Query(None),
+    before_id: Optional[int] = Query(None),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = db.query(Notification).filter(Notification.user_id == current_user.id)
+    return _page(Notification, current_user.id, type, before_id, limit, offset, db)
+
+
+@router.get("/archive", response_model=List[NotificationResponse])
+def list_archived(
+    type: Optional[NotificationType] = Query(None),
+    before_id: Optional[int] = Query(None),
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Read notifications moved out by the retention job, newest first."""
+    return _page(NotificationArchive, current_user.id, type, before_id, limit, offset, db)
+
+
+@router.get("/preferences", response_model=NotificationPreferences)
+def get_preferences(current_user: User = Depends(get_current_user)):
+    return NotificationPreferences(email_digest=current_user.email_digest)
+
+
+@router.put("/preferences", response_model=NotificationPreferences)
+def update_preferences(
+    data: NotificationPreferences,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    current_user.email_digest = data.email_digest
+    db.commit()
+    return data
+
+
+@router.get("/retention")
+def retention_status(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(RoleEnum.owner)),
+):
+    return {
+        "retention_days": settings.notification_retention_days,
+        "cron": settings.notification_retention_cron,
+        "hot_rows": db.query(func.count(Notification.id)).scalar(),
+        "archived_rows": db.query(func.count(NotificationArchive.id)).scalar(),
+    }
 
-    if type:
-        query = query.filter(Notification.type == type)
 
-    return query.order_by(Notification.created_at.desc()).offset(offset).limit(limit).all()
+@router.post("/bulk", response_model=NotificationBulkResponse, status_code=status.HTTP_201_CREATED)
+def send_bulk(
+    data: NotificationBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(RoleEnum.owner, RoleEnum.manager)),
+):
+    created = create_notifications_bulk(
+        db, data.title, data.message, data.type, data.channel, user_ids=data.user_ids, role=data.role,
+    )
+    return NotificationBulkResponse(created=created)
+
+
+@router.get("/unread-count", response_model=UnreadCountResponse)
+def unread_count(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Badge count, answered from the partial unread index.
+
+    Marking anything read lowers the count and any new notification raises
+    the highest unread id, so the pair identifies the state; a matching
+    If-None-Match gets an empty 304.
+    """
+    count, max_id = (
+        db.query(func.count(Notification.id), func.max(Notification.id))
+        .filter(Notification.user_id == current_user.id, Notification.is_read == False)
+        .one()
+    )
+    etag = f'W/"{count}-{max_id or 0}"'
+    # no-cache: the browser revalidates with the ETag on every request
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return UnreadCountResponse(count=count)
 
 
 @router.put("/{notification_id}/read", response_model=NotificationResponse)
@@ -58,3 +164,111 @@ def mark_all_read(
         Notification.is_read == False,
     ).update({"is_read": True})
     db.commit()
+
+
+@router.get("/outbox")
+def outbox_status(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(RoleEnum.owner)),
+):
+    counts = dict(db.query(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status).all())
+    dead = (
+        db.query(EmailOutbox)
+        .filter(EmailOutbox.status == EmailStatus.dead)
+        .order_by(EmailOutbox.id.desc())
+        .limit(20)
+        .all()
+    )
+    return {
+        "counts": {s.value: counts.get(s, 0) for s in EmailStatus},
+        "dead": [
+            {"id": m.id, "to": m.to_email, "subject": m.subject, "attempts": m.attempts, "last_error": m.last_error}
+            for m in dead
+        ],
+    }
+
+
+@router.post("/outbox/{email_id}/retry", status_code=status.HTTP_204_NO_CONTENT)
+def retry_email(
+    email_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(RoleEnum.owner)),
+):
+    email = db.query(EmailOutbox).filter(EmailOutbox.id == email_id, EmailOutbox.status == EmailStatus.dead).first()
+    if not email:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dead-lettered email not found")
+
+    email.status = EmailStatus.pending
+    email.attempts = 0
+    email.next_attempt_at = dt.datetime.utcnow()
+    wake_outbox(db)
+    db.commit()
+
+
+@ws_router.websocket("/ws/notifications")
+async def notifications_socket(websocket: WebSocket):
+    """Pushes {"type": "notification", "notification": {...}} as rows are created.
+
+    Pass ?last_id= with the highest id already seen to first receive what was
+    missed while disconnected. The server pings like the chat socket and
+    expects {"type": "pong"} back.
+    """
+    user = await authenticate_websocket(websocket)
+    if not user:
+        return
+    try:
+        last_id = int(websocket.query_params.get("last_id") or 0)
+    except ValueError:
+        last_id = 0
+
+    await websocket.accept()
+    # Subscribe before reading the backlog so nothing created in between is
+    # lost; duplicates are skipped by id below
+    queue = hub.subscribe(user.id)
+    receive = push = None
+    try:
+        if last_id:
+            db = SessionLocal()
+            try:
+                missed = (
+                    db.query(Notification)
+                    .filter(Notification.user_id == user.id, Notification.id > last_id)
+                    .order_by(Notification.id)
+                    .limit(settings.notification_resume_limit)
+                    .all()
+                )
+                backlog = [serialize(n) for n in missed]
+            finally:
+                db.close()
+            for payload in backlog:
+                await websocket.send_json({"type": "notification", "notification": payload})
+                last_id = payload["id"]
+
+        receive = asyncio.ensure_future(websocket.receive_text())
+        last_seen = time.monotonic()
+        while True:
+            push = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({receive, push}, timeout=settings.ws_ping_interval_seconds, return_when=asyncio.FIRST_COMPLETED)
+            if push in done:
+                payload = push.result()
+                if payload["id"] > last_id:
+                    await websocket.send_json({"type": "notification", "notification": payload})
+                    last_id = payload["id"]
+            else:
+                push.cancel()
+            if receive in done:
+                receive.result()  # raises WebSocketDisconnect
+                last_seen = time.monotonic()
+                receive = asyncio.ensure_future(websocket.receive_text())
+            elif not done:
+                if time.monotonic() - last_seen > settings.ws_idle_timeout_seconds:
+                    await websocket.close(code=4000, reason="Idle timeout")
+                    break
+                await websocket.send_json({"type": "ping"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unsubscribe(user.id, queue)
+        for task in (receive, push):
+            if task is not None:
+                task.cancel()
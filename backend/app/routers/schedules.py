@@ -16,7 +16,9 @@ from app.schemas.schedule import (
     ScheduleResponse,
     ScheduleUpdate,
 )
+from app.services import events
 from app.services.auth import get_current_user
+from app.services.events import ShiftCreated
 
 router = APIRouter(prefix="/api/schedules", tags=["schedules"])
 
@@ -53,6 +55,8 @@ def create_schedule(
 ):
     schedule = Schedule(**data.dict())
     db.add(schedule)
+    db.flush()
+    events.record(db, ShiftCreated.from_schedule(schedule))
     db.commit()
     db.refresh(schedule)
     return schedule
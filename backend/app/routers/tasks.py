@@ -8,7 +8,9 @@ from app.middleware.rbac import require_role
 from app.models.task import PriorityEnum, StatusEnum, Task
 from app.models.user import RoleEnum, User
 from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate
+from app.services import events
 from app.services.auth import get_current_user
+from app.services.events import TaskAssigned
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
@@ -48,6 +50,8 @@ def create_task(
         created_by=current_user.id,
     )
     db.add(task)
+    db.flush()
+    events.record(db, TaskAssigned.from_task(task))
     db.commit()
     db.refresh(task)
     return task
@@ -77,8 +81,15 @@ def update_task(
                 detail="Staff can only update task status",
             )
 
+    previous_assignee = task.assigned_to
+    previous_due_date = task.due_date
     for field, value in data.dict(exclude_unset=True).items():
         setattr(task, field, value)
+    if task.due_date != previous_due_date:
+        # A new deadline earns its own reminders
+        task.reminder = None
+    if task.assigned_to != previous_assignee:
+        events.record(db, TaskAssigned.from_task(task))
 
     db.commit()
     db.refresh(task)
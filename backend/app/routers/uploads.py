@@ -1,42 +1,131 @@
 import os
 import uuid
+from collections import Counter
 from pathlib import Path
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, File, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
 
-from app.models.user import User
+from app.config import settings
+from app.database import get_db
+from app.models.finance import ReceiptJob
+from app.models.user import RoleEnum, User
+from app.schemas.finance import ReceiptBatchResponse, ReceiptJobResponse, RejectedUpload
 from app.services.auth import get_current_user
+from app.services.jobs import enqueue
+from app.services.receipts import EXTRACT_JOB
 
 router = APIRouter(prefix="/api/uploads", tags=["uploads"])
 
-UPLOAD_DIR = Path("/app/uploads")
+UPLOAD_DIR = Path(settings.upload_dir)
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".pdf"}
 MAX_SIZE = 10 * 1024 * 1024  # 10MB
 
 
-@router.post("")
-async def upload_file(
-    file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
-):
+async def _save_upload(file: UploadFile) -> Tuple[Optional[str], Optional[str]]:
+    """Validate and store an upload. Returns (filename, error)."""
     ext = os.path.splitext(file.filename or "")[1].lower()
     if ext not in ALLOWED_EXTENSIONS:
-        return {"error": f"File type {ext} not allowed"}
+        return None, f"File type {ext} not allowed"
 
     content = await file.read()
     if len(content) > MAX_SIZE:
-        return {"error": "File too large (max 10MB)"}
+        return None, "File too large (max 10MB)"
 
     filename = f"{uuid.uuid4().hex}{ext}"
     filepath = UPLOAD_DIR / filename
     filepath.write_bytes(content)
+    return filename, None
+
+
+def _batch_response(batch_id: str, jobs: List[ReceiptJob], rejected: Optional[List[RejectedUpload]] = None) -> ReceiptBatchResponse:
+    counts = Counter(job.status.value for job in jobs)
+    return ReceiptBatchResponse(
+        batch_id=batch_id,
+        counts=dict(counts),
+        jobs=[ReceiptJobResponse.model_validate(job) for job in jobs],
+        rejected=rejected or [],
+    )
+
+
+def _queue_receipts(db: Session, batch_id: str, jobs: List[ReceiptJob], rejected: List[RejectedUpload]) -> ReceiptBatchResponse:
+    db.add_all(jobs)
+    db.flush()
+    for job in jobs:
+        enqueue(db, EXTRACT_JOB, {"receipt_job_id": job.id})
+    db.commit()
+    return _batch_response(batch_id, jobs, rejected)
+
+
+def _can_view(job: ReceiptJob, user: User) -> bool:
+    return job.created_by == user.id or user.role in (RoleEnum.owner, RoleEnum.manager)
+
+
+@router.post("")
+async def upload_file(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+):
+    filename, error = await _save_upload(file)
+    if error:
+        return {"error": error}
 
     return {"url": f"/api/uploads/{filename}", "filename": filename}
 
 
+@router.post("/receipts", response_model=ReceiptBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_receipts(
+    files: List[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Queue receipts for extraction into draft expenses; poll the batch for progress."""
+    if len(files) > settings.receipt_max_batch:
+        raise HTTPException(status_code=400, detail=f"Too many files (max {settings.receipt_max_batch})")
+
+    batch_id = uuid.uuid4().hex
+    jobs = []
+    rejected = []
+    for file in files:
+        filename, error = await _save_upload(file)
+        if error:
+            rejected.append(RejectedUpload(filename=file.filename or "", error=error))
+            continue
+        jobs.append(ReceiptJob(batch_id=batch_id, receipt_url=f"/api/uploads/{filename}", created_by=current_user.id))
+
+    # Session work is blocking; keep it off the event loop
+    return await run_in_threadpool(_queue_receipts, db, batch_id, jobs, rejected)
+
+
+@router.get("/receipts/batches/{batch_id}", response_model=ReceiptBatchResponse)
+def get_receipt_batch(
+    batch_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    jobs = db.query(ReceiptJob).filter(ReceiptJob.batch_id == batch_id).order_by(ReceiptJob.id).all()
+    if not jobs or not _can_view(jobs[0], current_user):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    return _batch_response(batch_id, jobs)
+
+
+@router.get("/receipts/{job_id}", response_model=ReceiptJobResponse)
+def get_receipt_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    job = db.query(ReceiptJob).filter(ReceiptJob.id == job_id).first()
+    if not job or not _can_view(job, current_user):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Receipt job not found")
+    return job
+
+
 @router.get("/{filename}")
 async def get_file(filename: str):
     filepath = UPLOAD_DIR / filename
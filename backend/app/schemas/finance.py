@@ -1,9 +1,9 @@
 import datetime as dt
-from typing import Literal, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field, field_validator
 
-from app.models.finance import PayrollStatus
+from app.models.finance import PayrollStatus, ReceiptJobStatus
 from app.schemas.user import UserResponse
 
 VALID_PAYMENT_SOURCES = Literal["cash", "ip", "card"]
@@ -112,6 +112,7 @@ class IncomeResponse(BaseModel):
     receipt_url: Optional[str] = None
     payment_source: Optional[VALID_PAYMENT_SOURCES] = "cash"
     is_recurring: bool = False
+    recurring_source_id: Optional[int] = None
     created_at: dt.datetime
 
     class Config:
@@ -225,6 +226,15 @@ class AutoIncomeRequest(BaseModel):
     entries: list[AutoIncomeEntry]
 
 
+class RecurringIncomeRequest(BaseModel):
+    month: Optional[dt.date] = None  # any day of the month; defaults to this month
+    backfill: bool = False  # also fill earlier months missed since each template
+
+
+class RecurringIncomeResult(BaseModel):
+    created: int
+
+
 class AutoPayrollEntry(BaseModel):
     user_id: int
     period_start: dt.date
@@ -238,3 +248,33 @@ class AutoPayrollEntry(BaseModel):
 
 class AutoPayrollRequest(BaseModel):
     entries: list[AutoPayrollEntry]
+
+
+class ReceiptJobResponse(BaseModel):
+    id: int
+    batch_id: str
+    receipt_url: str
+    status: ReceiptJobStatus
+    attempts: int
+    error: Optional[str] = None
+    merchant: Optional[str] = None
+    amount: Optional[float] = None
+    date: Optional[dt.date] = None
+    expense_id: Optional[int] = None
+    created_at: dt.datetime
+    finished_at: Optional[dt.datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class RejectedUpload(BaseModel):
+    filename: str
+    error: str
+
+
+class ReceiptBatchResponse(BaseModel):
+    batch_id: str
+    counts: Dict[str, int]
+    jobs: List[ReceiptJobResponse]
+    rejected: List[RejectedUpload] = []
@@ -0,0 +1,30 @@
+import datetime as dt
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+from app.models.job import JobStatus
+
+
+class JobResponse(BaseModel):
+    id: int
+    name: str
+    payload: Dict[str, Any]
+    priority: int
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    run_at: dt.datetime
+    locked_by: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: dt.datetime
+    started_at: Optional[dt.datetime] = None
+    finished_at: Optional[dt.datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class JobEnqueue(BaseModel):
+    payload: Dict[str, Any] = {}
+    priority: Optional[int] = None
@@ -1,9 +1,37 @@
 import datetime as dt
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 
 from app.models.notification import NotificationType
+from app.models.user import RoleEnum
+
+
+class NotificationBulkCreate(BaseModel):
+    title: str
+    message: str
+    type: NotificationType = NotificationType.system
+    channel: Literal["in_app", "email", "both"] = "in_app"
+    user_ids: Optional[List[int]] = None
+    role: Optional[RoleEnum] = None
+
+    @model_validator(mode="after")
+    def check_recipients(self):
+        if self.user_ids is None and self.role is None:
+            raise ValueError("Provide user_ids or role")
+        return self
+
+
+class NotificationBulkResponse(BaseModel):
+    created: int
+
+
+class NotificationPreferences(BaseModel):
+    email_digest: bool
+
+
+class UnreadCountResponse(BaseModel):
+    count: int
 
 
 class NotificationResponse(BaseModel):
@@ -29,6 +29,7 @@ class UserResponse(BaseModel):
     position: Optional[str] = None
     avatar_url: Optional[str] = None
     is_active: bool
+    email_digest: bool = False
     created_at: datetime
 
     class Config:
@@ -42,6 +43,7 @@ class UserUpdate(BaseModel):
     position: Optional[str] = None
     avatar_url: Optional[str] = None
     is_active: Optional[bool] = None
+    email_digest: Optional[bool] = None
 
 
 class TokenResponse(BaseModel):
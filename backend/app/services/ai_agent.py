@@ -1,14 +1,21 @@
+import datetime as dt
 import json
 import logging
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import httpx
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.models.ai import AiConversation, AiMessage
+from app.models.ai import AiConversation, AiMessage, AiTurnUsage
 from app.models.user import RoleEnum, User
-from app.services.ai_tools import OWNER_TOOLS, STAFF_TOOLS, TOOL_DISPATCH, STAFF_TOOL_NAMES
+from app.services import ai_intents, ai_routing
+from app.services.ai_cache import run_tool
+from app.services.ai_prompt import PromptBuilder, RequestPrefix
+from app.services.ai_replay import RecordingTransport, ReplayTransport, Transport
+from app.services.llm_scheduler import CircuitOpenError, scheduler
+from app.services.ai_tools import MUTATING_TOOL_TABLES, OWNER_TOOLS, STAFF_TOOLS, TOOL_DISPATCH, STAFF_TOOL_NAMES
 
 logger = logging.getLogger(__name__)
 
@@ -20,11 +27,57 @@ SYSTEM_PROMPT = """Ты — Лия (LIYA), персональный AI-асси
 Если спрашивают информацию — получи её через инструмент и расскажи понятно.
 Если здороваются — представься как Лия и предложи помощь."""
 
+OWNER_PREFIX = RequestPrefix(SYSTEM_PROMPT, OWNER_TOOLS)
+STAFF_PREFIX = RequestPrefix(SYSTEM_PROMPT, STAFF_TOOLS)
+
+
+def _encode_result(result: Any) -> str:
+    # Compact separators: tool results are prompt tokens, whitespace is waste
+    return json.dumps(result, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+def _finish_timings(timings: Dict[str, float], turn_started: float) -> Dict[str, float]:
+    timings["total_ms"] = (time.perf_counter() - turn_started) * 1000
+    return {k: round(v, 1) for k, v in timings.items()}
+
+
+def _turn_usage(
+    user: User,
+    conversation: AiConversation,
+    message: AiMessage,
+    iterations: List[Dict[str, Any]],
+    tool_calls: int,
+    timings: Dict[str, float],
+    turn_started: float,
+) -> AiTurnUsage:
+    return AiTurnUsage(
+        message=message,
+        conversation_id=conversation.id,
+        user_id=user.id,
+        iterations=len(iterations),
+        tool_calls=tool_calls,
+        prompt_tokens=sum(i["prompt_tokens"] for i in iterations),
+        completion_tokens=sum(i["completion_tokens"] for i in iterations),
+        llm_ms=round(timings["llm_ms"], 1),
+        total_ms=round((time.perf_counter() - turn_started) * 1000, 1),
+        details=iterations or None,
+    )
+
 
 class DeepSeekAgent:
-    def __init__(self):
+    def __init__(self, transport: Optional[Transport] = None):
         self.api_key = settings.deepseek_api_key
         self.base_url = settings.deepseek_base_url
+        self._client: Optional[httpx.AsyncClient] = None
+        self._live = transport is None and settings.ai_transport_mode != "replay"
+        self.transport = transport or self._transport_from_settings()
+
+    def _transport_from_settings(self) -> Transport:
+        if settings.ai_transport_mode == "record":
+            return RecordingTransport(self._post, settings.ai_fixture_path)
+        if settings.ai_transport_mode == "replay":
+            return ReplayTransport(settings.ai_fixture_path)
+        return self._post
 
     async def chat(
         self,
@@ -33,14 +86,40 @@ class DeepSeekAgent:
         conversation_id: Optional[int],
         db: Session,
     ) -> Dict[str, Any]:
-        # Get or create conversation
+        """Run a whole turn and return the final message event."""
+        result: Dict[str, Any] = {}
+        async for event in self.chat_events(user, message, conversation_id, db):
+            if event["type"] == "message":
+                result = event
+        return result
+
+    async def chat_events(
+        self,
+        user: User,
+        message: str,
+        conversation_id: Optional[int],
+        db: Session,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run a turn, yielding events as they happen.
+
+        ``tool_started`` and ``tool_finished`` are yielded around every tool
+        call so the client can render action cards as each one completes;
+        the last event is always ``message`` with the reply and the same
+        fields ``chat`` returns.
+        """
+        # Wall time per phase, reported with the result
+        timings = {"llm_ms": 0.0, "tools_ms": 0.0, "persist_ms": 0.0}
+        turn_started = time.perf_counter()
+
+        # Get or create conversation; flushed, not committed, so it lands
+        # in the same transaction as the user message
+        started = time.perf_counter()
         if conversation_id:
             conversation = db.query(AiConversation).filter(AiConversation.id == conversation_id).first()
         else:
             conversation = AiConversation(user_id=user.id)
             db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
+            db.flush()
 
         # Save user message
         user_msg = AiMessage(
@@ -49,26 +128,79 @@ class DeepSeekAgent:
             content=message,
         )
         db.add(user_msg)
+        timings["persist_ms"] += (time.perf_counter() - started) * 1000
+
+        is_staff = user.role not in (RoleEnum.owner, RoleEnum.manager)
+
+        # Fixed staff questions are answered without the LLM
+        if is_staff:
+            today = dt.date.today()
+            match = ai_intents.match_intent(message, today)
+            ai_intents.record(match[0] if match else None)
+            if match:
+                started = time.perf_counter()
+                content, actions_taken = ai_intents.answer_intent(
+                    match[0], match[1], user, conversation.id, db, today,
+                )
+                timings["tools_ms"] += (time.perf_counter() - started) * 1000
+                for action in actions_taken:
+                    yield {"type": "tool_finished", **action}
+
+                started = time.perf_counter()
+                assistant_msg = AiMessage(
+                    conversation_id=conversation.id,
+                    role="assistant",
+                    content=content,
+                    actions_taken=actions_taken,
+                )
+                db.add(assistant_msg)
+                db.add(_turn_usage(user, conversation, assistant_msg, [], len(actions_taken), timings, turn_started))
+                # One commit for the whole fast-path turn
+                db.commit()
+                timings["persist_ms"] += (time.perf_counter() - started) * 1000
+
+                yield {
+                    "type": "message",
+                    "conversation_id": conversation.id,
+                    "content": content,
+                    "actions": actions_taken,
+                    "timings": _finish_timings(timings, turn_started),
+                }
+                return
+
+        # Make the user message durable before the slow LLM round trips
+        started = time.perf_counter()
         db.commit()
+        timings["persist_ms"] += (time.perf_counter() - started) * 1000
 
         # Build message history
         history = db.query(AiMessage).filter(
             AiMessage.conversation_id == conversation.id
         ).order_by(AiMessage.created_at).all()
 
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-        for msg in history:
-            messages.append({"role": msg.role, "content": msg.content})
-
         # Select tools based on role
-        tools = OWNER_TOOLS if user.role in (RoleEnum.owner, RoleEnum.manager) else STAFF_TOOLS
+        prefix = STAFF_PREFIX if is_staff else OWNER_PREFIX
+        prompt = PromptBuilder(prefix)
+        for msg in history:
+            prompt.append({"role": msg.role, "content": msg.content})
 
         # Call DeepSeek API with function calling loop
         actions_taken = []
+        iterations: List[Dict[str, Any]] = []
+        tool_result_bytes = 0
         max_iterations = 5
 
-        for _ in range(max_iterations):
-            response = await self._call_api(messages, tools)
+        for iteration in range(max_iterations):
+            route = ai_routing.choose_route(
+                iteration=iteration,
+                last_role=prompt.messages[-1]["role"],
+                message_chars=len(message),
+                tool_count=len(prefix.tools),
+            )
+            started = time.perf_counter()
+            response = await self._call_api(prompt, user.id, route)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            timings["llm_ms"] += elapsed_ms
 
             if not response:
                 break
@@ -79,28 +211,26 @@ class DeepSeekAgent:
             # Check for tool calls
             tool_calls = resp_message.get("tool_calls")
 
+            usage = response.get("usage") or {}
+            iterations.append({
+                "model": route.model,
+                "route": f"{route.tier}:{route.reason}",
+                "ms": round(elapsed_ms, 1),
+                "prompt_tokens": usage.get("prompt_tokens") or 0,
+                "completion_tokens": usage.get("completion_tokens") or 0,
+                "tool_calls": len(tool_calls or []),
+            })
+
             if not tool_calls:
                 # No more tool calls - final response
                 content = resp_message.get("content", "")
-
-                # Save assistant message
-                assistant_msg = AiMessage(
-                    conversation_id=conversation.id,
-                    role="assistant",
-                    content=content,
-                    actions_taken=actions_taken if actions_taken else None,
-                )
-                db.add(assistant_msg)
-                db.commit()
-
-                return {
-                    "conversation_id": conversation.id,
-                    "content": content,
-                    "actions": actions_taken,
-                }
+                self._log_tool_bytes(conversation.id, actions_taken, tool_result_bytes)
+                yield self._finish_turn(db, user, conversation, content, actions_taken, iterations, timings, turn_started)
+                return
 
             # Execute tool calls
-            messages.append(resp_message)
+            prompt.append(resp_message)
+            has_writes = False
 
             for tool_call in tool_calls:
                 func_name = tool_call["function"]["name"]
@@ -110,7 +240,6 @@ class DeepSeekAgent:
                     func_args = {}
 
                 # Enforce staff restrictions
-                is_staff = user.role not in (RoleEnum.owner, RoleEnum.manager)
                 if is_staff:
                     # Hard whitelist: staff can only call staff tools
                     if func_name not in STAFF_TOOL_NAMES:
@@ -120,14 +249,17 @@ class DeepSeekAgent:
                             "args": func_args,
                             "result": result,
                         })
-                        messages.append({
+                        yield {"type": "tool_finished", **actions_taken[-1]}
+                        prompt.append({
                             "role": "tool",
                             "tool_call_id": tool_call["id"],
-                            "content": json.dumps(result, ensure_ascii=False),
+                            "content": _encode_result(result),
                         })
                         continue
 
-                    if func_name in ("get_tasks", "get_schedule", "get_payroll"):
+                    if func_name == "get_tasks":
+                        func_args["assigned_to"] = user.id
+                    elif func_name in ("get_schedule", "get_payroll"):
                         func_args["user_id"] = user.id
                     elif func_name == "create_schedule_change_request":
                         func_args["user_id"] = user.id
@@ -137,38 +269,99 @@ class DeepSeekAgent:
                 # Inject current user ID where needed
                 if func_name in ("create_expense", "create_expense_from_receipt"):
                     func_args["created_by"] = user.id
+                elif func_name == "search_household":
+                    # Notes are private to their author
+                    func_args["_caller_id"] = user.id
 
                 # Execute tool
+                yield {"type": "tool_started", "tool": func_name, "args": func_args}
                 tool_func = TOOL_DISPATCH.get(func_name)
+                started = time.perf_counter()
                 if tool_func:
                     try:
-                        result = tool_func(db=db, **func_args)
+                        # A failed tool rolls back to its savepoint without
+                        # discarding the other writes in this batch
+                        with db.begin_nested():
+                            result = run_tool(conversation.id, func_name, tool_func, db, func_args)
+                        if func_name in MUTATING_TOOL_TABLES:
+                            has_writes = True
                     except Exception as e:
                         result = {"error": str(e)}
                 else:
                     result = {"error": f"Unknown tool: {func_name}"}
+                timings["tools_ms"] += (time.perf_counter() - started) * 1000
 
                 actions_taken.append({
                     "tool": func_name,
                     "args": func_args,
                     "result": result,
                 })
+                yield {"type": "tool_finished", **actions_taken[-1]}
 
-                messages.append({
+                encoded = _encode_result(result)
+                tool_result_bytes += len(encoded.encode("utf-8"))
+                prompt.append({
                     "role": "tool",
                     "tool_call_id": tool_call["id"],
-                    "content": json.dumps(result, ensure_ascii=False, default=str),
+                    "content": encoded,
                 })
 
+            # Commit this batch of tool writes before the next LLM call so no
+            # transaction stays open across a provider round trip
+            if has_writes:
+                started = time.perf_counter()
+                db.commit()
+                timings["persist_ms"] += (time.perf_counter() - started) * 1000
+
         # Fallback if max iterations reached
+        self._log_tool_bytes(conversation.id, actions_taken, tool_result_bytes)
+        yield self._finish_turn(
+            db, user, conversation,
+            "Выполнено несколько действий. Могу ли я ещё чем-то помочь?",
+            actions_taken, iterations, timings, turn_started,
+        )
+
+    def _finish_turn(
+        self,
+        db: Session,
+        user: User,
+        conversation: AiConversation,
+        content: str,
+        actions_taken: List[Dict],
+        iterations: List[Dict[str, Any]],
+        timings: Dict[str, float],
+        turn_started: float,
+    ) -> Dict[str, Any]:
+        # Save assistant message
+        started = time.perf_counter()
+        assistant_msg = AiMessage(
+            conversation_id=conversation.id,
+            role="assistant",
+            content=content,
+            actions_taken=actions_taken if actions_taken else None,
+        )
+        db.add(assistant_msg)
+        db.add(_turn_usage(user, conversation, assistant_msg, iterations, len(actions_taken), timings, turn_started))
+        db.commit()
+        timings["persist_ms"] += (time.perf_counter() - started) * 1000
+
         return {
+            "type": "message",
             "conversation_id": conversation.id,
-            "content": "Выполнено несколько действий. Могу ли я ещё чем-то помочь?",
+            "content": content,
             "actions": actions_taken,
+            "timings": _finish_timings(timings, turn_started),
         }
 
-    async def _call_api(self, messages: List[Dict], tools: List[Dict]) -> Optional[Dict]:
-        if not self.api_key:
+    def _log_tool_bytes(self, conversation_id: int, actions_taken: List[Dict], tool_result_bytes: int) -> None:
+        if actions_taken:
+            logger.info(
+                f"AI turn tool results: conversation={conversation_id} "
+                f"calls={len(actions_taken)} bytes={tool_result_bytes}"
+            )
+
+    async def _call_api(self, prompt: PromptBuilder, user_id: int, route: ai_routing.Route) -> Optional[Dict]:
+        if self._live and not self.api_key:
             logger.warning("DeepSeek API key not configured")
             return {
                 "choices": [{
@@ -178,29 +371,56 @@ class DeepSeekAgent:
                 }]
             }
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "deepseek-chat",
-                        "messages": messages,
-                        "tools": tools,
-                        "temperature": 0.7,
-                    },
-                )
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                logger.error(f"DeepSeek API error: {e}")
-                return {
-                    "choices": [{
-                        "message": {
-                            "content": f"Произошла ошибка при обращении к AI: {str(e)}",
-                        }
-                    }]
-                }
+        started = time.perf_counter()
+        body = prompt.body(model=route.model, temperature=route.temperature)
+        logger.debug(
+            f"DeepSeek request: model={route.model} route={route.tier}:{route.reason} "
+            f"serialize_ms={(time.perf_counter() - started) * 1000:.3f} "
+            f"bytes={len(body)} messages={len(prompt.messages)}"
+        )
+        ai_routing.stats.record_route(route)
+
+        async def call() -> Dict:
+            # Timed inside the scheduler so queue wait is not billed to the model
+            call_started = time.perf_counter()
+            response = await self.transport(body)
+            ai_routing.stats.record_call(route.model, (time.perf_counter() - call_started) * 1000, response.get("usage"))
+            return response
+
+        try:
+            return await scheduler.run(user_id, call)
+        except CircuitOpenError:
+            return {
+                "choices": [{
+                    "message": {
+                        "content": "AI-ассистент временно недоступен. Попробуйте через минуту.",
+                    }
+                }]
+            }
+        except Exception as e:
+            logger.error(f"DeepSeek API error: {e}")
+            return {
+                "choices": [{
+                    "message": {
+                        "content": f"Произошла ошибка при обращении к AI: {str(e)}",
+                    }
+                }]
+            }
+
+    async def _post(self, body: bytes) -> Dict:
+        response = await self._get_client().post(
+            f"{self.base_url}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            },
+            content=body,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # One pooled client per worker so retries and concurrent turns reuse connections
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=60.0)
+        return self._client
@@ -0,0 +1,150 @@
+"""Per-conversation memo of read-only AI tool results.
+
+An entry is dropped when its TTL runs out or when a table it read is
+written: right away for the assistant's own write tools, and on commit for
+any other session in this process (the REST routers, event handlers).
+Other processes keep caches of their own that never hear about this one's
+writes, so across gunicorn workers and the job worker staleness is bounded
+only by ai_tool_cache_ttl_seconds; keep it short.
+"""
+import json
+import logging
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction
+
+from app.config import settings
+from app.services.ai_tools import MUTATING_TOOL_TABLES, READ_TOOL_TABLES
+
+logger = logging.getLogger(__name__)
+
+MAX_CONVERSATIONS = 256
+
+_MISS = object()
+
+
+def _make_key(func_name: str, func_args: Dict[str, Any]) -> Tuple[str, str]:
+    """Normalize tool arguments so equivalent calls share a cache entry.
+
+    Arguments the model left as null are dropped, since the tool treats them
+    the same as missing ones.
+    """
+    normalized = {k: v for k, v in func_args.items() if v is not None}
+    return func_name, json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class ToolResultCache:
+    """Memoized read-only tool results for a single conversation."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self._entries.pop(key, None)
+            self.misses += 1
+            return _MISS
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Tuple[str, str], result: Any) -> None:
+        self._entries[key] = (time.monotonic(), result)
+
+    def invalidate_tables(self, tables: Set[str]) -> None:
+        stale = [key for key in list(self._entries) if READ_TOOL_TABLES[key[0]] & tables]
+        for key in stale:
+            del self._entries[key]
+
+
+_caches: "OrderedDict[int, ToolResultCache]" = OrderedDict()
+
+
+def get_conversation_cache(conversation_id: int) -> ToolResultCache:
+    cache = _caches.get(conversation_id)
+    if cache is None:
+        cache = ToolResultCache(ttl=settings.ai_tool_cache_ttl_seconds)
+        _caches[conversation_id] = cache
+        if len(_caches) > MAX_CONVERSATIONS:
+            _caches.popitem(last=False)
+    else:
+        _caches.move_to_end(conversation_id)
+    return cache
+
+
+def invalidate_tables(tables: Set[str]) -> None:
+    # A write in one conversation makes every conversation's reads of the
+    # same tables stale, not only its own.
+    for cache in list(_caches.values()):
+        cache.invalidate_tables(tables)
+
+
+def run_tool(
+    conversation_id: Optional[int],
+    func_name: str,
+    tool_func: Callable[..., Any],
+    db: Session,
+    func_args: Dict[str, Any],
+) -> Any:
+    if func_name in READ_TOOL_TABLES and conversation_id is not None:
+        cache = get_conversation_cache(conversation_id)
+        key = _make_key(func_name, func_args)
+        result = cache.get(key)
+        if result is not _MISS:
+            logger.debug(f"Tool cache hit: {func_name} (conversation {conversation_id})")
+            return result
+        result = tool_func(db=db, **func_args)
+        if not (isinstance(result, dict) and "error" in result):
+            cache.put(key, result)
+        return result
+
+    result = tool_func(db=db, **func_args)
+    tables = MUTATING_TOOL_TABLES.get(func_name)
+    if tables:
+        invalidate_tables(tables)
+    return result
+
+
+# --- Invalidation on commit ---
+
+_TOUCHED_KEY = "ai_cache_touched_tables"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context) -> None:
+    touched = session.info.setdefault(_TOUCHED_KEY, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            touched.add(table)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(state: ORMExecuteState) -> None:
+    # insert()/update()/delete() run through the session skip the flush
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info.setdefault(_TOUCHED_KEY, set()).add(state.statement.table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    tables = session.info.pop(_TOUCHED_KEY, None)
+    if tables:
+        invalidate_tables(tables)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_touched(session: Session, previous_transaction: SessionTransaction) -> None:
+    # A rolled-back savepoint may still leave stale entries behind; dropping
+    # a few extra on the outer commit is harmless
+    if not previous_transaction.nested:
+        session.info.pop(_TOUCHED_KEY, None)
@@ -0,0 +1,240 @@
+"""Deterministic fast path for common staff questions.
+
+Fixed questions like "какие у меня задачи на сегодня" or "когда следующая
+смена" are answered by calling the ai_tools function directly and rendered
+from a template, skipping both LLM round trips. A pattern has to match the
+whole question, a plain listing request with an optional period, so a
+message that only mentions tasks or shifts ("почему задача #5 просрочена?")
+still goes to the LLM, as does anything that asks to change data.
+"""
+import datetime as dt
+import logging
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.services.ai_cache import run_tool
+from app.services.ai_tools import TOOL_DISPATCH
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ["пн", "вт", "ср", "чт", "пт", "сб", "вс"]
+TASK_STATUS_LABELS = {"pending": "ожидает", "in_progress": "в работе", "done": "выполнена"}
+
+# Anything that asks to change data goes to the LLM, which has the write tools
+_MUTATION_RE = re.compile(
+    r"отмет|выполнил|сделал[аи]?\b|измени|перенес|закрой|закрыть|созда|добав|удали|запрос|поменя|обнови|отмени"
+)
+_POLITE_RE = re.compile(r"\b(пожалуйста|подскажи(те)?|скажи(те)?)\b|[,?!]|\.$")
+# Periods parse_period understands, as a trailing part of a question
+_PERIOD = (
+    r"(?:(?:на|в|во) )?(?:сегодня|завтра|послезавтра|неделю"
+    r"|(?:эт\w*|текущ\w*|следующ\w*) недел\w*|(?:эт\w*|текущ\w*) месяц\w*|\d{1,2}\.\d{1,2}(?:\.\d{4})?)"
+)
+# Matched against the whole question with fullmatch
+_NEXT_SHIFT_RE = re.compile(
+    r"(?:(?:когда|какая) )?(?:у меня )?(?:моя )?(?:следующая|ближайшая) смена"
+    r"|когда (?:мне )?(?:на работу|(?:я )?(?:работаю|выхожу(?: на работу)?))"
+)
+_SCHEDULE_RE = re.compile(
+    rf"(?:(?:какое|какой|какие|какая|покажи|показать|мое|мой|мои)(?: у меня| мне| мое| мой| мои)? )?"
+    rf"(?:расписание|график|смены|смена)(?: у меня)?(?: {_PERIOD})?"
+    rf"|когда (?:я )?(?:работаю|выхожу(?: на работу)?) {_PERIOD}"
+)
+_TASKS_RE = re.compile(
+    rf"(?:(?:(?:какие|покажи|показать|список|мои)(?: у меня| мне| мои)? )?(?:открытые |текущие )?задач\w*(?: у меня)?"
+    rf"|что (?:мне )?(?:нужно |надо )?(?:с)?делать)(?: {_PERIOD})?"
+)
+_PAYROLL_RE = re.compile(
+    r"(?:(?:какая|когда|покажи|показать|сколько)(?: у меня| мне)? )?(?:моя |мою |последняя |последнюю )*"
+    r"(?:зарплата|зарплату|выплата|выплату|зп|аванс)(?: у меня)?"
+)
+_DATE_RE = re.compile(r"\b(\d{1,2})\.(\d{1,2})(?:\.(\d{4}))?\b")
+
+stats: Counter = Counter()
+
+
+def _normalize(message: str) -> str:
+    return " ".join(message.lower().replace("ё", "е").split())
+
+
+def _question(text: str) -> str:
+    return " ".join(_POLITE_RE.sub(" ", text).split())
+
+
+def parse_period(text: str, today: dt.date) -> Optional[Tuple[dt.date, dt.date]]:
+    if "послезавтра" in text:
+        day = today + dt.timedelta(days=2)
+        return day, day
+    if "завтра" in text:
+        day = today + dt.timedelta(days=1)
+        return day, day
+    if "сегодня" in text:
+        return today, today
+    if re.search(r"следующ\w* недел", text):
+        start = today + dt.timedelta(days=7 - today.weekday())
+        return start, start + dt.timedelta(days=6)
+    if re.search(r"(эт\w*|текущ\w*) недел|неделю\b|на неделе", text):
+        return today, today + dt.timedelta(days=6 - today.weekday())
+    if re.search(r"(эт\w*|текущ\w*) месяц", text):
+        next_month = (today.replace(day=28) + dt.timedelta(days=4)).replace(day=1)
+        return today, next_month - dt.timedelta(days=1)
+    match = _DATE_RE.search(text)
+    if match:
+        day_num, month, year = match.groups()
+        try:
+            day = dt.date(int(year) if year else today.year, int(month), int(day_num))
+        except ValueError:
+            return None
+        return day, day
+    return None
+
+
+def match_intent(message: str, today: dt.date) -> Optional[Tuple[str, Dict[str, Any]]]:
+    text = _normalize(message)
+    if not text or _MUTATION_RE.search(text):
+        return None
+    question = _question(text)
+    period = parse_period(question, today)
+
+    if _NEXT_SHIFT_RE.fullmatch(question):
+        return "next_shift", {}
+    if _SCHEDULE_RE.fullmatch(question):
+        return "schedule", {"period": period or (today, today + dt.timedelta(days=6))}
+    if _TASKS_RE.fullmatch(question):
+        return "tasks", {"period": period}
+    if _PAYROLL_RE.fullmatch(question):
+        return "payroll", {}
+    return None
+
+
+def _records(table: Dict) -> List[Dict]:
+    return [dict(zip(table["columns"], row)) for row in table["rows"]]
+
+
+def _fmt_date(value: str) -> str:
+    day = dt.date.fromisoformat(value)
+    return f"{day:%d.%m} ({WEEKDAYS[day.weekday()]})"
+
+
+def _fmt_period(period: Tuple[dt.date, dt.date]) -> str:
+    start, end = period
+    if start == end:
+        return f"на {start:%d.%m}"
+    return f"с {start:%d.%m} по {end:%d.%m}"
+
+
+def _fmt_shift(s: Dict) -> str:
+    line = f"{_fmt_date(s['date'])} {s['shift_start'][:5]}–{s['shift_end'][:5]}, {s['location']}"
+    if s.get("notes"):
+        line += f" ({s['notes']})"
+    return line
+
+
+def _answer_next_shift(rows: List[Dict]) -> str:
+    upcoming = [s for s in rows if s["status"] == "scheduled"]
+    if not upcoming:
+        return "Запланированных смен пока нет."
+    return f"Ваша ближайшая смена: {_fmt_shift(upcoming[0])}."
+
+
+def _answer_schedule(rows: List[Dict], period: Tuple[dt.date, dt.date]) -> str:
+    shifts = [s for s in rows if s["status"] != "cancelled"]
+    if not shifts:
+        return f"Смен {_fmt_period(period)} нет."
+    lines = "\n".join(f"• {_fmt_shift(s)}" for s in shifts)
+    return f"Ваши смены {_fmt_period(period)}:\n{lines}"
+
+
+def _answer_tasks(rows: List[Dict], truncated: bool, period: Optional[Tuple[dt.date, dt.date]], today: dt.date) -> str:
+    tasks = [t for t in rows if t["status"] != "done"]
+    if period:
+        tasks = [t for t in tasks if not t["due_date"] or dt.date.fromisoformat(t["due_date"]) <= period[1]]
+    # rows is the newest page of tasks only, so counts are exact only when
+    # nothing was cut off
+    more = "\nПоказаны только последние задачи, полный список — в разделе «Задачи»." if truncated else ""
+    if not tasks:
+        return ("Среди последних задач открытых нет." + more) if truncated else "Открытых задач нет — всё сделано!"
+    lines = []
+    for t in tasks:
+        line = f"• #{t['id']} {t['title']} — {TASK_STATUS_LABELS.get(t['status'], t['status'])}"
+        if t["due_date"]:
+            due = dt.date.fromisoformat(t["due_date"])
+            line += f", срок {_fmt_date(t['due_date'])}"
+            if due < today:
+                line += " ⚠️ просрочена"
+        if t["priority"] in ("high", "urgent"):
+            line += " ❗"
+        lines.append(line)
+    header = "Ваши задачи:" if truncated else f"Ваши задачи ({len(tasks)}):"
+    return header + "\n" + "\n".join(lines) + more
+
+
+def _answer_payroll(rows: List[Dict]) -> str:
+    if not rows:
+        return "Записей о зарплате пока нет."
+    p = rows[0]
+    status = "выплачено" if p["status"] == "paid" else "ожидает выплаты"
+    amount = f"{p['net_amount']:,.2f}".replace(",", " ")
+    return (
+        f"Последняя зарплата за период {_fmt_date(p['period_start'])} — {_fmt_date(p['period_end'])}: "
+        f"{amount} ₽ ({status})."
+    )
+
+
+def answer_intent(
+    intent: str,
+    params: Dict[str, Any],
+    user: User,
+    conversation_id: int,
+    db: Session,
+    today: dt.date,
+) -> Tuple[str, List[Dict]]:
+    """Run the tool behind a matched intent and render the reply.
+
+    Returns the reply text and the action records, shaped like the ones the
+    LLM path produces.
+    """
+    if intent == "next_shift":
+        tool, args = "get_schedule", {"user_id": user.id, "date_from": today.isoformat(), "limit": 10}
+    elif intent == "schedule":
+        start, end = params["period"]
+        tool, args = "get_schedule", {"user_id": user.id, "date_from": start.isoformat(), "date_to": end.isoformat()}
+    elif intent == "tasks":
+        tool, args = "get_tasks", {"assigned_to": user.id}
+    else:
+        tool, args = "get_payroll", {"user_id": user.id, "limit": 1}
+
+    result = run_tool(conversation_id, tool, TOOL_DISPATCH[tool], db, args)
+    rows = _records(result)
+
+    if intent == "next_shift":
+        content = _answer_next_shift(rows)
+    elif intent == "schedule":
+        content = _answer_schedule(rows, params["period"])
+    elif intent == "tasks":
+        content = _answer_tasks(rows, result.get("truncated", False), params["period"], today)
+    else:
+        content = _answer_payroll(rows)
+
+    return content, [{"tool": tool, "args": args, "result": result}]
+
+
+def record(intent: Optional[str]) -> None:
+    stats["total"] += 1
+    if intent:
+        stats["matched"] += 1
+        stats[f"intent:{intent}"] += 1
+
+
+def snapshot() -> Dict[str, Any]:
+    total = stats["total"]
+    return {
+        "total": total,
+        "matched": stats["matched"],
+        "hit_rate": round(stats["matched"] / total, 3) if total else 0.0,
+        "by_intent": {k.split(":", 1)[1]: v for k, v in stats.items() if k.startswith("intent:")},
+    }
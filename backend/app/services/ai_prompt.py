@@ -0,0 +1,45 @@
+import json
+from typing import Any, Dict, List
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class RequestPrefix:
+    """The byte-stable head of a chat completion request: tools plus system prompt.
+
+    Built once per role at import time. Every request for that role starts
+    with exactly these bytes, so the provider's prompt-prefix cache applies
+    and only the conversation tail is serialized per call.
+    """
+
+    def __init__(self, system_prompt: str, tools: List[Dict]):
+        self.system_message = {"role": "system", "content": system_prompt}
+        self.tools = tools
+        self.data = (
+            b'{"tools":' + _encode(tools)
+            + b',"messages":[' + _encode(self.system_message)
+        )
+
+
+class PromptBuilder:
+    """Accumulates a conversation on top of a RequestPrefix.
+
+    Each message is encoded once when appended; a request body is the cached
+    prefix plus the already-encoded messages.
+    """
+
+    def __init__(self, prefix: RequestPrefix):
+        self.prefix = prefix
+        self.messages: List[Dict] = [prefix.system_message]
+        self._encoded: List[bytes] = []
+
+    def append(self, message: Dict) -> None:
+        self.messages.append(message)
+        self._encoded.append(b"," + _encode(message))
+
+    def body(self, model: str, temperature: float) -> bytes:
+        # Per-call parameters go after the messages so they never disturb the prefix
+        tail = b'],"model":' + _encode(model) + b',"temperature":' + _encode(temperature) + b"}"
+        return b"".join([self.prefix.data, *self._encoded, tail])
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Union
+
+logger = logging.getLogger(__name__)
+
+# A transport takes a serialized chat completion request and returns the parsed response
+Transport = Callable[[bytes], Awaitable[Dict]]
+
+
+class ReplayExhausted(Exception):
+    """Raised when a replay fixture has no exchanges left."""
+
+
+class RecordingTransport:
+    """Wraps a live transport and appends every exchange to a JSONL fixture.
+
+    The tool schemas are dropped from the stored request since they are the
+    same for every call of a role and would dominate the fixture size.
+    """
+
+    def __init__(self, inner: Transport, path: Union[str, Path]):
+        self.inner = inner
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    async def __call__(self, body: bytes) -> Dict:
+        started = time.perf_counter()
+        response = await self.inner(body)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        request = json.loads(body)
+        request.pop("tools", None)
+        line = json.dumps(
+            {"request": request, "response": response, "elapsed_ms": round(elapsed_ms, 1)},
+            ensure_ascii=False,
+        )
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return response
+
+
+class ReplayTransport:
+    """Serves recorded responses in order without touching the network.
+
+    With ``simulate_latency`` each response is delayed by the wall time
+    observed when it was recorded.
+    """
+
+    def __init__(self, path: Union[str, Path], simulate_latency: bool = False):
+        self.path = Path(path)
+        self.simulate_latency = simulate_latency
+        with self.path.open(encoding="utf-8") as f:
+            self.exchanges = deque(json.loads(line) for line in f if line.strip())
+
+    async def __call__(self, body: bytes) -> Dict:
+        if not self.exchanges:
+            raise ReplayExhausted(f"No recorded exchanges left in {self.path}")
+        exchange = self.exchanges.popleft()
+        if self.simulate_latency:
+            await asyncio.sleep(exchange.get("elapsed_ms", 0) / 1000)
+        return exchange["response"]
@@ -0,0 +1,87 @@
+"""Per-iteration model routing for the chat agent.
+
+Summarizing tool results and short, narrow requests go to the fast model;
+planning over a long message or a large tool set, and follow-up planning
+after a first round of tools, go to the large one. Latency and token
+counts are kept per model so the thresholds can be tuned from real traffic.
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Route:
+    tier: str  # fast | large
+    model: str
+    temperature: float
+    reason: str
+
+
+def fast_route(reason: str) -> Route:
+    return Route("fast", settings.llm_fast_model, settings.llm_fast_temperature, reason)
+
+
+def large_route(reason: str) -> Route:
+    return Route("large", settings.llm_large_model, settings.llm_large_temperature, reason)
+
+
+def choose_route(iteration: int, last_role: str, message_chars: int, tool_count: int) -> Route:
+    """Pick the model for one LLM call of a turn.
+
+    ``iteration`` counts calls within the turn from 0 and ``last_role`` is
+    the role of the last prompt message.
+    """
+    if last_role == "tool":
+        # The model only has to phrase the results it was given, unless it
+        # already needed a second round of tools
+        if iteration >= settings.llm_route_followup_iteration:
+            return large_route("multi_step")
+        return fast_route("summarize")
+    if message_chars > settings.llm_route_long_message_chars:
+        return large_route("long_message")
+    if tool_count > settings.llm_route_max_fast_tools:
+        return large_route("many_tools")
+    return fast_route("simple")
+
+
+class ModelStats:
+    """Call count, latency and token usage per model."""
+
+    def __init__(self):
+        self._models: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self._reasons: Dict[str, int] = defaultdict(int)
+
+    def record_route(self, route: Route) -> None:
+        self._reasons[f"{route.tier}:{route.reason}"] += 1
+
+    def record_call(self, model: str, elapsed_ms: float, usage: Optional[Dict[str, Any]]) -> None:
+        entry = self._models[model]
+        entry["calls"] += 1
+        entry["latency_ms_total"] += elapsed_ms
+        entry["latency_ms_max"] = max(entry["latency_ms_max"], elapsed_ms)
+        for field in ("prompt_tokens", "completion_tokens", "prompt_cache_hit_tokens"):
+            entry[field] += (usage or {}).get(field) or 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        models = {}
+        for model, entry in self._models.items():
+            calls = entry["calls"]
+            models[model] = {
+                "calls": int(calls),
+                "latency_avg_ms": round(entry["latency_ms_total"] / calls, 1) if calls else 0.0,
+                "latency_max_ms": round(entry["latency_ms_max"], 1),
+                "prompt_tokens": int(entry["prompt_tokens"]),
+                "completion_tokens": int(entry["completion_tokens"]),
+                "prompt_cache_hit_tokens": int(entry["prompt_cache_hit_tokens"]),
+                "completion_tokens_avg": round(entry["completion_tokens"] / calls, 1) if calls else 0.0,
+            }
+        return {"models": models, "routes": dict(self._reasons)}
+
+
+stats = ModelStats()
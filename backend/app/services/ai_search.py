@@ -0,0 +1,318 @@
+"""Embedding index over notes, tasks and expenses for assistant retrieval.
+
+Texts are embedded by a pluggable ``Embedder``; the default hashes words
+into a fixed number of buckets, so it needs no model download or network.
+Vectors live in one contiguous float32 matrix that is built lazily on the
+first search and then kept current from session commits. A query is a
+single matrix-vector product.
+
+Every app process has its own index, and commits only update the index of
+the process that made them. Before a search the index therefore also
+re-reads rows whose ``updated_at`` is past its watermark (at most every
+ai_search_refresh_seconds), so writes from other workers show up within
+seconds. Rows deleted elsewhere are dropped when a search hits them.
+"""
+import datetime as dt
+import logging
+import re
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.config import settings
+from app.models.finance import Expense, category_name
+from app.models.note import Note
+from app.models.task import Task
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("note", "task", "expense")
+SHARED = -1  # owner id for rows visible to every caller
+
+# Crude stemming: Russian inflects word endings, so a prefix feature lets
+# "расходы" match "расходов"
+STEM_LENGTH = 5
+_TOKEN_RE = re.compile(r"\w+")
+
+# updated_at is the writing transaction's start time, so a refresh re-reads
+# this much before its watermark to catch transactions that committed late
+REFRESH_OVERLAP = dt.timedelta(minutes=5)
+
+# (kind, id, text, owner id)
+Document = Tuple[str, int, str, int]
+
+
+class Embedder(Protocol):
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return an L2-normalized float32 matrix with one row per text."""
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words, word stems and word bigrams."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = [w for w in _TOKEN_RE.findall(text.lower().replace("ё", "е")) if len(w) > 2 or w.isdigit()]
+        features = list(words)
+        features += [w[:STEM_LENGTH] + "~" for w in words if len(w) > STEM_LENGTH]
+        features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for feature in self._features(text):
+                # crc32 rather than hash(): stable across processes
+                h = zlib.crc32(feature.encode("utf-8"))
+                matrix[i, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+def _document(obj) -> Optional[Document]:
+    if isinstance(obj, Note):
+        return "note", obj.id, f"{obj.title}\n{obj.content or ''}", obj.user_id
+    if isinstance(obj, Task):
+        return "task", obj.id, f"{obj.title}\n{obj.description or ''}", SHARED
+    if isinstance(obj, Expense):
+        return "expense", obj.id, f"{category_name(obj.category)} {obj.description}", SHARED
+    return None
+
+
+class VectorIndex:
+    """Vectors for every indexed row, searched top-k by dot product.
+
+    Rows are stored in a preallocated matrix that doubles when full;
+    removals move the last row into the freed slot so the live rows stay
+    contiguous.
+    """
+
+    def __init__(self, embedder: Embedder):
+        self.embedder = embedder
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._matrix = np.zeros((0, self.embedder.dim), dtype=np.float32)
+            self._kinds = np.zeros(0, dtype=np.int8)
+            self._owners = np.zeros(0, dtype=np.int64)
+            self._keys: List[Tuple[str, int]] = []
+            self._rows: Dict[Tuple[str, int], int] = {}
+            self.built = False
+            self.synced_to: Optional[dt.datetime] = None
+            self._checked_at = 0.0
+            # updated_at of each row as last loaded from the database
+            self._stamps: Dict[Tuple[str, int], dt.datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _reserve(self, extra: int) -> None:
+        needed = len(self._keys) + extra
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 64)
+        matrix = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        kinds = np.zeros(capacity, dtype=np.int8)
+        owners = np.zeros(capacity, dtype=np.int64)
+        size = len(self._keys)
+        matrix[:size] = self._matrix[:size]
+        kinds[:size] = self._kinds[:size]
+        owners[:size] = self._owners[:size]
+        self._matrix, self._kinds, self._owners = matrix, kinds, owners
+
+    def upsert(self, documents: Sequence[Document]) -> None:
+        if not documents:
+            return
+        vectors = self.embedder.embed([d[2] for d in documents])
+        with self._lock:
+            self._reserve(len(documents))
+            for (kind, obj_id, _, owner), vector in zip(documents, vectors):
+                key = (kind, obj_id)
+                row = self._rows.get(key)
+                if row is None:
+                    row = len(self._keys)
+                    self._keys.append(key)
+                    self._rows[key] = row
+                self._matrix[row] = vector
+                self._kinds[row] = KINDS.index(kind)
+                self._owners[row] = owner
+
+    def remove(self, keys: Sequence[Tuple[str, int]]) -> None:
+        with self._lock:
+            for key in keys:
+                self._stamps.pop(key, None)
+                row = self._rows.pop(key, None)
+                if row is None:
+                    continue
+                last = len(self._keys) - 1
+                if row != last:
+                    moved = self._keys[last]
+                    self._matrix[row] = self._matrix[last]
+                    self._kinds[row] = self._kinds[last]
+                    self._owners[row] = self._owners[last]
+                    self._keys[row] = moved
+                    self._rows[moved] = row
+                self._keys.pop()
+
+    @staticmethod
+    def _load(db: Session, since: Optional[dt.datetime]) -> List[Tuple[Document, dt.datetime]]:
+        """(document, updated_at) for rows written at or after since, or for every row."""
+        notes = db.query(Note.id, Note.title, Note.content, Note.user_id, Note.updated_at)
+        tasks = db.query(Task.id, Task.title, Task.description, Task.updated_at)
+        expenses = db.query(Expense.id, Expense.category, Expense.description, Expense.updated_at)
+        if since is not None:
+            notes = notes.filter(Note.updated_at >= since)
+            tasks = tasks.filter(Task.updated_at >= since)
+            expenses = expenses.filter(Expense.updated_at >= since)
+
+        loaded: List[Tuple[Document, dt.datetime]] = []
+        for obj_id, title, content, user_id, updated_at in notes:
+            loaded.append((("note", obj_id, f"{title}\n{content or ''}", user_id), updated_at))
+        for obj_id, title, description, updated_at in tasks:
+            loaded.append((("task", obj_id, f"{title}\n{description or ''}", SHARED), updated_at))
+        for obj_id, category, description, updated_at in expenses:
+            loaded.append((("expense", obj_id, f"{category} {description}", SHARED), updated_at))
+        return loaded
+
+    def _take(self, loaded: List[Tuple[Document, dt.datetime]]) -> None:
+        self.upsert([document for document, _ in loaded])
+        for document, updated_at in loaded:
+            self._stamps[document[:2]] = updated_at
+        stamps = [updated_at for _, updated_at in loaded if updated_at is not None]
+        if stamps and (self.synced_to is None or max(stamps) > self.synced_to):
+            self.synced_to = max(stamps)
+
+    def build(self, db: Session) -> None:
+        loaded = self._load(db, None)
+        self.reset()
+        self._take(loaded)
+        self._checked_at = time.monotonic()
+        self.built = True
+        logger.info(f"Search index built: rows={len(loaded)} dim={self.embedder.dim}")
+
+    def refresh(self, db: Session) -> int:
+        """Build, or pick up rows written since the last look, at most every
+        ai_search_refresh_seconds. Returns the rows re-indexed."""
+        if not self.built:
+            self.build(db)
+            return len(self)
+        now = time.monotonic()
+        if now - self._checked_at < settings.ai_search_refresh_seconds:
+            return 0
+        self._checked_at = now
+        since = self.synced_to - REFRESH_OVERLAP if self.synced_to else None
+        # The overlap brings back rows already seen; only re-embed changes
+        changed = [
+            (document, updated_at) for document, updated_at in self._load(db, since)
+            if self._stamps.get(document[:2]) != updated_at
+        ]
+        self._take(changed)
+        return len(changed)
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        owner: Optional[int] = None,
+        kinds: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[str, int, float]]:
+        """Return up to ``k`` (kind, id, score) tuples, best first.
+
+        Only shared rows and rows owned by ``owner`` are considered.
+        """
+        vector = self.embedder.embed([query])[0]
+        with self._lock:
+            size = len(self._keys)
+            if not size:
+                return []
+            scores = self._matrix[:size] @ vector
+            allowed = (self._owners[:size] == SHARED) | (self._owners[:size] == (owner if owner is not None else SHARED))
+            if kinds:
+                allowed &= np.isin(self._kinds[:size], [KINDS.index(kind) for kind in kinds if kind in KINDS])
+            scores = np.where(allowed, scores, -np.inf)
+            k = min(k, size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(*self._keys[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+index = VectorIndex(HashingEmbedder(settings.ai_search_dim))
+
+
+def set_embedder(embedder: Embedder) -> None:
+    """Swap the embedding model; the index is rebuilt on the next search."""
+    index.embedder = embedder
+    index.reset()
+
+
+# --- Incremental updates ---
+
+# Changes are collected on flush and applied only once the transaction
+# commits, so rolled-back writes never reach the index. Each change is kept
+# with the savepoint it was flushed in: a tool that fails inside its
+# savepoint drops only its own changes, not those of earlier tools.
+
+_PENDING_KEY = "search_index_pending"
+
+
+def _within(transaction: Optional[SessionTransaction], savepoint: SessionTransaction) -> bool:
+    while transaction is not None:
+        if transaction is savepoint:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    savepoint = session.get_nested_transaction()
+    for obj in list(session.new) + list(session.dirty):
+        document = _document(obj)
+        if document:
+            pending.append((savepoint, document[:2], document))
+    for obj in session.deleted:
+        document = _document(obj)
+        if document:
+            pending.append((savepoint, document[:2], None))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session) -> None:
+    if session.in_nested_transaction():
+        # A savepoint was released; its changes wait for the outer commit
+        return
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not index.built:
+        return
+    # Later flushes of the same row win
+    latest = {key: document for _, key, document in pending}
+    try:
+        index.upsert([d for d in latest.values() if d is not None])
+        index.remove([key for key, d in latest.items() if d is None])
+    except Exception as e:
+        # A stale index only degrades search; never fail the commit over it
+        logger.error(f"Search index update failed: {e}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session: Session, previous_transaction: SessionTransaction) -> None:
+    if not previous_transaction.nested:
+        session.info.pop(_PENDING_KEY, None)
+        return
+    pending = session.info.get(_PENDING_KEY)
+    if pending:
+        pending[:] = [change for change in pending if not _within(change[0], previous_transaction)]
@@ -1,19 +1,110 @@
 import datetime as dt
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.models.finance import Expense, ExpenseCategory, Income, Payroll, PayrollStatus
+from app.models.finance import Expense, ExpenseCategory, Income, Payroll, PayrollStatus, category_name
+from app.models.note import Note
 from app.models.notification import Notification, NotificationType
 from app.models.schedule import Schedule, ScheduleChangeRequest, ScheduleStatus
 from app.models.task import PriorityEnum, StatusEnum, Task
 from app.models.user import RoleEnum, User
+from app.services import events
+from app.services.ai_search import index as search_index
+from app.services.events import ShiftCreated, TaskAssigned
 from app.utils.security import hash_password
 
+DEFAULT_TOOL_LIMIT = 50
+MAX_TOOL_LIMIT = 200
+SUMMARY_SAMPLE_SIZE = 5
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 30
+
+SCHEDULE_COLUMNS = ("id", "user_id", "date", "shift_start", "shift_end", "location", "notes", "status")
+TASK_COLUMNS = ("id", "title", "description", "assigned_to", "priority", "status", "due_date")
+PAYROLL_COLUMNS = ("id", "user_id", "period_start", "period_end", "base_salary", "bonuses", "deductions", "net_amount", "status")
+EXPENSE_COLUMNS = ("id", "category", "description", "amount", "date")
+INCOME_COLUMNS = ("id", "source", "description", "amount", "date", "category")
+SEARCH_COLUMNS = ("kind", "id", "score", "date", "title", "details")
+
+
+# --- Result Encoding ---
+
+def _clamp_limit(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_TOOL_LIMIT
+    return min(limit, MAX_TOOL_LIMIT)
+
+
+def _project(columns: Tuple[str, ...], fields: Optional[List[str]]) -> List[str]:
+    if not fields:
+        return list(columns)
+    # "id" is always kept so the model can refer back to a row
+    return [c for c in columns if c == "id" or c in fields]
+
+
+def _tabulate(query, columns: Tuple[str, ...], row: Callable[[Any], Dict], limit: Optional[int], fields: Optional[List[str]]) -> Dict:
+    """Encode query results as a header row plus value rows.
+
+    Fetches one row past the limit to report truncation without a COUNT.
+    """
+    limit = _clamp_limit(limit)
+    selected = _project(columns, fields)
+    records = query.limit(limit + 1).all()
+    truncated = len(records) > limit
+    rows = []
+    for r in records[:limit]:
+        values = row(r)
+        rows.append([values[c] for c in selected])
+    return {"columns": selected, "rows": rows, "truncated": truncated}
+
+
+def _schedule_row(s: Schedule) -> Dict:
+    return {
+        "id": s.id, "user_id": s.user_id, "date": str(s.date),
+        "shift_start": str(s.shift_start), "shift_end": str(s.shift_end),
+        "location": s.location, "notes": s.notes, "status": s.status.value,
+    }
+
+
+def _task_row(t: Task) -> Dict:
+    return {
+        "id": t.id, "title": t.title, "description": t.description,
+        "assigned_to": t.assigned_to, "priority": t.priority.value,
+        "status": t.status.value, "due_date": str(t.due_date) if t.due_date else None,
+    }
+
+
+def _payroll_row(p: Payroll) -> Dict:
+    return {
+        "id": p.id, "user_id": p.user_id,
+        "period_start": str(p.period_start), "period_end": str(p.period_end),
+        "base_salary": float(p.base_salary), "bonuses": float(p.bonuses),
+        "deductions": float(p.deductions), "net_amount": float(p.net_amount),
+        "status": p.status.value,
+    }
+
+
+def _expense_row(e: Expense) -> Dict:
+    return {
+        "id": e.id, "category": category_name(e.category), "description": e.description,
+        "amount": float(e.amount), "date": str(e.date),
+    }
+
+
+def _income_row(r: Income) -> Dict:
+    return {
+        "id": r.id, "source": r.source, "description": r.description,
+        "amount": float(r.amount), "date": str(r.date), "category": r.category,
+    }
+
 
 # --- Tool Functions ---
 
+# Tools flush but never commit: DeepSeekAgent runs each call in a savepoint
+# and commits once per batch of tool calls.
+
 def list_staff(db: Session, role: Optional[str] = None) -> List[Dict]:
     query = db.query(User).filter(User.is_active == True)
     if role:
@@ -44,12 +135,11 @@ def create_staff(db: Session, email: str, full_name: str, role: str, phone: Opti
         phone=phone,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    db.flush()
     return {"id": user.id, "full_name": user.full_name, "role": user.role.value, "message": "Staff created successfully"}
 
 
-def get_schedule(db: Session, user_id: Optional[int] = None, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Dict]:
+def _schedule_query(db: Session, user_id: Optional[int], date_from: Optional[str], date_to: Optional[str]):
     query = db.query(Schedule)
     if user_id:
         query = query.filter(Schedule.user_id == user_id)
@@ -57,15 +147,28 @@ def get_schedule(db: Session, user_id: Optional[int] = None, date_from: Optional
         query = query.filter(Schedule.date >= dt.date.fromisoformat(date_from))
     if date_to:
         query = query.filter(Schedule.date <= dt.date.fromisoformat(date_to))
-    schedules = query.order_by(Schedule.date).all()
-    return [
-        {
-            "id": s.id, "user_id": s.user_id, "date": str(s.date),
-            "shift_start": str(s.shift_start), "shift_end": str(s.shift_end),
-            "location": s.location, "notes": s.notes, "status": s.status.value,
-        }
-        for s in schedules
-    ]
+    return query
+
+
+def get_schedule(db: Session, user_id: Optional[int] = None, date_from: Optional[str] = None, date_to: Optional[str] = None, limit: Optional[int] = None, fields: Optional[List[str]] = None) -> Dict:
+    query = _schedule_query(db, user_id, date_from, date_to).order_by(Schedule.date)
+    return _tabulate(query, SCHEDULE_COLUMNS, _schedule_row, limit, fields)
+
+
+def summarize_schedule(db: Session, user_id: Optional[int] = None, date_from: Optional[str] = None, date_to: Optional[str] = None) -> Dict:
+    query = _schedule_query(db, user_id, date_from, date_to)
+    by_status = dict(
+        query.with_entities(Schedule.status, func.count(Schedule.id)).group_by(Schedule.status).all()
+    )
+    by_user = dict(
+        query.with_entities(Schedule.user_id, func.count(Schedule.id)).group_by(Schedule.user_id).all()
+    )
+    return {
+        "count": sum(by_status.values()),
+        "by_status": {s.value: n for s, n in by_status.items()},
+        "by_user": by_user,
+        "sample": _tabulate(query.order_by(Schedule.date), SCHEDULE_COLUMNS, _schedule_row, SUMMARY_SAMPLE_SIZE, None),
+    }
 
 
 def create_schedule(db: Session, user_id: int, date: str, shift_start: str, shift_end: str, location: str, notes: Optional[str] = None) -> Dict:
@@ -78,8 +181,8 @@ def create_schedule(db: Session, user_id: int, date: str, shift_start: str, shif
         notes=notes,
     )
     db.add(schedule)
-    db.commit()
-    db.refresh(schedule)
+    db.flush()
+    events.record(db, ShiftCreated.from_schedule(schedule))
     return {"id": schedule.id, "message": f"Schedule created for {date}"}
 
 
@@ -88,25 +191,38 @@ def update_schedule_status(db: Session, schedule_id: int, status: str) -> Dict:
     if not schedule:
         return {"error": "Schedule not found"}
     schedule.status = ScheduleStatus(status)
-    db.commit()
+    db.flush()
     return {"id": schedule.id, "status": status, "message": "Schedule updated"}
 
 
-def get_tasks(db: Session, assigned_to: Optional[int] = None, status: Optional[str] = None) -> List[Dict]:
+def _task_query(db: Session, assigned_to: Optional[int], status: Optional[str]):
     query = db.query(Task)
     if assigned_to:
         query = query.filter(Task.assigned_to == assigned_to)
     if status:
         query = query.filter(Task.status == status)
-    tasks = query.order_by(Task.created_at.desc()).all()
-    return [
-        {
-            "id": t.id, "title": t.title, "description": t.description,
-            "assigned_to": t.assigned_to, "priority": t.priority.value,
-            "status": t.status.value, "due_date": str(t.due_date) if t.due_date else None,
-        }
-        for t in tasks
-    ]
+    return query
+
+
+def get_tasks(db: Session, assigned_to: Optional[int] = None, status: Optional[str] = None, limit: Optional[int] = None, fields: Optional[List[str]] = None) -> Dict:
+    query = _task_query(db, assigned_to, status).order_by(Task.created_at.desc())
+    return _tabulate(query, TASK_COLUMNS, _task_row, limit, fields)
+
+
+def summarize_tasks(db: Session, assigned_to: Optional[int] = None, status: Optional[str] = None) -> Dict:
+    query = _task_query(db, assigned_to, status)
+    by_status = dict(
+        query.with_entities(Task.status, func.count(Task.id)).group_by(Task.status).all()
+    )
+    overdue = query.filter(
+        Task.status != StatusEnum.done, Task.due_date < dt.date.today()
+    ).count()
+    return {
+        "count": sum(by_status.values()),
+        "by_status": {s.value: n for s, n in by_status.items()},
+        "overdue": overdue,
+        "sample": _tabulate(query.order_by(Task.created_at.desc()), TASK_COLUMNS, _task_row, SUMMARY_SAMPLE_SIZE, None),
+    }
 
 
 def create_task(db: Session, assigned_to: int, title: str, description: Optional[str] = None, priority: str = "medium", due_date: Optional[str] = None) -> Dict:
@@ -119,8 +235,8 @@ def create_task(db: Session, assigned_to: int, title: str, description: Optional
         created_by_ai=True,
     )
     db.add(task)
-    db.commit()
-    db.refresh(task)
+    db.flush()
+    events.record(db, TaskAssigned.from_task(task))
     return {"id": task.id, "title": title, "message": "Task created"}
 
 
@@ -132,25 +248,36 @@ def update_task_status(db: Session, task_id: int, status: str, _caller_id: Optio
     if _caller_id is not None and task.assigned_to != _caller_id:
         return {"error": "Permission denied: not your task"}
     task.status = StatusEnum(status)
-    db.commit()
+    db.flush()
     return {"id": task.id, "status": status, "message": "Task status updated"}
 
 
-def get_payroll(db: Session, user_id: Optional[int] = None) -> List[Dict]:
+def _payroll_query(db: Session, user_id: Optional[int]):
     query = db.query(Payroll)
     if user_id:
         query = query.filter(Payroll.user_id == user_id)
-    records = query.order_by(Payroll.period_end.desc()).all()
-    return [
-        {
-            "id": p.id, "user_id": p.user_id,
-            "period_start": str(p.period_start), "period_end": str(p.period_end),
-            "base_salary": float(p.base_salary), "bonuses": float(p.bonuses),
-            "deductions": float(p.deductions), "net_amount": float(p.net_amount),
-            "status": p.status.value,
-        }
-        for p in records
-    ]
+    return query
+
+
+def get_payroll(db: Session, user_id: Optional[int] = None, limit: Optional[int] = None, fields: Optional[List[str]] = None) -> Dict:
+    query = _payroll_query(db, user_id).order_by(Payroll.period_end.desc())
+    return _tabulate(query, PAYROLL_COLUMNS, _payroll_row, limit, fields)
+
+
+def summarize_payroll(db: Session, user_id: Optional[int] = None) -> Dict:
+    query = _payroll_query(db, user_id)
+    by_status = {
+        s.value: {"count": n, "net_amount": float(total)}
+        for s, n, total in query.with_entities(
+            Payroll.status, func.count(Payroll.id), func.coalesce(func.sum(Payroll.net_amount), 0)
+        ).group_by(Payroll.status).all()
+    }
+    return {
+        "count": sum(v["count"] for v in by_status.values()),
+        "total_net_amount": sum(v["net_amount"] for v in by_status.values()),
+        "by_status": by_status,
+        "sample": _tabulate(query.order_by(Payroll.period_end.desc()), PAYROLL_COLUMNS, _payroll_row, SUMMARY_SAMPLE_SIZE, None),
+    }
 
 
 def create_payroll(db: Session, user_id: int, period_start: str, period_end: str, base_salary: float, bonuses: float = 0, deductions: float = 0) -> Dict:
@@ -165,8 +292,7 @@ def create_payroll(db: Session, user_id: int, period_start: str, period_end: str
         net_amount=net,
     )
     db.add(payroll)
-    db.commit()
-    db.refresh(payroll)
+    db.flush()
     return {"id": payroll.id, "net_amount": net, "message": "Payroll record created"}
 
 
@@ -207,12 +333,11 @@ def create_expense(db: Session, category: str, description: str, amount: float,
         created_by=created_by,
     )
     db.add(expense)
-    db.commit()
-    db.refresh(expense)
+    db.flush()
     return {"id": expense.id, "amount": amount, "category": category, "message": f"Расход добавлен: {description} — {amount}₽"}
 
 
-def get_expenses(db: Session, date_from: Optional[str] = None, date_to: Optional[str] = None, category: Optional[str] = None) -> List[Dict]:
+def _expense_query(db: Session, date_from: Optional[str], date_to: Optional[str], category: Optional[str]):
     query = db.query(Expense)
     if date_from:
         query = query.filter(Expense.date >= dt.date.fromisoformat(date_from))
@@ -220,14 +345,28 @@ def get_expenses(db: Session, date_from: Optional[str] = None, date_to: Optional
         query = query.filter(Expense.date <= dt.date.fromisoformat(date_to))
     if category:
         query = query.filter(Expense.category == category)
-    expenses = query.order_by(Expense.date.desc()).all()
-    return [
-        {
-            "id": e.id, "category": e.category.value, "description": e.description,
-            "amount": float(e.amount), "date": str(e.date),
-        }
-        for e in expenses
-    ]
+    return query
+
+
+def get_expenses(db: Session, date_from: Optional[str] = None, date_to: Optional[str] = None, category: Optional[str] = None, limit: Optional[int] = None, fields: Optional[List[str]] = None) -> Dict:
+    query = _expense_query(db, date_from, date_to, category).order_by(Expense.date.desc())
+    return _tabulate(query, EXPENSE_COLUMNS, _expense_row, limit, fields)
+
+
+def summarize_expenses(db: Session, date_from: Optional[str] = None, date_to: Optional[str] = None, category: Optional[str] = None) -> Dict:
+    query = _expense_query(db, date_from, date_to, category)
+    by_category = {
+        category_name(cat): {"count": n, "amount": float(total)}
+        for cat, n, total in query.with_entities(
+            Expense.category, func.count(Expense.id), func.coalesce(func.sum(Expense.amount), 0)
+        ).group_by(Expense.category).all()
+    }
+    return {
+        "count": sum(v["count"] for v in by_category.values()),
+        "total_amount": sum(v["amount"] for v in by_category.values()),
+        "by_category": by_category,
+        "sample": _tabulate(query.order_by(Expense.date.desc()), EXPENSE_COLUMNS, _expense_row, SUMMARY_SAMPLE_SIZE, None),
+    }
 
 
 def create_income(db: Session, source: str, description: str, amount: float, date: str, category: str = "other") -> Dict:
@@ -239,25 +378,71 @@ def create_income(db: Session, source: str, description: str, amount: float, dat
         category=category,
     )
     db.add(income)
-    db.commit()
-    db.refresh(income)
+    db.flush()
     return {"id": income.id, "amount": amount, "message": f"Доход добавлен: {description} — {amount}₽"}
 
 
-def get_income(db: Session, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Dict]:
+def _income_query(db: Session, date_from: Optional[str], date_to: Optional[str]):
     query = db.query(Income)
     if date_from:
         query = query.filter(Income.date >= dt.date.fromisoformat(date_from))
     if date_to:
         query = query.filter(Income.date <= dt.date.fromisoformat(date_to))
-    records = query.order_by(Income.date.desc()).all()
-    return [
-        {
-            "id": r.id, "source": r.source, "description": r.description,
-            "amount": float(r.amount), "date": str(r.date), "category": r.category,
-        }
-        for r in records
-    ]
+    return query
+
+
+def get_income(db: Session, date_from: Optional[str] = None, date_to: Optional[str] = None, limit: Optional[int] = None, fields: Optional[List[str]] = None) -> Dict:
+    query = _income_query(db, date_from, date_to).order_by(Income.date.desc())
+    return _tabulate(query, INCOME_COLUMNS, _income_row, limit, fields)
+
+
+def summarize_income(db: Session, date_from: Optional[str] = None, date_to: Optional[str] = None) -> Dict:
+    query = _income_query(db, date_from, date_to)
+    by_category = {
+        cat: {"count": n, "amount": float(total)}
+        for cat, n, total in query.with_entities(
+            Income.category, func.count(Income.id), func.coalesce(func.sum(Income.amount), 0)
+        ).group_by(Income.category).all()
+    }
+    return {
+        "count": sum(v["count"] for v in by_category.values()),
+        "total_amount": sum(v["amount"] for v in by_category.values()),
+        "by_category": by_category,
+        "sample": _tabulate(query.order_by(Income.date.desc()), INCOME_COLUMNS, _income_row, SUMMARY_SAMPLE_SIZE, None),
+    }
+
+
+def search_household(db: Session, query: str, kinds: Optional[List[str]] = None, limit: Optional[int] = None, _caller_id: Optional[int] = None) -> Dict:
+    search_index.refresh(db)
+    limit = min(limit or SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT)
+    hits = search_index.search(query, limit, owner=_caller_id, kinds=kinds)
+
+    ids: Dict[str, List[int]] = {"note": [], "task": [], "expense": []}
+    for kind, obj_id, _ in hits:
+        ids[kind].append(obj_id)
+    found: Dict[Tuple[str, int], Dict] = {}
+    if ids["note"]:
+        for n in db.query(Note).filter(Note.id.in_(ids["note"])):
+            found[("note", n.id)] = {"date": str(n.updated_at.date()) if n.updated_at else None, "title": n.title, "details": n.content}
+    if ids["task"]:
+        for t in db.query(Task).filter(Task.id.in_(ids["task"])):
+            details = f"{t.status.value}, исполнитель {t.assigned_to}" + (f"; {t.description}" if t.description else "")
+            found[("task", t.id)] = {"date": str(t.due_date) if t.due_date else None, "title": t.title, "details": details}
+    if ids["expense"]:
+        for e in db.query(Expense).filter(Expense.id.in_(ids["expense"])):
+            found[("expense", e.id)] = {"date": str(e.date), "title": e.description, "details": f"{category_name(e.category)}, {float(e.amount):.2f}"}
+
+    rows = []
+    gone = []
+    for kind, obj_id, score in hits:
+        values = found.get((kind, obj_id))
+        if values:
+            rows.append([kind, obj_id, round(score, 3), values["date"], values["title"], values["details"]])
+        else:
+            # Deleted, by this process or another, since it was indexed
+            gone.append((kind, obj_id))
+    search_index.remove(gone)
+    return {"columns": list(SEARCH_COLUMNS), "rows": rows, "truncated": False}
 
 
 def send_notification(db: Session, user_id: int, title: str, message: str, type: str = "system") -> Dict:
@@ -268,7 +453,7 @@ def send_notification(db: Session, user_id: int, title: str, message: str, type:
         type=NotificationType(type),
     )
     db.add(notification)
-    db.commit()
+    db.flush()
     return {"message": "Notification sent"}
 
 
@@ -277,7 +462,7 @@ def attach_image_to_task(db: Session, task_id: int, image_url: str) -> Dict:
     if not task:
         return {"error": "Task not found"}
     task.image_url = image_url
-    db.commit()
+    db.flush()
     return {"id": task.id, "image_url": image_url, "message": f"Изображение прикреплено к задаче '{task.title}'"}
 
 
@@ -286,7 +471,7 @@ def attach_image_to_expense(db: Session, expense_id: int, image_url: str) -> Dic
     if not expense:
         return {"error": "Expense not found"}
     expense.receipt_url = image_url
-    db.commit()
+    db.flush()
     return {"id": expense.id, "receipt_url": image_url, "message": f"Чек прикреплён к расходу '{expense.description}'"}
 
 
@@ -300,8 +485,7 @@ def create_expense_from_receipt(db: Session, category: str, description: str, am
         created_by=created_by,
     )
     db.add(expense)
-    db.commit()
-    db.refresh(expense)
+    db.flush()
     return {"id": expense.id, "amount": amount, "category": category, "message": f"Расход из чека добавлен: {description} — {amount}₽"}
 
 
@@ -313,8 +497,7 @@ def create_schedule_change_request(db: Session, user_id: int, schedule_id: int,
         reason=reason,
     )
     db.add(request)
-    db.commit()
-    db.refresh(request)
+    db.flush()
     return {"id": request.id, "message": "Change request created"}
 
 
@@ -325,18 +508,24 @@ TOOL_DISPATCH = {
     "get_staff_by_id": get_staff_by_id,
     "create_staff": create_staff,
     "get_schedule": get_schedule,
+    "summarize_schedule": summarize_schedule,
     "create_schedule": create_schedule,
     "update_schedule_status": update_schedule_status,
     "get_tasks": get_tasks,
+    "summarize_tasks": summarize_tasks,
     "create_task": create_task,
     "update_task_status": update_task_status,
     "get_payroll": get_payroll,
+    "summarize_payroll": summarize_payroll,
     "create_payroll": create_payroll,
     "get_finance_summary": get_finance_summary,
     "create_expense": create_expense,
     "get_expenses": get_expenses,
+    "summarize_expenses": summarize_expenses,
     "create_income": create_income,
     "get_income": get_income,
+    "summarize_income": summarize_income,
+    "search_household": search_household,
     "send_notification": send_notification,
     "attach_image_to_task": attach_image_to_task,
     "attach_image_to_expense": attach_image_to_expense,
@@ -345,6 +534,44 @@ TOOL_DISPATCH = {
 }
 
 
+# --- Cache Invalidation Map ---
+
+# Tables each read-only tool depends on; their results may be memoized.
+READ_TOOL_TABLES = {
+    "list_staff": {User.__tablename__},
+    "get_staff_by_id": {User.__tablename__},
+    "get_schedule": {Schedule.__tablename__},
+    "summarize_schedule": {Schedule.__tablename__},
+    "get_tasks": {Task.__tablename__},
+    "summarize_tasks": {Task.__tablename__},
+    "get_payroll": {Payroll.__tablename__},
+    "summarize_payroll": {Payroll.__tablename__},
+    "get_finance_summary": {Payroll.__tablename__, Expense.__tablename__, Income.__tablename__},
+    "get_expenses": {Expense.__tablename__},
+    "summarize_expenses": {Expense.__tablename__},
+    "get_income": {Income.__tablename__},
+    "summarize_income": {Income.__tablename__},
+    "search_household": {Note.__tablename__, Task.__tablename__, Expense.__tablename__},
+}
+
+# Tables each mutating tool writes to; calling one invalidates cached reads.
+MUTATING_TOOL_TABLES = {
+    "create_staff": {User.__tablename__},
+    "create_schedule": {Schedule.__tablename__},
+    "update_schedule_status": {Schedule.__tablename__},
+    "create_task": {Task.__tablename__},
+    "update_task_status": {Task.__tablename__},
+    "create_payroll": {Payroll.__tablename__},
+    "create_expense": {Expense.__tablename__},
+    "create_income": {Income.__tablename__},
+    "send_notification": {Notification.__tablename__},
+    "attach_image_to_task": {Task.__tablename__},
+    "attach_image_to_expense": {Expense.__tablename__},
+    "create_expense_from_receipt": {Expense.__tablename__},
+    "create_schedule_change_request": {ScheduleChangeRequest.__tablename__},
+}
+
+
 # --- Tool Definitions for DeepSeek ---
 
 OWNER_TOOLS = [
@@ -397,7 +624,24 @@ OWNER_TOOLS = [
         "type": "function",
         "function": {
             "name": "get_schedule",
-            "description": "Получить расписание. Можно фильтровать по сотруднику и датам.",
+            "description": "Получить расписание. Можно фильтровать по сотруднику и датам. Результат — таблица: columns + rows.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "user_id": {"type": "integer"},
+                    "date_from": {"type": "string", "description": "YYYY-MM-DD"},
+                    "date_to": {"type": "string", "description": "YYYY-MM-DD"},
+                    "limit": {"type": "integer", "description": "Максимум строк (по умолчанию 50, не более 200)"},
+                    "fields": {"type": "array", "items": {"type": "string", "enum": ["user_id", "date", "shift_start", "shift_end", "location", "notes", "status"]}, "description": "Какие колонки вернуть"},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "summarize_schedule",
+            "description": "Сводка по расписанию: количество смен по статусам и сотрудникам и несколько примеров. Используй перед get_schedule для больших периодов.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -446,7 +690,23 @@ OWNER_TOOLS = [
         "type": "function",
         "function": {
             "name": "get_tasks",
-            "description": "Получить список задач. Можно фильтровать по исполнителю и статусу.",
+            "description": "Получить список задач. Можно фильтровать по исполнителю и статусу. Результат — таблица: columns + rows.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "assigned_to": {"type": "integer"},
+                    "status": {"type": "string", "enum": ["pending", "in_progress", "done"]},
+                    "limit": {"type": "integer", "description": "Максимум строк (по умолчанию 50, не более 200)"},
+                    "fields": {"type": "array", "items": {"type": "string", "enum": ["title", "description", "assigned_to", "priority", "status", "due_date"]}, "description": "Какие колонки вернуть"},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "summarize_tasks",
+            "description": "Сводка по задачам: количество по статусам, просроченные и несколько примеров.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -493,7 +753,22 @@ OWNER_TOOLS = [
         "type": "function",
         "function": {
             "name": "get_payroll",
-            "description": "Получить записи о зарплатах.",
+            "description": "Получить записи о зарплатах. Результат — таблица: columns + rows.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "user_id": {"type": "integer"},
+                    "limit": {"type": "integer", "description": "Максимум строк (по умолчанию 50, не более 200)"},
+                    "fields": {"type": "array", "items": {"type": "string", "enum": ["user_id", "period_start", "period_end", "base_salary", "bonuses", "deductions", "net_amount", "status"]}, "description": "Какие колонки вернуть"},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "summarize_payroll",
+            "description": "Сводка по зарплатам: количество и суммы по статусам и несколько примеров.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -557,7 +832,24 @@ OWNER_TOOLS = [
         "type": "function",
         "function": {
             "name": "get_expenses",
-            "description": "Получить список расходов. Можно фильтровать по датам и категории.",
+            "description": "Получить список расходов. Можно фильтровать по датам и категории. Результат — таблица: columns + rows.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "date_from": {"type": "string", "description": "YYYY-MM-DD"},
+                    "date_to": {"type": "string", "description": "YYYY-MM-DD"},
+                    "category": {"type": "string", "enum": ["household", "transport", "food", "entertainment", "other"]},
+                    "limit": {"type": "integer", "description": "Максимум строк (по умолчанию 50, не более 200)"},
+                    "fields": {"type": "array", "items": {"type": "string", "enum": ["category", "description", "amount", "date"]}, "description": "Какие колонки вернуть"},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "summarize_expenses",
+            "description": "Сводка по расходам: количество и суммы по категориям и несколько примеров. Используй для вопросов «сколько потратили».",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -590,7 +882,23 @@ OWNER_TOOLS = [
         "type": "function",
         "function": {
             "name": "get_income",
-            "description": "Получить список доходов. Можно фильтровать по датам.",
+            "description": "Получить список доходов. Можно фильтровать по датам. Результат — таблица: columns + rows.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "date_from": {"type": "string", "description": "YYYY-MM-DD"},
+                    "date_to": {"type": "string", "description": "YYYY-MM-DD"},
+                    "limit": {"type": "integer", "description": "Максимум строк (по умолчанию 50, не более 200)"},
+                    "fields": {"type": "array", "items": {"type": "string", "enum": ["source", "description", "amount", "date", "category"]}, "description": "Какие колонки вернуть"},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "summarize_income",
+            "description": "Сводка по доходам: количество и суммы по категориям и несколько примеров.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -600,6 +908,26 @@ OWNER_TOOLS = [
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_household",
+            "description": "Найти заметки, задачи и расходы по смыслу запроса. Возвращает самые релевантные записи. Используй, когда ищешь что-то конкретное, а не весь список.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Что искать, своими словами"},
+                    "kinds": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": ["note", "task", "expense"]},
+                        "description": "Где искать; по умолчанию везде",
+                    },
+                    "limit": {"type": "integer", "description": "Сколько записей вернуть, по умолчанию 10"},
+                },
+                "required": ["query"],
+            },
+        },
+    },
     {
         "type": "function",
         "function": {
@@ -677,11 +1005,12 @@ STAFF_TOOLS = [
         "type": "function",
         "function": {
             "name": "get_tasks",
-            "description": "Получить мои задачи. Можно фильтровать по статусу.",
+            "description": "Получить мои задачи. Можно фильтровать по статусу. Результат — таблица: columns + rows.",
             "parameters": {
                 "type": "object",
                 "properties": {
                     "status": {"type": "string", "enum": ["pending", "in_progress", "done"]},
+                    "limit": {"type": "integer", "description": "Максимум строк (по умолчанию 50, не более 200)"},
                 },
             },
         },
@@ -705,12 +1034,13 @@ STAFF_TOOLS = [
         "type": "function",
         "function": {
             "name": "get_schedule",
-            "description": "Получить моё расписание.",
+            "description": "Получить моё расписание. Результат — таблица: columns + rows.",
             "parameters": {
                 "type": "object",
                 "properties": {
                     "date_from": {"type": "string", "description": "YYYY-MM-DD"},
                     "date_to": {"type": "string", "description": "YYYY-MM-DD"},
+                    "limit": {"type": "integer", "description": "Максимум строк (по умолчанию 50, не более 200)"},
                 },
             },
         },
@@ -719,10 +1049,12 @@ STAFF_TOOLS = [
         "type": "function",
         "function": {
             "name": "get_payroll",
-            "description": "Получить мои записи о зарплате.",
+            "description": "Получить мои записи о зарплате. Результат — таблица: columns + rows.",
             "parameters": {
                 "type": "object",
-                "properties": {},
+                "properties": {
+                    "limit": {"type": "integer", "description": "Максимум строк (по умолчанию 50, не более 200)"},
+                },
             },
         },
     },
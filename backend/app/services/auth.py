@@ -1,10 +1,10 @@
 from typing import Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, WebSocket, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.models.user import User
 from app.utils.security import decode_token
 
@@ -38,3 +38,36 @@ def get_current_user(
         )
 
     return user
+
+
+async def authenticate_websocket(websocket: WebSocket) -> Optional[User]:
+    """Resolve the ?token= of a socket, closing it with 4001 on failure.
+
+    The lookup session is closed straight away: an open socket must not pin
+    a pooled connection while it sits idle. Loaded attributes stay readable.
+    """
+    token = websocket.query_params.get("token")
+    if not token:
+        await websocket.close(code=4001, reason="Missing token")
+        return None
+
+    payload = decode_token(token)
+    if not payload or payload.get("type") != "access":
+        await websocket.close(code=4001, reason="Invalid token")
+        return None
+
+    user_id = payload.get("sub")
+    if not user_id:
+        await websocket.close(code=4001, reason="Invalid token payload")
+        return None
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == int(user_id)).first()
+    finally:
+        db.close()
+    if not user or not user.is_active:
+        await websocket.close(code=4001, reason="User not found")
+        return None
+
+    return user
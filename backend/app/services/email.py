@@ -1,33 +1,124 @@
 import logging
+import uuid
 from html import escape
-from typing import Optional
+from typing import Dict, List, Optional, Protocol, Tuple
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
 from app.config import settings
+from app.models.notification import EmailOutbox
+from app.services.jobs import enqueue
 
 logger = logging.getLogger(__name__)
 
+OUTBOX_JOB = "email.outbox"
+_WAKE_KEY = "email_outbox_wake"
+
+
+def wake_outbox(db: Session) -> None:
+    """Have a worker drain the outbox once the caller's transaction commits."""
+    if not db.info.get(_WAKE_KEY):
+        enqueue(db, OUTBOX_JOB)
+        db.info[_WAKE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_wake(session: Session) -> None:
+    session.info.pop(_WAKE_KEY, None)
+
+
+def enqueue_email(db: Session, to: str, subject: str, html_body: str, notification_id: Optional[int] = None) -> EmailOutbox:
+    """Add an email to the outbox; it is sent after the caller commits."""
+    email = EmailOutbox(to_email=to, subject=subject, html_body=html_body, notification_id=notification_id)
+    db.add(email)
+    wake_outbox(db)
+    return email
+
+
+# --- Senders used by the outbox job ---
+
+class PermanentEmailError(Exception):
+    """The provider rejected the request itself; sending it again will not help."""
+
+
+def is_permanent(status_code: Optional[int]) -> bool:
+    # Auth errors mean the app is misconfigured, not the message, and 408/429
+    # ask to come back later
+    return status_code is not None and 400 <= status_code < 500 and status_code not in (401, 403, 408, 429)
+
+
+class EmailSender(Protocol):
+    def send_batch(self, messages: List[Dict[str, str]]) -> List[Optional[str]]:
+        """Send all messages or raise; returns a provider id per message.
+
+        Raises PermanentEmailError when the provider rejects the batch as invalid.
+        """
 
-def send_email(to: str, subject: str, html_body: str) -> bool:
-    if not settings.resend_api_key:
-        logger.warning("Resend API key not configured, skipping email send")
-        return False
 
-    try:
+class ResendSender:
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    def send_batch(self, messages: List[Dict[str, str]]) -> List[Optional[str]]:
         import resend
-        resend.api_key = settings.resend_api_key
-        resend.Emails.send({
-            "from": settings.from_email,
-            "to": to,
-            "subject": subject,
-            "html": html_body,
-        })
-        return True
-    except Exception as e:
-        logger.error(f"Failed to send email: {e}")
-        return False
-
-
-def send_schedule_notification(to_email: str, staff_name: str, date: str, shift_start: str, shift_end: str, location: str):
+        from resend.exceptions import ResendError
+
+        resend.api_key = self.api_key
+        try:
+            response = resend.Batch.send(messages)
+        except ResendError as e:
+            try:
+                code = int(e.code)
+            except (TypeError, ValueError):
+                code = None
+            if is_permanent(code):
+                raise PermanentEmailError(f"{code}: {e.message}") from e
+            raise
+        return [item.get("id") for item in response.get("data", [])]
+
+
+class HttpSender:
+    """Posts batches in the Resend wire format to any URL, e.g. the local stub."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    def send_batch(self, messages: List[Dict[str, str]]) -> List[Optional[str]]:
+        response = httpx.post(self.url, json=messages, timeout=self.timeout)
+        if is_permanent(response.status_code):
+            raise PermanentEmailError(f"{response.status_code}: {response.text[:200]}")
+        response.raise_for_status()
+        return [item.get("id") for item in response.json().get("data", [])]
+
+
+class MemorySender:
+    """Keeps sent messages in a list; for tests."""
+
+    def __init__(self):
+        self.sent: List[Dict[str, str]] = []
+
+    def send_batch(self, messages: List[Dict[str, str]]) -> List[Optional[str]]:
+        self.sent.extend(messages)
+        return [uuid.uuid4().hex for _ in messages]
+
+
+def get_sender() -> Optional[EmailSender]:
+    if settings.email_backend == "http":
+        return HttpSender(settings.email_stub_url)
+    if settings.email_backend == "memory":
+        return MemorySender()
+    if not settings.resend_api_key:
+        return None
+    return ResendSender(settings.resend_api_key)
+
+
+# --- Templates; each returns (subject, html) for the outbox ---
+
+def schedule_notification_email(staff_name: str, date: str, shift_start: str, shift_end: str, location: str) -> Tuple[str, str]:
     subject = f"Дом — Новая смена {date}"
     html = f"""
     <h2>Новая смена в расписании</h2>
@@ -40,11 +131,11 @@ def send_schedule_notification(to_email: str, staff_name: str, date: str, shift_
     </ul>
     <p>С уважением,<br>Система «Дом»</p>
     """
-    send_email(to_email, subject, html)
+    return subject, html
 
 
-def send_task_assignment(to_email: str, staff_name: str, task_title: str, priority: str, due_date: Optional[str] = None):
-    subject = f"Дом — Новая задача: {escape(task_title)}"
+def task_assignment_email(staff_name: str, task_title: str, priority: str, due_date: Optional[str] = None) -> Tuple[str, str]:
+    subject = f"Дом — Новая задача: {task_title}"
     due_line = f"<li><strong>Срок:</strong> {escape(due_date)}</li>" if due_date else ""
     html = f"""
     <h2>Новая задача</h2>
@@ -57,11 +148,11 @@ def send_task_assignment(to_email: str, staff_name: str, task_title: str, priori
     </ul>
     <p>С уважением,<br>Система «Дом»</p>
     """
-    send_email(to_email, subject, html)
+    return subject, html
 
 
-def send_payment_confirmation(to_email: str, staff_name: str, period: str, net_amount: float):
-    subject = f"Дом — Выплата за {escape(period)}"
+def payment_confirmation_email(staff_name: str, period: str, net_amount: float) -> Tuple[str, str]:
+    subject = f"Дом — Выплата за {period}"
     html = f"""
     <h2>Подтверждение выплаты</h2>
     <p>Уважаемый(ая) {escape(staff_name)},</p>
@@ -69,4 +160,4 @@ def send_payment_confirmation(to_email: str, staff_name: str, period: str, net_a
     <p><strong>Сумма:</strong> {net_amount:,.2f} ₽</p>
     <p>С уважением,<br>Система «Дом»</p>
     """
-    send_email(to_email, subject, html)
+    return subject, html
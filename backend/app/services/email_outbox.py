@@ -0,0 +1,158 @@
+"""Delivery of the email outbox by the ``email.outbox`` job.
+
+Writers wake the job with ``wake_outbox`` once per transaction, and a
+schedule on email_outbox_cron picks up retries as they come due. Rows are
+claimed in a short transaction of their own: locked with FOR UPDATE SKIP
+LOCKED, leased by moving ``next_attempt_at`` email_claim_seconds ahead and
+committed, so no lock is held while the provider is called, and a sender
+that dies mid-batch leaves its rows to come due again when the lease runs
+out.
+
+A claimed batch goes through the provider's batch API in one call. If the
+provider rejects the batch as invalid, the messages are sent one by one so
+a bad address or payload only fails itself; a rejected message is
+dead-lettered at once. Other failures are retried with exponential backoff,
+and after ``email_max_attempts`` a message is moved to ``dead`` for an
+owner to inspect or retry.
+"""
+import datetime as dt
+import logging
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.notification import EmailOutbox, EmailStatus
+from app.services.email import OUTBOX_JOB, EmailSender, PermanentEmailError, get_sender
+from app.services.jobs import job, schedule
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Claimed:
+    id: int
+    attempt: int
+    message: Dict[str, str]
+
+
+@dataclass
+class Outcome:
+    provider_id: Optional[str] = None
+    error: Optional[str] = None
+    permanent: bool = False
+
+
+def _backoff(attempts: int) -> dt.timedelta:
+    delay = min(settings.email_backoff_max_seconds, settings.email_backoff_base_seconds * 2 ** (attempts - 1))
+    # Jitter so a provider outage does not end in a synchronized retry burst
+    return dt.timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(db: Session, now: dt.datetime, limit: int) -> List[Claimed]:
+    """Lease up to limit due messages. Commits; returns what was claimed."""
+    due = (
+        db.query(EmailOutbox.id, EmailOutbox.attempts, EmailOutbox.to_email, EmailOutbox.subject, EmailOutbox.html_body)
+        .filter(EmailOutbox.status == EmailStatus.pending, EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    claimed = []
+    lease_until = now + dt.timedelta(seconds=settings.email_claim_seconds)
+    for email_id, attempts, to_email, subject, html_body in due:
+        # Conditional like jobs.claim, for databases without SKIP LOCKED
+        won = db.query(EmailOutbox).filter(
+            EmailOutbox.id == email_id,
+            EmailOutbox.attempts == attempts,
+            EmailOutbox.status == EmailStatus.pending,
+        ).update(
+            {"attempts": attempts + 1, "next_attempt_at": lease_until},
+            synchronize_session=False,
+        )
+        if won:
+            message = {"from": settings.from_email, "to": to_email, "subject": subject, "html": html_body}
+            claimed.append(Claimed(email_id, attempts + 1, message))
+    db.commit()
+    return claimed
+
+
+def send(sender: EmailSender, messages: List[Dict[str, str]]) -> List[Outcome]:
+    """Send messages as one batch, one by one if the batch is rejected."""
+    try:
+        provider_ids = sender.send_batch(messages)
+        return [Outcome(provider_id=pid) for pid in provider_ids + [None] * (len(messages) - len(provider_ids))]
+    except PermanentEmailError as e:
+        if len(messages) == 1:
+            return [Outcome(error=str(e), permanent=True)]
+        logger.warning(f"Email batch of {len(messages)} rejected, sending one by one: {e}")
+    except Exception as e:
+        # Outage or timeout: the whole batch waits for the next attempt
+        return [Outcome(error=str(e)) for _ in messages]
+    return [send(sender, [m])[0] for m in messages]
+
+
+def record(db: Session, batch: List[Claimed], outcomes: List[Outcome], now: dt.datetime) -> Dict[str, int]:
+    """Store the outcome of each claimed message. Commits; returns counts by result."""
+    counts = {"sent": 0, "retry": 0, "dead": 0}
+    by_id = {c.id: (c, o) for c, o in zip(batch, outcomes)}
+    rows = db.query(EmailOutbox).filter(EmailOutbox.id.in_(by_id)).with_for_update().all()
+    for m in rows:
+        claimed, outcome = by_id[m.id]
+        if m.attempts != claimed.attempt or m.status != EmailStatus.pending:
+            # The lease ran out and another run has the message now
+            continue
+        if outcome.error is None:
+            m.status = EmailStatus.sent
+            m.provider_id = outcome.provider_id
+            m.sent_at = now
+            m.last_error = None
+            counts["sent"] += 1
+            continue
+        m.last_error = outcome.error[:500]
+        if outcome.permanent or m.attempts >= settings.email_max_attempts:
+            m.status = EmailStatus.dead
+            counts["dead"] += 1
+            logger.error(f"Email {m.id} to {m.to_email} dead-lettered after {m.attempts} attempts: {outcome.error}")
+        else:
+            m.next_attempt_at = now + _backoff(m.attempts)
+            counts["retry"] += 1
+    db.commit()
+    return counts
+
+
+def drain(db: Session, sender: EmailSender) -> Dict[str, int]:
+    """Send batches until nothing is due. Returns counts by result."""
+    totals = {"sent": 0, "retry": 0, "dead": 0}
+    while True:
+        batch = claim(db, dt.datetime.utcnow(), settings.email_batch_size)
+        if not batch:
+            break
+        outcomes = send(sender, [c.message for c in batch])
+        for key, n in record(db, batch, outcomes, dt.datetime.utcnow()).items():
+            totals[key] += n
+        if len(batch) < settings.email_batch_size:
+            break
+    if any(totals.values()):
+        logger.info(f"Email outbox: {totals['sent']} sent, {totals['retry']} to retry, {totals['dead']} dead")
+    return totals
+
+
+@job(OUTBOX_JOB)
+def outbox_job() -> None:
+    sender = get_sender()
+    if sender is None:
+        logger.warning("Email provider not configured, outbox will not be drained")
+        return
+    db = SessionLocal()
+    try:
+        drain(db, sender)
+    finally:
+        db.close()
+
+
+schedule(OUTBOX_JOB, settings.email_outbox_cron)
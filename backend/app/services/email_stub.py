@@ -0,0 +1,68 @@
+"""Local stand-in for the email provider's batch endpoint.
+
+    cd backend && python -m app.services.email_stub --port 8025 --fail-rate 0.2
+
+Run the job worker with EMAIL_BACKEND=http to deliver the outbox here.
+Batches are accepted in the Resend wire format, printed, and listed by
+GET /emails; ``--fail-rate`` answers that share of batches with a 503 to
+exercise retries and dead-lettering.
+"""
+import argparse
+import json
+import random
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    received: List[Dict] = []
+    fail_rate = 0.0
+
+    def _reply(self, code: int, payload) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/emails":
+            self._reply(404, {"error": "not found"})
+            return
+        self._reply(200, {"data": self.received})
+
+    def do_POST(self):
+        if self.path != "/emails/batch":
+            self._reply(404, {"error": "not found"})
+            return
+        messages = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if random.random() < self.fail_rate:
+            self._reply(503, {"error": "simulated outage"})
+            return
+        ids = []
+        for message in messages:
+            message_id = uuid.uuid4().hex
+            self.received.append({"id": message_id, **message})
+            ids.append({"id": message_id})
+            print(f"{message_id} -> {message.get('to')}: {message.get('subject')}")
+        self._reply(200, {"data": ids})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of batches answered with 503")
+    args = parser.parse_args()
+    StubHandler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"Email stub listening on http://127.0.0.1:{args.port}/emails/batch")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Notifications and emails driven by domain events.
+
+Imported once at startup so the handlers register with the bus. Each
+handler does its database work in a thread with its own session.
+"""
+import asyncio
+
+from app.database import SessionLocal
+from app.models.notification import NotificationType
+from app.models.user import User
+from app.services.email import payment_confirmation_email, schedule_notification_email, task_assignment_email
+from app.services.events import ExpenseApproved, PayrollPaid, ShiftCreated, TaskAssigned, subscribe
+from app.services.notification import create_notification
+
+PRIORITY_LABELS = {"low": "низкий", "medium": "средний", "high": "высокий", "urgent": "срочный"}
+
+
+def _notify(user_id: int, title: str, message: str, type: NotificationType, email=None) -> None:
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user or not user.is_active:
+            return
+        subject, html = email(user) if email else (None, None)
+        create_notification(
+            db, user_id, title, message, type,
+            channel="both" if email else "in_app",
+            email_subject=subject,
+            email_html=html,
+        )
+    finally:
+        db.close()
+
+
+@subscribe(TaskAssigned)
+async def notify_task_assigned(e: TaskAssigned) -> None:
+    due = e.due_date.strftime("%d.%m.%Y") if e.due_date else None
+    message = e.title + (f", срок {due}" if due else "")
+    await asyncio.to_thread(
+        _notify, e.user_id, "Новая задача", message, NotificationType.task,
+        lambda user: task_assignment_email(user.full_name, e.title, PRIORITY_LABELS.get(e.priority, e.priority), due),
+    )
+
+
+@subscribe(ShiftCreated)
+async def notify_shift_created(e: ShiftCreated) -> None:
+    date = e.date.strftime("%d.%m.%Y")
+    start, end = e.shift_start.strftime("%H:%M"), e.shift_end.strftime("%H:%M")
+    await asyncio.to_thread(
+        _notify, e.user_id, "Новая смена", f"{date}, {start}–{end}, {e.location}", NotificationType.schedule,
+        lambda user: schedule_notification_email(user.full_name, date, start, end, e.location),
+    )
+
+
+@subscribe(ExpenseApproved)
+async def notify_expense_reviewed(e: ExpenseApproved) -> None:
+    if e.created_by == e.approved_by:
+        return
+    title = "Расход одобрен" if e.status == "approved" else "Расход отклонён"
+    await asyncio.to_thread(
+        _notify, e.created_by, title, f"{e.description}: {e.amount:,.2f} ₽", NotificationType.payment,
+    )
+
+
+@subscribe(PayrollPaid)
+async def notify_payroll_paid(e: PayrollPaid) -> None:
+    period = f"{e.period_start:%d.%m.%Y} — {e.period_end:%d.%m.%Y}"
+    await asyncio.to_thread(
+        _notify, e.user_id, "Выплата произведена", f"{period}: {e.net_amount:,.2f} ₽", NotificationType.payment,
+        lambda user: payment_confirmation_email(user.full_name, period, e.net_amount),
+    )
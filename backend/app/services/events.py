@@ -0,0 +1,215 @@
+"""Domain events published after the transaction that caused them commits.
+
+Code that changes state records an event on its session:
+
+    db.flush()
+    events.record(db, TaskAssigned.from_task(task))
+    db.commit()
+
+Events of a rolled-back transaction are dropped, and so are those recorded
+inside a savepoint that is rolled back. Committed ones go onto an
+in-process bus and are handed to every handler subscribed to their type,
+off the request path. Handlers are coroutines; blocking work inside them
+belongs in ``asyncio.to_thread``. Every process that commits events runs
+a bus: the web app from its startup hooks, ``app.worker`` on a loop thread
+of its own.
+
+Delivery is at most once. Committed events wait in memory, so those not
+yet handled when the process dies, or committed while its bus is not
+running, are lost, and a handler that fails is not retried. That suits
+the notifications the handlers send today; a side effect that must happen
+belongs in the transaction itself, e.g. a ``jobs.enqueue`` row, which the
+job worker claims, retries and reaps.
+"""
+import asyncio
+import datetime as dt
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "domain_events"
+
+
+# --- Events ---
+
+@dataclass(frozen=True)
+class DomainEvent:
+    pass
+
+
+@dataclass(frozen=True)
+class TaskAssigned(DomainEvent):
+    task_id: int
+    user_id: int
+    title: str
+    priority: str
+    due_date: Optional[dt.date]
+
+    @classmethod
+    def from_task(cls, task) -> "TaskAssigned":
+        return cls(task.id, task.assigned_to, task.title, task.priority.value, task.due_date)
+
+
+@dataclass(frozen=True)
+class ShiftCreated(DomainEvent):
+    schedule_id: int
+    user_id: int
+    date: dt.date
+    shift_start: dt.time
+    shift_end: dt.time
+    location: str
+
+    @classmethod
+    def from_schedule(cls, schedule) -> "ShiftCreated":
+        return cls(schedule.id, schedule.user_id, schedule.date, schedule.shift_start, schedule.shift_end, schedule.location)
+
+
+@dataclass(frozen=True)
+class ExpenseApproved(DomainEvent):
+    """Covers rejection too; see status."""
+
+    expense_id: int
+    status: str
+    created_by: int
+    approved_by: int
+    description: str
+    amount: float
+
+    @classmethod
+    def from_expense(cls, expense) -> "ExpenseApproved":
+        return cls(expense.id, expense.status, expense.created_by, expense.approved_by, expense.description, float(expense.amount))
+
+
+@dataclass(frozen=True)
+class PayrollPaid(DomainEvent):
+    payroll_id: int
+    user_id: int
+    period_start: dt.date
+    period_end: dt.date
+    net_amount: float
+
+    @classmethod
+    def from_payroll(cls, payroll) -> "PayrollPaid":
+        return cls(payroll.id, payroll.user_id, payroll.period_start, payroll.period_end, float(payroll.net_amount))
+
+
+# --- Bus ---
+
+Handler = Callable[[Any], Awaitable[None]]
+
+
+class EventBus:
+    def __init__(self):
+        self._handlers: Dict[Type[DomainEvent], List[Handler]] = defaultdict(list)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.handled = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def subscribe(self, event_type: Type[DomainEvent]) -> Callable[[Handler], Handler]:
+        def decorator(handler: Handler) -> Handler:
+            self._handlers[event_type].append(handler)
+            return handler
+        return decorator
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            # Let events committed before shutdown reach their handlers
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=5)
+            except asyncio.TimeoutError:
+                logger.warning(f"Event bus stopped with {self._queue.qsize()} events unhandled")
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._loop = None
+
+    def publish_threadsafe(self, events: List[DomainEvent]) -> None:
+        # Commits happen in threadpool threads as well as on the loop
+        if self._loop is None:
+            self.dropped += len(events)
+            logger.warning(f"Event bus not running, dropped {len(events)} events")
+            return
+        for e in events:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, e)
+        self.published += len(events)
+
+    async def _run(self) -> None:
+        while True:
+            e = await self._queue.get()
+            try:
+                await self.dispatch(e)
+            finally:
+                self._queue.task_done()
+
+    async def dispatch(self, e: DomainEvent) -> None:
+        for handler in self._handlers.get(type(e), ()):
+            try:
+                await handler(e)
+                self.handled += 1
+            except Exception as exc:
+                self.failed += 1
+                logger.error(f"Handler {handler.__name__} failed on {type(e).__name__}: {exc}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "published": self.published,
+            "handled": self.handled,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+bus = EventBus()
+subscribe = bus.subscribe
+
+
+def record(session: Session, e: DomainEvent) -> None:
+    """Publish e once the session's transaction commits."""
+    # Kept with the savepoint it was recorded in, if any
+    session.info.setdefault(_PENDING_KEY, []).append((session.get_nested_transaction(), e))
+
+
+def _within(transaction: Optional[SessionTransaction], savepoint: SessionTransaction) -> bool:
+    while transaction is not None:
+        if transaction is savepoint:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(session: Session) -> None:
+    if session.in_nested_transaction():
+        # A savepoint was released; its events wait for the outer commit
+        return
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        bus.publish_threadsafe([e for _, e in pending])
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard(session: Session, previous_transaction: SessionTransaction) -> None:
+    if not previous_transaction.nested:
+        session.info.pop(_PENDING_KEY, None)
+        return
+    # Only what the rolled-back savepoint (or one inside it) recorded
+    pending = session.info.get(_PENDING_KEY)
+    if pending:
+        pending[:] = [(sp, e) for sp, e in pending if not _within(sp, previous_transaction)]
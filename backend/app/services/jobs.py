@@ -0,0 +1,381 @@
+"""Background jobs stored in the ``jobs`` table and run by ``python -m app.worker``.
+
+Handlers are plain functions registered by name:
+
+    @job("finance.recurring_income", priority=5)
+    def recurring_income_job(month: str) -> None: ...
+
+    enqueue(db, "finance.recurring_income", {"month": "2026-10"})
+    schedule("finance.recurring_income", "10 0 * * *")
+
+``enqueue`` only adds a row, so the job commits (or not) with the caller's
+transaction. Workers claim due rows with FOR UPDATE SKIP LOCKED, highest
+priority first, and hold them for the job's visibility timeout; a job whose
+worker died is reclaimed once that runs out, so handlers must tolerate
+running more than once. Failures are retried with exponential backoff up to
+``max_attempts``, then left as ``failed`` for an owner to retry.
+
+Cron schedules enqueue one job per slot. Every worker evaluates them, and a
+unique dedupe key makes sure only one of them inserts each slot.
+"""
+import datetime as dt
+import importlib
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobSpec:
+    name: str
+    fn: Callable[..., Any]
+    priority: int
+    max_attempts: int
+    timeout_seconds: int
+
+
+REGISTRY: Dict[str, JobSpec] = {}
+
+# Modules whose import registers handlers and schedules
+JOB_MODULES = (
+    "app.services.jobs",
+    "app.services.email_outbox",
+    "app.services.notification_retention",
+    "app.services.notification_digest",
+    "app.services.receipts",
+    "app.services.recurring_income",
+    "app.services.task_reminders",
+)
+
+
+def load_job_modules() -> None:
+    for module in JOB_MODULES:
+        importlib.import_module(module)
+
+
+def job(
+    name: str,
+    priority: int = 0,
+    max_attempts: Optional[int] = None,
+    timeout_seconds: Optional[int] = None,
+) -> Callable:
+    """Register fn as the handler for jobs called name; it gets the payload as kwargs."""
+    def decorator(fn: Callable) -> Callable:
+        REGISTRY[name] = JobSpec(
+            name=name,
+            fn=fn,
+            priority=priority,
+            max_attempts=max_attempts or settings.job_default_max_attempts,
+            timeout_seconds=timeout_seconds or settings.job_default_timeout_seconds,
+        )
+        return fn
+    return decorator
+
+
+def _row(name: str, payload: Optional[Dict[str, Any]], run_at: Optional[dt.datetime], priority: Optional[int], dedupe_key: Optional[str]) -> Dict[str, Any]:
+    spec = REGISTRY.get(name)
+    return {
+        "name": name,
+        "payload": payload or {},
+        "priority": priority if priority is not None else (spec.priority if spec else 0),
+        "max_attempts": spec.max_attempts if spec else settings.job_default_max_attempts,
+        "timeout_seconds": spec.timeout_seconds if spec else settings.job_default_timeout_seconds,
+        "run_at": run_at or dt.datetime.utcnow(),
+        "dedupe_key": dedupe_key,
+    }
+
+
+def new_job(
+    name: str,
+    payload: Optional[Dict[str, Any]] = None,
+    run_at: Optional[dt.datetime] = None,
+    priority: Optional[int] = None,
+) -> Job:
+    """A Job row with the handler's defaults, for callers that need the object."""
+    return Job(**_row(name, payload, run_at, priority, None))
+
+
+def enqueue(
+    db: Session,
+    name: str,
+    payload: Optional[Dict[str, Any]] = None,
+    run_at: Optional[dt.datetime] = None,
+    priority: Optional[int] = None,
+    dedupe_key: Optional[str] = None,
+) -> bool:
+    """Add a job in the caller's transaction. Returns False if dedupe_key already exists."""
+    if dedupe_key is None:
+        db.add(new_job(name, payload, run_at, priority))
+        return True
+    row = _row(name, payload, run_at, priority, dedupe_key)
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    result = db.execute(insert(Job).values(**row).on_conflict_do_nothing(index_elements=["dedupe_key"]))
+    return result.rowcount > 0
+
+
+# --- Cron ---
+
+class Cron:
+    """Five-field cron expression: minute hour day-of-month month day-of-week.
+
+    Fields take *, numbers, ranges (1-5), steps (*/15, 8-18/2) and lists.
+    Day of week runs 0-6 from Sunday (7 is Sunday too). As in cron, when
+    both day fields are restricted a day matching either one fires.
+    """
+
+    _BOUNDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        parsed = [self._parse(f, lo, hi) for f, (lo, hi) in zip(fields, self._BOUNDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {d % 7 for d in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, lo: int, hi: int) -> Set[int]:
+        values: Set[int] = set()
+        for part in field.split(","):
+            base, _, step = part.partition("/")
+            if base == "*":
+                start, end = lo, hi
+            elif "-" in base:
+                start, end = (int(x) for x in base.split("-"))
+            else:
+                start = end = int(base)
+            if start < lo or end > hi or start > end:
+                raise ValueError(f"Cron field {field!r} out of range {lo}-{hi}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, day: dt.datetime) -> bool:
+        in_month = day.day in self.days
+        in_week = (day.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return in_week
+        if self._any_weekday:
+            return in_month
+        return in_month or in_week
+
+    def next_after(self, after: dt.datetime) -> dt.datetime:
+        t = after.replace(second=0, microsecond=0) + dt.timedelta(minutes=1)
+        limit = t + dt.timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1) + dt.timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = (t + dt.timedelta(days=1)).replace(hour=0, minute=0)
+            elif t.hour not in self.hours:
+                t = (t + dt.timedelta(hours=1)).replace(minute=0)
+            elif t.minute not in self.minutes:
+                t += dt.timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+
+SCHEDULES: Dict[str, Cron] = {}
+
+
+def schedule(name: str, expression: str) -> None:
+    """Enqueue job name at every slot of a cron expression (UTC)."""
+    SCHEDULES[name] = Cron(expression)
+
+
+def enqueue_due_schedules(db: Session, next_runs: Dict[str, dt.datetime], now: dt.datetime) -> int:
+    """Enqueue every schedule slot that has come due. Commits; returns jobs inserted."""
+    inserted = 0
+    for name, cron in SCHEDULES.items():
+        slot = next_runs.setdefault(name, cron.next_after(now))
+        if slot > now:
+            continue
+        if enqueue(db, name, run_at=slot, dedupe_key=f"{name}@{slot:%Y-%m-%dT%H:%M}"):
+            inserted += 1
+        # Slots missed while no worker was running are skipped
+        next_runs[name] = cron.next_after(now)
+    db.commit()
+    return inserted
+
+
+# --- Claiming and completion ---
+
+def _backoff(attempts: int) -> dt.timedelta:
+    delay = min(settings.job_backoff_max_seconds, settings.job_backoff_base_seconds * 2 ** (attempts - 1))
+    return dt.timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def reap_expired(db: Session, now: dt.datetime) -> int:
+    """Requeue or fail running jobs whose visibility timeout ran out. Commits."""
+    expired = (
+        db.query(Job)
+        .filter(Job.status == JobStatus.running, Job.locked_until < now)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for j in expired:
+        j.last_error = f"Visibility timeout expired on {j.locked_by}"
+        j.locked_by = None
+        j.locked_until = None
+        if j.attempts >= j.max_attempts:
+            j.status = JobStatus.failed
+            j.finished_at = now
+        else:
+            j.status = JobStatus.queued
+            j.run_at = now
+        logger.warning(f"Job {j.id} ({j.name}) timed out, {j.status.value}")
+    db.commit()
+    return len(expired)
+
+
+def claim(db: Session, worker_id: str, limit: int) -> List[Tuple[int, str, Dict[str, Any], int]]:
+    """Lock up to limit due jobs for worker_id. Commits; returns (id, name, payload, attempt)."""
+    now = dt.datetime.utcnow()
+    batch = (
+        db.query(Job.id, Job.name, Job.payload, Job.attempts, Job.timeout_seconds)
+        .filter(Job.status == JobStatus.queued, Job.run_at <= now)
+        .order_by(Job.priority.desc(), Job.run_at, Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    claimed = []
+    for job_id, name, payload, attempts, timeout_seconds in batch:
+        # Conditional, so a database without SKIP LOCKED still hands each
+        # job to one worker
+        won = db.query(Job).filter(Job.id == job_id, Job.status == JobStatus.queued).update(
+            {
+                "status": JobStatus.running,
+                "attempts": attempts + 1,
+                "locked_by": worker_id,
+                "locked_until": now + dt.timedelta(seconds=timeout_seconds),
+                "started_at": now,
+            },
+            synchronize_session=False,
+        )
+        if won:
+            claimed.append((job_id, name, dict(payload or {}), attempts + 1))
+    db.commit()
+    return claimed
+
+
+def finish(db: Session, job_id: int, worker_id: str, attempt: int, error: Optional[str] = None) -> None:
+    """Record the outcome of one attempt. Commits.
+
+    The row is only touched while this worker still holds that attempt, so
+    a run that outlived its visibility timeout cannot overwrite the retry.
+    """
+    j = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.locked_by == worker_id, Job.attempts == attempt, Job.status == JobStatus.running)
+        .with_for_update()
+        .first()
+    )
+    if j is None:
+        db.rollback()
+        logger.warning(f"Job {job_id} was reclaimed before attempt {attempt} finished")
+        return
+    now = dt.datetime.utcnow()
+    j.locked_by = None
+    j.locked_until = None
+    if error is None:
+        j.status = JobStatus.done
+        j.finished_at = now
+        j.last_error = None
+    elif j.attempts >= j.max_attempts:
+        j.status = JobStatus.failed
+        j.finished_at = now
+        j.last_error = error[:1000]
+        logger.error(f"Job {job_id} ({j.name}) failed after {j.attempts} attempts: {error}")
+    else:
+        j.status = JobStatus.queued
+        j.run_at = now + _backoff(j.attempts)
+        j.last_error = error[:1000]
+        logger.warning(f"Job {job_id} ({j.name}) attempt {j.attempts} failed, retrying: {error}")
+    db.commit()
+
+
+def retry(db: Session, job_id: int) -> bool:
+    """Requeue a failed job with a fresh set of attempts."""
+    updated = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatus.failed)
+        .values(status=JobStatus.queued, attempts=0, run_at=dt.datetime.utcnow(), finished_at=None)
+    ).rowcount
+    db.commit()
+    return updated > 0
+
+
+# --- Metrics ---
+
+def metrics(db: Session) -> Dict[str, Any]:
+    now = dt.datetime.utcnow()
+    hour_ago = now - dt.timedelta(hours=1)
+    counts = dict(db.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+    oldest_due = (
+        db.query(func.min(Job.run_at))
+        .filter(Job.status == JobStatus.queued, Job.run_at <= now)
+        .scalar()
+    )
+
+    recent = (
+        db.query(Job.name, Job.status, Job.started_at, Job.finished_at)
+        .filter(Job.finished_at >= hour_ago, Job.status.in_([JobStatus.done, JobStatus.failed]))
+        .all()
+    )
+    per_name: Dict[str, Dict[str, Any]] = {}
+    for name, status, started_at, finished_at in recent:
+        entry = per_name.setdefault(name, {"done": 0, "failed": 0, "total_ms": 0.0})
+        entry[status.value] += 1
+        if started_at and finished_at:
+            entry["total_ms"] += (finished_at - started_at).total_seconds() * 1000
+    for entry in per_name.values():
+        runs = entry["done"] + entry["failed"]
+        entry["avg_ms"] = round(entry.pop("total_ms") / runs, 1) if runs else 0.0
+
+    done_last_minute = sum(1 for _, status, _, finished_at in recent if status == JobStatus.done and finished_at >= now - dt.timedelta(minutes=1))
+    return {
+        "counts": {s.value: counts.get(s, 0) for s in JobStatus},
+        # How long the oldest runnable job has been waiting for a worker
+        "queue_lag_seconds": round((now - oldest_due).total_seconds(), 1) if oldest_due else 0.0,
+        "done_last_minute": done_last_minute,
+        "done_last_hour": sum(e["done"] for e in per_name.values()),
+        "failed_last_hour": sum(e["failed"] for e in per_name.values()),
+        "by_name": per_name,
+        "schedules": {name: cron.expression for name, cron in SCHEDULES.items()},
+    }
+
+
+# --- Housekeeping ---
+
+@job("jobs.prune", priority=-10)
+def prune_finished() -> None:
+    """Delete done jobs older than job_keep_done_days; failed ones stay for inspection."""
+    from app.database import SessionLocal
+
+    cutoff = dt.datetime.utcnow() - dt.timedelta(days=settings.job_keep_done_days)
+    db = SessionLocal()
+    try:
+        deleted = db.query(Job).filter(Job.status == JobStatus.done, Job.finished_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+        if deleted:
+            logger.info(f"Pruned {deleted} finished jobs")
+    finally:
+        db.close()
+
+
+schedule("jobs.prune", "17 4 * * *")
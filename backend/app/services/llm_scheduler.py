@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while the circuit breaker is open."""
+
+
+def _is_transient(exc: Exception) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(exc, httpx.TransportError)
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+    value = exc.response.headers.get("Retry-After")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class LLMScheduler:
+    """Per-worker gate in front of the LLM provider.
+
+    - At most ``max_concurrency`` requests are in flight; the rest wait in
+      per-user queues served round-robin, so one chatty user cannot starve
+      the others.
+    - Transient errors (429, 5xx, transport failures) are retried with
+      full-jitter exponential backoff, honouring Retry-After.
+    - After ``failure_threshold`` consecutive transient failures the circuit
+      opens and calls fail fast with CircuitOpenError for ``reset_timeout``
+      seconds. Then a single trial call is let through (half-open) while
+      everyone else keeps failing fast; its result closes or reopens the
+      circuit.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        failure_threshold: int,
+        reset_timeout: float,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._active = 0
+        self._queues: "OrderedDict[Any, Deque[asyncio.Future]]" = OrderedDict()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+        self._wait_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._retries = 0
+        self._rejected = 0
+
+    # --- Circuit breaker ---
+
+    @property
+    def circuit_state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def _check_circuit(self) -> bool:
+        """Raise unless a call may go out; True if it would be the half-open trial."""
+        state = self.circuit_state
+        if state == "closed":
+            return False
+        if state == "open" or self._probing:
+            self._rejected += 1
+            raise CircuitOpenError("LLM provider circuit is open")
+        return True
+
+    def _record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("LLM circuit closed")
+        self._failures = 0
+        self._opened_at = None
+
+    def _record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            if self.circuit_state != "open":
+                logger.warning(f"LLM circuit opened after {self._failures} consecutive failures")
+            self._opened_at = time.monotonic()
+
+    # --- Fair queuing ---
+
+    def _queue_depth(self) -> int:
+        return sum(1 for q in self._queues.values() for f in q if not f.done())
+
+    async def _acquire(self, key: Any) -> None:
+        if self._active < self.max_concurrency and self._queue_depth() == 0:
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before cancellation
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        while self._queues:
+            key, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            if not future.done():
+                # Hand the slot straight to the next waiter; _active is unchanged
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    # --- Public API ---
+
+    async def run(self, key: Any, call: Callable[[], Awaitable[T]]) -> T:
+        self._check_circuit()
+
+        enqueued = time.monotonic()
+        await self._acquire(key)
+        waited = time.monotonic() - enqueued
+        self._wait_count += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+        probe = False
+        try:
+            attempt = 0
+            while True:
+                if self._check_circuit():
+                    probe = self._probing = True
+                try:
+                    result = await call()
+                except Exception as e:
+                    if not _is_transient(e):
+                        raise
+                    self._record_failure()
+                    if attempt >= self.max_retries or self.circuit_state == "open":
+                        raise
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                    delay = max(delay, min(_retry_after(e) or 0, self.backoff_max))
+                    logger.warning(f"LLM transient error, retrying in {delay:.2f}s: {e}")
+                    self._retries += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                self._record_success()
+                return result
+        finally:
+            if probe:
+                # Whatever the outcome, the next caller may try again
+                self._probing = False
+            self._release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self._queue_depth(),
+            "queued_users": len(self._queues),
+            "wait_count": self._wait_count,
+            "wait_avg_ms": round(self._wait_total / self._wait_count * 1000, 1) if self._wait_count else 0.0,
+            "wait_max_ms": round(self._wait_max * 1000, 1),
+            "retries": self._retries,
+            "rejected": self._rejected,
+            "circuit": self.circuit_state,
+            "probing": self._probing,
+            "consecutive_failures": self._failures,
+        }
+
+
+scheduler = LLMScheduler(
+    max_concurrency=settings.llm_max_concurrency,
+    max_retries=settings.llm_max_retries,
+    backoff_base=settings.llm_backoff_base_seconds,
+    backoff_max=settings.llm_backoff_max_seconds,
+    failure_threshold=settings.llm_circuit_failure_threshold,
+    reset_timeout=settings.llm_circuit_reset_seconds,
+)
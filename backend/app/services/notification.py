@@ -1,14 +1,22 @@
 import logging
+from html import escape
+from typing import Mapping, Optional, Sequence
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from app.models.notification import Notification, NotificationType
-from app.models.user import User
-from app.services.email import send_email
+from app.models.notification import EmailOutbox, Notification, NotificationType
+from app.models.user import RoleEnum, User
+from app.services.email import enqueue_email, wake_outbox
+from app.services.notification_push import announce, serialize
 
 logger = logging.getLogger(__name__)
 
 
+def _email_html(title: str, message: str) -> str:
+    return f"<h2>{escape(title)}</h2><p>{escape(message)}</p><p>— Система «Дом»</p>"
+
+
 def create_notification(
     db: Session,
     user_id: int,
@@ -16,6 +24,8 @@ def create_notification(
     message: str,
     type: NotificationType,
     channel: str = "in_app",
+    email_subject: Optional[str] = None,
+    email_html: Optional[str] = None,
 ) -> Notification:
     notification = Notification(
         user_id=user_id,
@@ -25,14 +35,90 @@ def create_notification(
         channel=channel,
     )
     db.add(notification)
-    db.commit()
-    db.refresh(notification)
 
-    # Send email if channel is "email" or "both"
+    # Queue email if channel is "email" or "both"; the outbox row commits
+    # with the notification and the worker sends it. Digest users get it
+    # with their next digest instead.
     if channel in ("email", "both"):
         user = db.query(User).filter(User.id == user_id).first()
-        if user and user.email:
-            html = f"<h2>{title}</h2><p>{message}</p><p>— Система «Дом»</p>"
-            send_email(user.email, f"Дом — {title}", html)
+        if user and user.email_digest:
+            notification.digest_pending = True
+        elif user and user.email:
+            db.flush()
+            enqueue_email(
+                db,
+                user.email,
+                email_subject or f"Дом — {title}",
+                email_html or _email_html(title, message),
+                notification_id=notification.id,
+            )
 
+    db.commit()
+    db.refresh(notification)
     return notification
+
+
+def create_notifications_bulk(
+    db: Session,
+    title: str,
+    message: str,
+    type: NotificationType,
+    channel: str = "in_app",
+    user_ids: Optional[Sequence[int]] = None,
+    role: Optional[RoleEnum] = None,
+    messages: Optional[Mapping[int, str]] = None,
+) -> int:
+    """Notify every active user in user_ids and/or with the given role.
+
+    messages optionally gives a user their own text in place of message.
+    Recipients are loaded in one query, the notifications written with one
+    multi-row INSERT and their emails queued with another, all committed
+    together. Returns the number of notifications created.
+    """
+    messages = messages or {}
+    query = db.query(User.id, User.email, User.email_digest).filter(User.is_active == True)
+    if user_ids is not None:
+        query = query.filter(User.id.in_(user_ids))
+    if role is not None:
+        query = query.filter(User.role == role)
+    recipients = query.order_by(User.id).all()
+    if not recipients:
+        return 0
+
+    wants_email = channel in ("email", "both")
+    notifications = db.scalars(
+        insert(Notification).returning(Notification),
+        [
+            {
+                "user_id": user_id,
+                "title": title,
+                "message": messages.get(user_id, message),
+                "type": type,
+                "channel": channel,
+                "digest_pending": wants_email and digest,
+            }
+            for user_id, _, digest in recipients
+        ],
+    ).all()
+    # Rows written without a flush are not seen by the push hooks
+    announce(db, [serialize(n) for n in notifications])
+
+    if wants_email:
+        emails = {user_id: email for user_id, email, digest in recipients if email and not digest}
+        rows = [
+            {
+                "to_email": emails[n.user_id],
+                "subject": f"Дом — {title}",
+                "html_body": _email_html(title, n.message),
+                "notification_id": n.id,
+            }
+            for n in notifications
+            if n.user_id in emails
+        ]
+        if rows:
+            db.execute(insert(EmailOutbox), rows)
+            wake_outbox(db)
+
+    db.commit()
+    logger.info(f"Bulk notification '{title}' sent to {len(notifications)} users")
+    return len(notifications)
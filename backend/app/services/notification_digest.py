@@ -0,0 +1,104 @@
+"""Periodic email digests for users who opted out of one email per notification.
+
+Notifications for digest users are flagged ``digest_pending`` instead of
+being queued as emails. The ``notifications.digest`` job, run on
+notification_digest_cron, renders each such user's pending notifications
+into one email and puts it on the outbox. Notifications already read in the app are left out.
+"""
+import logging
+from collections import defaultdict
+from html import escape
+from typing import Dict, List
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.notification import EmailOutbox, Notification
+from app.models.user import User
+from app.services.email import wake_outbox
+from app.services.jobs import job, schedule
+
+logger = logging.getLogger(__name__)
+
+
+def _digest_html(notifications: List[Notification]) -> str:
+    items = "".join(
+        f"<li><b>{escape(n.title)}</b> — {escape(n.message)} "
+        f"<span style=\"color:#888\">{n.created_at:%d.%m %H:%M}</span></li>"
+        for n in notifications
+    )
+    return f"<h2>Новые уведомления</h2><ul>{items}</ul><p>— Система «Дом»</p>"
+
+
+def digest_batch(db: Session, max_users: int) -> int:
+    """Send digests for up to max_users users. Commits; returns users digested."""
+    # Users are the unit of claiming: a concurrent run skips the users this
+    # one holds, and holding the user covers all of their pending rows
+    waiting = db.query(Notification.user_id).filter(Notification.digest_pending == True)
+    user_ids = [
+        user_id for (user_id,) in db.query(User.id)
+        .filter(User.id.in_(waiting))
+        .order_by(User.id)
+        .limit(max_users)
+        .with_for_update(skip_locked=True)
+    ]
+    if not user_ids:
+        db.rollback()
+        return 0
+
+    pending = (
+        db.query(Notification)
+        .filter(Notification.digest_pending == True, Notification.user_id.in_(user_ids))
+        .order_by(Notification.user_id, Notification.id)
+        .all()
+    )
+    emails = dict(db.query(User.id, User.email).filter(User.id.in_(user_ids)).all())
+
+    by_user: Dict[int, List[Notification]] = defaultdict(list)
+    for n in pending:
+        if not n.is_read:
+            by_user[n.user_id].append(n)
+
+    rows = []
+    for user_id, items in by_user.items():
+        if not emails.get(user_id):
+            continue
+        subject = f"Дом — {items[0].title}" if len(items) == 1 else f"Дом — {len(items)} новых уведомлений"
+        rows.append({"to_email": emails[user_id], "subject": subject, "html_body": _digest_html(items)})
+    if rows:
+        db.execute(insert(EmailOutbox), rows)
+        wake_outbox(db)
+
+    db.execute(
+        update(Notification)
+        .where(Notification.id.in_([n.id for n in pending]))
+        .values(digest_pending=False)
+    )
+    db.commit()
+    logger.info(f"Queued {len(rows)} digest emails covering {len(pending)} notifications")
+    return len(user_ids)
+
+
+def run_digests() -> int:
+    """Send every pending digest this run can claim. Returns the number of users digested."""
+    handled = 0
+    db = SessionLocal()
+    try:
+        while True:
+            count = digest_batch(db, settings.notification_digest_batch_users)
+            handled += count
+            if count < settings.notification_digest_batch_users:
+                break
+    finally:
+        db.close()
+    return handled
+
+
+@job("notifications.digest", timeout_seconds=900)
+def digest_job() -> None:
+    run_digests()
+
+
+schedule("notifications.digest", settings.notification_digest_cron)
@@ -0,0 +1,184 @@
+"""Real-time delivery of new notifications to connected sockets.
+
+Every app worker keeps a ``NotificationHub`` of per-user socket queues. On
+Postgres a new notification is announced with ``pg_notify`` inside the
+transaction that creates it, so it is delivered only if that transaction
+commits; each worker LISTENs on the channel and fans the payload out to its
+own sockets. Other databases (SQLite in development) have no cross-process
+channel, so the payload is delivered to the local hub after commit.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import engine
+from app.models.notification import Notification
+from app.schemas.notification import NotificationResponse
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "notifications"
+_PENDING_KEY = "notification_push_pending"
+
+
+def serialize(notification: Notification) -> Dict[str, Any]:
+    return NotificationResponse.model_validate(notification).model_dump(mode="json")
+
+
+def _use_pg_notify() -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+class NotificationHub:
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listen_conn = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self.delivered = 0
+
+    # --- Sockets ---
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.notification_push_queue_size)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def connected(self) -> int:
+        return sum(len(q) for q in self._subscribers.values())
+
+    # --- Delivery ---
+
+    def _deliver(self, payload: Dict[str, Any]) -> None:
+        for queue in self._subscribers.get(payload["user_id"], ()):
+            try:
+                queue.put_nowait(payload)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                # A stalled client catches up from the database on reconnect
+                logger.warning(f"Notification queue full for user {payload['user_id']}, dropping push")
+
+    def deliver_threadsafe(self, payloads: List[Dict[str, Any]]) -> None:
+        # Commits happen in threadpool threads as well as on the loop
+        if self._loop is None:
+            return
+        for payload in payloads:
+            self._loop.call_soon_threadsafe(self._deliver, payload)
+
+    # --- Postgres LISTEN ---
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        if _use_pg_notify():
+            self._listener_task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._listener_task:
+            self._listener_task.cancel()
+            await asyncio.gather(self._listener_task, return_exceptions=True)
+            self._listener_task = None
+        self._close_listener()
+
+    def _connect(self):
+        # A dedicated connection outside the pool: it stays in LISTEN for
+        # the life of the worker
+        import psycopg2
+
+        conn = psycopg2.connect(engine.url.set(drivername="postgresql").render_as_string(hide_password=False))
+        conn.autocommit = True
+        return conn
+
+    def _close_listener(self) -> None:
+        if self._listen_conn is not None:
+            try:
+                self._loop.remove_reader(self._listen_conn.fileno())
+                self._listen_conn.close()
+            except Exception:
+                pass
+            self._listen_conn = None
+
+    async def _listen_forever(self) -> None:
+        while True:
+            try:
+                conn = await asyncio.to_thread(self._connect)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANNEL}")
+                self._listen_conn = conn
+                lost = asyncio.Event()
+                self._loop.add_reader(conn.fileno(), self._on_readable, lost)
+                logger.info(f"Listening for notifications on channel '{CHANNEL}'")
+                await lost.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification listener failed: {e}")
+            self._close_listener()
+            await asyncio.sleep(settings.notification_listen_retry_seconds)
+
+    def _on_readable(self, lost: asyncio.Event) -> None:
+        conn = self._listen_conn
+        try:
+            conn.poll()
+        except Exception as e:
+            logger.error(f"Notification listener connection lost: {e}")
+            self._loop.remove_reader(conn.fileno())
+            lost.set()
+            return
+        while conn.notifies:
+            note = conn.notifies.pop(0)
+            try:
+                self._deliver(json.loads(note.payload))
+            except Exception as e:
+                logger.error(f"Bad notification payload: {e}")
+
+
+hub = NotificationHub()
+
+
+def announce(session: Session, payloads: List[Dict[str, Any]]) -> None:
+    """Push serialized notifications once the session's transaction commits.
+
+    Call this for notifications inserted without the ORM; ORM-created ones
+    are announced automatically.
+    """
+    if not payloads:
+        return
+    if _use_pg_notify():
+        # One round trip however many rows a bulk insert produced
+        session.connection().execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": CHANNEL, "payloads": [json.dumps(p, ensure_ascii=False) for p in payloads]},
+        )
+    else:
+        session.info.setdefault(_PENDING_KEY, []).extend(payloads)
+
+
+@event.listens_for(Session, "after_flush")
+def _announce_new(session: Session, flush_context) -> None:
+    payloads = [serialize(obj) for obj in session.new if isinstance(obj, Notification)]
+    announce(session, payloads)
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_local(session: Session) -> None:
+    payloads = session.info.pop(_PENDING_KEY, None)
+    if payloads:
+        hub.deliver_threadsafe(payloads)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_local(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
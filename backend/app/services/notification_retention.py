@@ -0,0 +1,80 @@
+"""Moves old read notifications from the hot table to notifications_archive.
+
+Runs as the ``notifications.retention`` job on notification_retention_cron.
+Rows are moved in short batches, each its own transaction, so the job never
+holds locks on a large part of the table. Unread notifications are kept
+whatever their age.
+"""
+import datetime as dt
+import logging
+from typing import Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.notification import EmailOutbox, Notification, NotificationArchive
+from app.services.jobs import job, schedule
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = ["id", "user_id", "title", "message", "type", "is_read", "channel", "created_at"]
+
+
+def archive_batch(db: Session, cutoff: dt.datetime, limit: int) -> int:
+    """Move up to limit read notifications created before cutoff. Commits."""
+    ids = db.scalars(
+        select(Notification.id)
+        .where(Notification.is_read == True, Notification.created_at < cutoff)
+        .order_by(Notification.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        db.rollback()
+        return 0
+
+    db.execute(
+        insert(NotificationArchive).from_select(
+            _COLUMNS,
+            select(*(getattr(Notification, c) for c in _COLUMNS)).where(Notification.id.in_(ids)),
+        )
+    )
+    # Sent emails outlive the notification that caused them
+    db.execute(
+        update(EmailOutbox).where(EmailOutbox.notification_id.in_(ids)).values(notification_id=None)
+    )
+    db.execute(delete(Notification).where(Notification.id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+
+def run_retention(days: Optional[int] = None, batch: Optional[int] = None) -> int:
+    """Archive everything the policy allows. Returns the number of rows moved."""
+    days = settings.notification_retention_days if days is None else days
+    batch = batch or settings.notification_retention_batch
+    if days <= 0:
+        return 0
+    cutoff = dt.datetime.utcnow() - dt.timedelta(days=days)
+    moved = 0
+    db = SessionLocal()
+    try:
+        while True:
+            count = archive_batch(db, cutoff, batch)
+            moved += count
+            if count < batch:
+                break
+    finally:
+        db.close()
+    if moved:
+        logger.info(f"Archived {moved} notifications older than {days} days")
+    return moved
+
+
+@job("notifications.retention", priority=-5, timeout_seconds=1800)
+def retention_job() -> None:
+    run_retention()
+
+
+schedule("notifications.retention", settings.notification_retention_cron)
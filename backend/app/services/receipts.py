@@ -0,0 +1,139 @@
+"""Background extraction of receipt images into draft expenses.
+
+Each uploaded receipt is recorded as a ReceiptJob row and gets a
+``receipts.extract`` job in the same transaction, so extraction runs in
+``python -m app.worker`` with the jobs table's claiming, backoff and
+visibility timeout. A receipt whose worker died is picked up again when the
+job is reclaimed; the ReceiptJob's own attempt counter decides when to give
+up, and the result is only written by the attempt that still owns the row.
+"""
+import datetime as dt
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Protocol
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.finance import Expense, ExpenseStatus, ReceiptJob, ReceiptJobStatus
+from app.services.jobs import job
+
+logger = logging.getLogger(__name__)
+
+EXTRACT_JOB = "receipts.extract"
+
+
+@dataclass
+class ReceiptData:
+    amount: float
+    date: dt.date
+    merchant: Optional[str] = None
+    category: str = "other"
+
+
+class ReceiptExtractor(Protocol):
+    def extract(self, path: Path) -> ReceiptData:
+        """Read amount, date and merchant from a receipt image."""
+
+
+class StubExtractor:
+    """Placeholder until an OCR backend is plugged in: an empty draft dated today."""
+
+    def extract(self, path: Path) -> ReceiptData:
+        if not path.exists():
+            raise FileNotFoundError(f"Receipt file {path.name} not found")
+        return ReceiptData(amount=0.0, date=dt.date.today())
+
+
+_extractor: ReceiptExtractor = StubExtractor()
+
+
+def set_extractor(extractor: ReceiptExtractor) -> None:
+    global _extractor
+    _extractor = extractor
+
+
+def receipt_path(receipt_url: str) -> Path:
+    return Path(settings.upload_dir) / Path(receipt_url).name
+
+
+@job(
+    EXTRACT_JOB,
+    priority=5,
+    # One more than the receipt's own limit, so a run reclaimed after a crash
+    # still gets to mark the receipt failed
+    max_attempts=settings.receipt_max_attempts + 1,
+    timeout_seconds=settings.receipt_timeout_seconds,
+)
+def extract_receipt(receipt_job_id: int) -> None:
+    """Turn one receipt into a draft expense; raises to have the attempt retried."""
+    db = SessionLocal()
+    try:
+        receipt = db.query(ReceiptJob).filter(ReceiptJob.id == receipt_job_id).first()
+        if receipt is None or receipt.status in (ReceiptJobStatus.done, ReceiptJobStatus.failed):
+            return
+        if receipt.attempts >= settings.receipt_max_attempts:
+            # The last attempt never reported back
+            receipt.status = ReceiptJobStatus.failed
+            receipt.error = receipt.error or "Extraction did not finish"
+            receipt.finished_at = dt.datetime.utcnow()
+            db.commit()
+            logger.error(f"Receipt job {receipt_job_id} failed: gave up after {receipt.attempts} attempts")
+            return
+
+        attempt = receipt.attempts + 1
+        receipt.status = ReceiptJobStatus.processing
+        receipt.attempts = attempt
+        db.commit()
+
+        try:
+            data = _extractor.extract(receipt_path(receipt.receipt_url))
+        except Exception as e:
+            receipt.error = str(e)[:500]
+            if attempt < settings.receipt_max_attempts:
+                receipt.status = ReceiptJobStatus.queued
+                db.commit()
+                logger.warning(f"Receipt job {receipt_job_id} failed (attempt {attempt}), retrying: {e}")
+                raise
+            receipt.status = ReceiptJobStatus.failed
+            receipt.finished_at = dt.datetime.utcnow()
+            db.commit()
+            logger.error(f"Receipt job {receipt_job_id} failed: {e}")
+            return
+
+        receipt = (
+            db.query(ReceiptJob)
+            .filter(
+                ReceiptJob.id == receipt_job_id,
+                ReceiptJob.attempts == attempt,
+                ReceiptJob.status == ReceiptJobStatus.processing,
+            )
+            .with_for_update()
+            .populate_existing()
+            .first()
+        )
+        if receipt is None:
+            # Reclaimed while this attempt was extracting; the newer run writes
+            db.rollback()
+            return
+
+        expense = Expense(
+            category=data.category,
+            description=data.merchant or "Чек",
+            amount=data.amount,
+            date=data.date,
+            receipt_url=receipt.receipt_url,
+            created_by=receipt.created_by,
+            status=ExpenseStatus.draft.value,
+        )
+        db.add(expense)
+        receipt.expense = expense
+        receipt.merchant = data.merchant
+        receipt.amount = data.amount
+        receipt.date = data.date
+        receipt.error = None
+        receipt.status = ReceiptJobStatus.done
+        receipt.finished_at = dt.datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
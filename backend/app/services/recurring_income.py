@@ -0,0 +1,133 @@
+"""Generates each month's recurring income from the entries marked recurring.
+
+Income entered by hand with ``is_recurring`` is a template, keyed by
+(source, description, category); the latest entry of a key carries the
+current amount, and unticking ``is_recurring`` on it ends the series. For a
+month, every template without an entry of its key in that month yet gets a
+copy dated on the template's day of month (clamped to the month's length).
+All copies are written with one INSERT that skips any (template, month)
+already taken, so a manual backfill racing the daily job neither doubles
+up nor fails on the unique constraint.
+"""
+import calendar
+import datetime as dt
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.finance import Income
+from app.services.jobs import job, schedule
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str, str]
+
+
+def _key(income: Income) -> Key:
+    return (income.source, income.description, income.category)
+
+
+def month_start(day: dt.date) -> dt.date:
+    return day.replace(day=1)
+
+
+def _add_months(month: dt.date, n: int) -> dt.date:
+    index = month.year * 12 + month.month - 1 + n
+    return dt.date(index // 12, index % 12 + 1, 1)
+
+
+def _day_in(month: dt.date, day: int) -> dt.date:
+    return month.replace(day=min(day, calendar.monthrange(month.year, month.month)[1]))
+
+
+def _templates(db: Session) -> Dict[Key, Income]:
+    keys = {
+        (source, description, category)
+        for source, description, category in db.query(Income.source, Income.description, Income.category)
+        .filter(Income.is_recurring == True, Income.recurring_source_id == None)
+        .distinct()
+    }
+    if not keys:
+        return {}
+    latest: Dict[Key, Income] = {}
+    entries = (
+        db.query(Income)
+        .filter(Income.recurring_source_id == None, Income.source.in_({k[0] for k in keys}))
+        .order_by(Income.date, Income.id)
+    )
+    for income in entries:
+        if _key(income) in keys:
+            latest[_key(income)] = income
+    return {key: income for key, income in latest.items() if income.is_recurring}
+
+
+def materialize(db: Session, month: dt.date, backfill: bool = False) -> List[dict]:
+    """Create missing recurring income for month; with backfill, for every
+    month since each template up to month (at most recurring_income_backfill_months).
+    Commits; returns the rows inserted by this call."""
+    month = month_start(month)
+    templates = _templates(db)
+    if not templates:
+        return []
+
+    earliest = _add_months(month, -(settings.recurring_income_backfill_months - 1)) if backfill else month
+    existing = {
+        (_key(income), month_start(income.date))
+        for income in db.query(Income).filter(
+            Income.date >= earliest,
+            Income.date < _add_months(month, 1),
+            Income.source.in_({k[0] for k in templates}),
+        )
+    }
+
+    rows = []
+    for key, template in templates.items():
+        first = _add_months(month_start(template.date), 1)
+        current = max(first, earliest)
+        while current <= month:
+            if (key, current) not in existing:
+                rows.append({
+                    "source": template.source,
+                    "description": template.description,
+                    "amount": template.amount,
+                    "date": _day_in(current, template.date.day),
+                    "category": template.category,
+                    "payment_source": template.payment_source,
+                    "is_recurring": True,
+                    "recurring_source_id": template.id,
+                    "recurring_period": current,
+                })
+            current = _add_months(current, 1)
+
+    if rows:
+        insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        # The read above does not lock; a concurrent run may have written some since
+        inserted = set(db.execute(
+            insert(Income)
+            .on_conflict_do_nothing(index_elements=["recurring_source_id", "recurring_period"])
+            .returning(Income.recurring_source_id, Income.recurring_period),
+            rows,
+        ).all())
+        rows = [r for r in rows if (r["recurring_source_id"], r["recurring_period"]) in inserted]
+    db.commit()
+    logger.info(f"Recurring income for {month:%Y-%m}{' (backfill)' if backfill else ''}: {len(rows)} entries created")
+    return rows
+
+
+@job("finance.recurring_income")
+def recurring_income_job(month: Optional[str] = None, backfill: bool = False) -> None:
+    """month is "YYYY-MM"; defaults to the current month."""
+    target = dt.datetime.strptime(month, "%Y-%m").date() if month else dt.date.today()
+    db = SessionLocal()
+    try:
+        materialize(db, target, backfill)
+    finally:
+        db.close()
+
+
+schedule("finance.recurring_income", settings.recurring_income_cron)
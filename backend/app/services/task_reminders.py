@@ -0,0 +1,124 @@
+"""Reminds assignees of overdue and soon-due tasks.
+
+Open tasks are found with a range scan on (status, due_date) over a partial
+index that only holds tasks still owed a reminder, so the long tail of
+tasks already reported overdue is never rescanned. Each task is announced
+once per stage (due soon, then overdue) and ``Task.reminder`` records the
+stage sent; changing the due date resets it. Tasks are grouped by assignee
+and everyone gets a single notification per batch through the bulk path.
+"""
+import datetime as dt
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, or_, text, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.notification import NotificationType
+from app.models.task import REMINDER_PENDING, StatusEnum, Task, TaskReminder
+from app.services.jobs import job, schedule
+from app.services.notification import create_notifications_bulk
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = (StatusEnum.pending, StatusEnum.in_progress)
+MAX_LISTED = 10  # per stage, keeps the message within its column
+
+Row = Tuple[int, int, str, dt.date]
+
+
+def _fmt_date(day: dt.date) -> str:
+    return day.strftime("%d.%m.%Y")
+
+
+def _message(overdue: List[Row], due_soon: List[Row]) -> str:
+    parts = []
+    for label, rows in (("Просрочено", overdue), ("Скоро срок", due_soon)):
+        if not rows:
+            continue
+        lines = [f"• {title} — срок {_fmt_date(due)}" for _, _, title, due in rows[:MAX_LISTED]]
+        if len(rows) > MAX_LISTED:
+            lines.append(f"…и ещё {len(rows) - MAX_LISTED}")
+        parts.append(f"{label} ({len(rows)}):\n" + "\n".join(lines))
+    return "\n\n".join(parts)[:1000]
+
+
+def _due_batch(db: Session, today: dt.date, horizon: dt.date) -> List[Row]:
+    return (
+        db.query(Task.id, Task.assigned_to, Task.title, Task.due_date)
+        .filter(
+            Task.status.in_(OPEN_STATUSES),
+            Task.due_date <= horizon,
+            text(f"({REMINDER_PENDING})"),
+            # Due-soon reminders already sent wait until the task is overdue
+            or_(Task.reminder == None, Task.due_date < today),
+        )
+        .order_by(Task.due_date, Task.id)
+        .limit(settings.task_sweep_batch)
+        .all()
+    )
+
+
+def sweep(db: Session, today: Optional[dt.date] = None) -> Dict[str, int]:
+    """Send reminders for every task due by today + task_due_soon_days.
+    Commits once per batch; returns the counts sent."""
+    today = today or dt.date.today()
+    horizon = today + dt.timedelta(days=settings.task_due_soon_days)
+    totals = {"overdue": 0, "due_soon": 0, "notified": 0}
+
+    while True:
+        rows = _due_batch(db, today, horizon)
+        if not rows:
+            break
+
+        by_user: Dict[int, Tuple[List[Row], List[Row]]] = defaultdict(lambda: ([], []))
+        for row in rows:
+            overdue, due_soon = by_user[row[1]]
+            (overdue if row[3] < today else due_soon).append(row)
+
+        # Marked in the same transaction as the notifications, so a failed
+        # run sends nothing and is retried whole
+        db.execute(
+            update(Task)
+            .where(Task.id.in_([row[0] for row in rows]))
+            .values(reminder=case((Task.due_date < today, TaskReminder.overdue), else_=TaskReminder.due_soon)),
+            execution_options={"synchronize_session": False},
+        )
+        totals["notified"] += create_notifications_bulk(
+            db,
+            title="Напоминание о задачах",
+            message="",
+            type=NotificationType.task,
+            channel=settings.task_reminder_channel,
+            user_ids=list(by_user),
+            messages={user_id: _message(*stages) for user_id, stages in by_user.items()},
+        )
+        # Bulk returns without committing when no assignee is active
+        db.commit()
+        for overdue, due_soon in by_user.values():
+            totals["overdue"] += len(overdue)
+            totals["due_soon"] += len(due_soon)
+
+        if len(rows) < settings.task_sweep_batch:
+            break
+
+    logger.info(
+        f"Task reminders: {totals['overdue']} overdue, {totals['due_soon']} due soon, "
+        f"{totals['notified']} notifications"
+    )
+    return totals
+
+
+@job("tasks.reminders")
+def task_reminders_job() -> None:
+    db = SessionLocal()
+    try:
+        sweep(db)
+    finally:
+        db.close()
+
+
+schedule("tasks.reminders", settings.task_reminder_cron)
@@ -0,0 +1,131 @@
+"""Background job worker; run next to the web app:
+
+    cd backend && python -m app.worker
+
+Claims jobs from the ``jobs`` table and runs up to job_worker_concurrency of
+them at once in threads. Any number of worker processes can share the
+table. This is where all background work runs: cron jobs, receipt
+extraction and email delivery. SIGTERM/SIGINT stop claiming and wait for
+running jobs to finish.
+"""
+import asyncio
+import datetime as dt
+import logging
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services import jobs
+from app.services.events import bus
+
+logger = logging.getLogger("app.worker")
+
+
+class Worker:
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._in_flight: Set[int] = set()
+        self._lock = threading.Lock()
+        self._next_runs: Dict[str, dt.datetime] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def stop(self, *_) -> None:
+        logger.info("Stopping worker, waiting for running jobs")
+        self._stop.set()
+
+    async def _start_bus(self) -> None:
+        bus.start()
+
+    def _start_event_bus(self) -> None:
+        # Jobs commit from pool threads; their domain events are handled on
+        # a loop of their own, as in the web app
+        import app.services.event_handlers  # noqa: F401  registers the handlers
+
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="events", daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._start_bus(), self._loop).result()
+
+    def _stop_event_bus(self) -> None:
+        try:
+            asyncio.run_coroutine_threadsafe(bus.stop(), self._loop).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"Event bus did not stop cleanly: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def run(self) -> None:
+        jobs.load_job_modules()
+        self._start_event_bus()
+        logger.info(
+            f"Worker {self.worker_id} started: concurrency={self.concurrency} "
+            f"handlers={sorted(jobs.REGISTRY)} schedules={sorted(jobs.SCHEDULES)}"
+        )
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job") as pool:
+            while not self._stop.is_set():
+                try:
+                    claimed = self._tick(pool)
+                except Exception as e:
+                    logger.error(f"Worker loop failed: {e}")
+                    claimed = 0
+                # Claiming a full set means more is probably waiting
+                if not claimed:
+                    self._stop.wait(settings.job_poll_seconds)
+        # The pool has drained, so every job's events are on the bus
+        self._stop_event_bus()
+
+    def _tick(self, pool: ThreadPoolExecutor) -> int:
+        db = SessionLocal()
+        try:
+            now = dt.datetime.utcnow()
+            jobs.enqueue_due_schedules(db, self._next_runs, now)
+            jobs.reap_expired(db, now)
+            with self._lock:
+                free = self.concurrency - len(self._in_flight)
+            if free <= 0:
+                return 0
+            claimed = jobs.claim(db, self.worker_id, free)
+        finally:
+            db.close()
+        for job_id, name, payload, attempt in claimed:
+            with self._lock:
+                self._in_flight.add(job_id)
+            pool.submit(self._execute, job_id, name, payload, attempt)
+        return len(claimed)
+
+    def _execute(self, job_id: int, name: str, payload: dict, attempt: int) -> None:
+        error = None
+        try:
+            spec = jobs.REGISTRY.get(name)
+            if spec is None:
+                raise LookupError(f"No handler registered for job {name!r}")
+            spec.fn(**payload)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            db = SessionLocal()
+            try:
+                jobs.finish(db, job_id, self.worker_id, attempt, error)
+            except Exception as e:
+                logger.error(f"Could not record result of job {job_id}: {e}")
+            finally:
+                db.close()
+                with self._lock:
+                    self._in_flight.discard(job_id)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    worker = Worker(settings.job_worker_concurrency)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Offline end-to-end latency benchmark for DeepSeekAgent.chat.
+
+Replays scripted conversations from bench/fixtures against a seeded
+in-memory SQLite database and reports per-turn wall time split into LLM
+wait, tool DB time and persistence, plus COMMITs per turn and how many of
+them carried writes (on Postgres each of those is a WAL fsync). No network
+access is needed.
+
+    cd backend && python -m bench.agent_latency --repeat 20
+    cd backend && python -m bench.agent_latency --simulate-latency
+
+Fixtures use the RecordingTransport format, so real exchanges captured with
+AI_TRANSPORT_MODE=record can be dropped in alongside the scripted ones.
+"""
+import argparse
+import asyncio
+import datetime as dt
+import os
+import random
+import statistics
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DEEPSEEK_API_KEY", "")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.models import *  # noqa: E402, F401, F403
+from app.models.finance import Expense, Income, Payroll  # noqa: E402
+from app.models.schedule import Schedule  # noqa: E402
+from app.models.task import PriorityEnum, StatusEnum, Task  # noqa: E402
+from app.models.user import RoleEnum, User  # noqa: E402
+from app.services.ai_agent import DeepSeekAgent  # noqa: E402
+from app.services.ai_replay import ReplayTransport  # noqa: E402
+from app.services.events import bus  # noqa: E402
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PHASES = ("llm_ms", "tools_ms", "persist_ms", "total_ms")
+COUNTERS = ("commits", "write_commits")
+
+SCENARIOS = [
+    {
+        "name": "owner_expenses",
+        "user_email": "owner@bench.local",
+        "messages": [
+            "Сколько мы потратили в этом году?",
+            "Покажи последние расходы на еду",
+        ],
+    },
+    {
+        "name": "owner_tasks",
+        "user_email": "owner@bench.local",
+        "messages": [
+            "Какие задачи и смены у Анны в октябре? Поставь ей задачу забрать химчистку на 20-е",
+        ],
+    },
+    {
+        "name": "staff_schedule",
+        "user_email": "staff1@bench.local",
+        "messages": [
+            "Какие у меня смены на этой неделе?",
+            "Можно поменяться сменой на пятницу?",
+        ],
+    },
+]
+
+
+class CommitCounter:
+    """Counts COMMITs sent to the database, split by whether the transaction wrote.
+
+    Listens on the engine rather than the session so savepoint releases are
+    not mistaken for commits.
+    """
+
+    def __init__(self, engine):
+        self.commits = 0
+        self.write_commits = 0
+        self._dirty = set()
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "commit", self._commit)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in ("INSERT", "UPDATE", "DELETE"):
+            self._dirty.add(id(conn))
+
+    def _commit(self, conn):
+        self.commits += 1
+        if id(conn) in self._dirty:
+            self.write_commits += 1
+            self._dirty.discard(id(conn))
+
+    def take(self):
+        counts = {"commits": self.commits, "write_commits": self.write_commits}
+        self.commits = self.write_commits = 0
+        return counts
+
+
+def seed(session_factory, rng: random.Random) -> None:
+    db = session_factory()
+    owner = User(email="owner@bench.local", password_hash="-", full_name="Owner", role=RoleEnum.owner)
+    db.add(owner)
+    staff = [
+        User(email=f"staff{i}@bench.local", password_hash="-", full_name=f"Staff {i}", role=RoleEnum.staff)
+        for i in range(1, 6)
+    ]
+    db.add_all(staff)
+    db.flush()
+
+    today = dt.date.today()
+    categories = ["household", "transport", "food", "entertainment", "other"]
+    for i in range(1000):
+        db.add(Task(
+            assigned_to=rng.choice(staff).id,
+            title=f"Задача {i}",
+            description="Описание задачи " * 4,
+            priority=rng.choice(list(PriorityEnum)),
+            status=rng.choice(list(StatusEnum)),
+            due_date=today + dt.timedelta(days=rng.randint(-60, 60)),
+        ))
+    for i in range(365):
+        day = today - dt.timedelta(days=i)
+        for member in staff:
+            db.add(Schedule(
+                user_id=member.id, date=day,
+                shift_start=dt.time(9), shift_end=dt.time(18), location="Дом",
+            ))
+        db.add(Expense(
+            category=rng.choice(categories), description=f"Покупка {i}",
+            amount=rng.randint(100, 20000), date=day, created_by=owner.id,
+        ))
+    for month in range(12):
+        for member in staff:
+            start = (today.replace(day=1) - dt.timedelta(days=30 * month)).replace(day=1)
+            db.add(Payroll(
+                user_id=member.id, period_start=start, period_end=start + dt.timedelta(days=27),
+                base_salary=80000, bonuses=0, deductions=0, net_amount=80000,
+            ))
+        db.add(Income(
+            source="Зарплата", description="Ежемесячный доход", amount=500000,
+            date=today - dt.timedelta(days=30 * month), category="salary",
+        ))
+    db.commit()
+    db.close()
+
+
+async def run_scenario(scenario, session_factory, counter: CommitCounter, simulate_latency: bool):
+    agent = DeepSeekAgent(transport=ReplayTransport(FIXTURES / f"{scenario['name']}.jsonl", simulate_latency))
+    conversation_id = None
+    turns = []
+    for message in scenario["messages"]:
+        counter.take()
+        db = session_factory()
+        try:
+            user = db.query(User).filter(User.email == scenario["user_email"]).one()
+            result = await agent.chat(user=user, message=message, conversation_id=conversation_id, db=db)
+        finally:
+            db.close()
+        conversation_id = result["conversation_id"]
+        turns.append({**result["timings"], **counter.take()})
+    return turns
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def main(repeat: int, simulate_latency: bool) -> None:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed(session_factory, random.Random(42))
+    counter = CommitCounter(engine)
+    # Tools record domain events; with no handlers loaded the bus only counts them
+    bus.start()
+
+    samples = {s["name"]: [] for s in SCENARIOS}
+    for _ in range(repeat):
+        for scenario in SCENARIOS:
+            samples[scenario["name"]].extend(await run_scenario(scenario, session_factory, counter, simulate_latency))
+    await bus.stop()
+
+    header = (
+        f"{'scenario':<16}{'turns':>6}"
+        + "".join(f"{p + ' p50':>15}{p + ' p95':>15}" for p in PHASES)
+        + "".join(f"{c + '/turn':>20}" for c in COUNTERS)
+    )
+    print(header)
+    print("-" * len(header))
+    for name, turns in samples.items():
+        row = f"{name:<16}{len(turns):>6}"
+        for phase in PHASES:
+            values = [t[phase] for t in turns]
+            row += f"{statistics.median(values):>15.1f}{percentile(values, 95):>15.1f}"
+        for counter_name in COUNTERS:
+            row += f"{statistics.mean(t[counter_name] for t in turns):>20.2f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10, help="Times to replay each scenario")
+    parser.add_argument("--simulate-latency", action="store_true", help="Sleep for the recorded LLM latency")
+    args = parser.parse_args()
+    asyncio.run(main(args.repeat, args.simulate_latency))
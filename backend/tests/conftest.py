@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings are read at import, so point the app at a throwaway database first
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+
+import app.models  # noqa: E402,F401  registers every table on Base.metadata
+from app.database import Base, SessionLocal, engine  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
@@ -0,0 +1,65 @@
+import datetime as dt
+
+import pytest
+
+from app.services.ai_intents import match_intent, parse_period
+
+TODAY = dt.date(2026, 10, 14)  # a Wednesday
+
+
+@pytest.mark.parametrize(
+    "message, intent",
+    [
+        ("Какие у меня задачи?", "tasks"),
+        ("покажи задачи на завтра", "tasks"),
+        ("Что мне нужно сделать сегодня?", "tasks"),
+        ("Когда следующая смена?", "next_shift"),
+        ("когда я работаю", "next_shift"),
+        ("Мое расписание на следующую неделю", "schedule"),
+        ("покажи график, пожалуйста", "schedule"),
+        ("Какая у меня зарплата?", "payroll"),
+        ("последняя выплата", "payroll"),
+    ],
+)
+def test_listing_questions_match(message, intent):
+    matched = match_intent(message, TODAY)
+    assert matched is not None
+    assert matched[0] == intent
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "почему задача #5 просрочена?",
+        "Отметь задачу 3 выполненной",
+        "создай задачу купить молоко",
+        "перенеси мою смену на пятницу",
+        "почему зарплата меньше, чем в прошлом месяце?",
+        "кто работает в смене со мной завтра?",
+        "сколько мы потратили на продукты",
+        "",
+        "   ",
+    ],
+)
+def test_other_messages_go_to_the_model(message):
+    assert match_intent(message, TODAY) is None
+
+
+def test_task_period():
+    assert match_intent("задачи на завтра", TODAY) == ("tasks", {"period": (TODAY + dt.timedelta(days=1),) * 2})
+    assert match_intent("мои задачи", TODAY) == ("tasks", {"period": None})
+
+
+def test_schedule_defaults_to_the_coming_week():
+    intent, params = match_intent("какое расписание", TODAY)
+    assert intent == "schedule"
+    assert params["period"] == (TODAY, TODAY + dt.timedelta(days=6))
+
+
+def test_parse_period():
+    assert parse_period("на следующей неделе", TODAY) == (dt.date(2026, 10, 19), dt.date(2026, 10, 25))
+    assert parse_period("на этой неделе", TODAY) == (TODAY, dt.date(2026, 10, 18))
+    assert parse_period("в этом месяце", TODAY) == (TODAY, dt.date(2026, 10, 31))
+    assert parse_period("на 03.11", TODAY) == (dt.date(2026, 11, 3),) * 2
+    assert parse_period("на 31.02", TODAY) is None
+    assert parse_period("вообще", TODAY) is None
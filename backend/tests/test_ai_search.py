@@ -0,0 +1,102 @@
+import datetime as dt
+
+import pytest
+
+from app.models.finance import Expense, ExpenseCategory
+from app.models.note import Note
+from app.models.user import RoleEnum, User
+from app.services import ai_search
+from app.services.ai_search import SHARED, HashingEmbedder, VectorIndex
+
+
+@pytest.fixture
+def index():
+    index = VectorIndex(HashingEmbedder(512))
+    index.upsert([
+        ("note", 1, "Пароль от wifi на даче", 7),
+        ("note", 2, "Рецепт борща от бабушки", 8),
+        ("task", 1, "Починить забор на даче", SHARED),
+        ("expense", 1, "Продукты молоко и хлеб", SHARED),
+    ])
+    return index
+
+
+def test_search_ranks_matches_first(index):
+    hits = index.search("забор", k=3, owner=7)
+    assert hits[0][:2] == ("task", 1)
+    assert all(score > 0 for _, _, score in hits)
+
+
+def test_private_rows_need_their_owner(index):
+    assert ("note", 1) in [hit[:2] for hit in index.search("пароль wifi", k=5, owner=7)]
+    assert ("note", 1) not in [hit[:2] for hit in index.search("пароль wifi", k=5, owner=8)]
+    assert ("note", 1) not in [hit[:2] for hit in index.search("пароль wifi", k=5)]
+
+
+def test_kinds_filter(index):
+    hits = index.search("на даче", k=5, owner=7, kinds=["task"])
+    assert [hit[:2] for hit in hits] == [("task", 1)]
+
+
+def test_no_match_returns_nothing(index):
+    assert index.search("космодром", k=5, owner=7) == []
+
+
+def test_upsert_replaces_the_text(index):
+    index.upsert([("task", 1, "Купить краску", SHARED)])
+    assert len(index) == 4
+    assert index.search("забор", k=5, owner=7) == []
+    assert index.search("краску", k=1)[0][:2] == ("task", 1)
+
+
+def test_remove_keeps_the_other_rows(index):
+    index.remove([("note", 1), ("note", 99)])
+    assert len(index) == 3
+    assert index.search("пароль wifi", k=5, owner=7) == []
+    # The last row moved into the freed slot and is still found under its key
+    assert index.search("молоко", k=1)[0][:2] == ("expense", 1)
+    assert index.search("борщ рецепт", k=1, owner=8)[0][:2] == ("note", 2)
+
+
+def test_grows_past_the_initial_capacity():
+    index = VectorIndex(HashingEmbedder(512))
+    index.upsert([("task", i, f"задача номер {i} слово{i}", SHARED) for i in range(200)])
+    assert len(index) == 200
+    assert index.search("слово150", k=1)[0][:2] == ("task", 150)
+
+
+def test_rolled_back_savepoint_drops_only_its_changes(db):
+    owner = User(full_name="Анна", email="anna@example.com", role=RoleEnum.owner, password_hash="x")
+    db.add(owner)
+    db.commit()
+    ai_search.index.build(db)
+    try:
+        with db.begin_nested():
+            db.add(Note(user_id=owner.id, title="Покрасить забор", content=""))
+        savepoint = db.begin_nested()
+        db.add(Note(user_id=owner.id, title="Ключи от гаража", content=""))
+        db.flush()
+        savepoint.rollback()
+        # Released savepoints wait for the outer commit
+        assert len(ai_search.index) == 0
+
+        db.commit()
+        assert len(ai_search.index) == 1
+        assert ai_search.index.search("забор", k=5, owner=owner.id)[0][:2] == ("note", 1)
+        assert ai_search.index.search("ключи гаража", k=5, owner=owner.id) == []
+    finally:
+        ai_search.index.reset()
+
+
+def test_expenses_are_indexed_by_category_name(db):
+    owner = User(full_name="Анна", email="anna@example.com", role=RoleEnum.owner, password_hash="x")
+    db.add(owner)
+    db.commit()
+    ai_search.index.build(db)
+    try:
+        db.add(Expense(category=ExpenseCategory.transport, description="Такси", amount=300, date=dt.date(2026, 10, 1), created_by=owner.id))
+        db.commit()
+        assert [hit[:2] for hit in ai_search.index.search("transport", k=5)] == [("expense", 1)]
+        assert ai_search.index.search("ExpenseCategory", k=5) == []
+    finally:
+        ai_search.index.reset()
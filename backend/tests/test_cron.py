@@ -0,0 +1,59 @@
+import datetime as dt
+
+import pytest
+
+from app.services.jobs import Cron
+
+
+def test_parses_fields():
+    cron = Cron("*/15 8-18/2 1,15 * 1-5")
+    assert cron.minutes == {0, 15, 30, 45}
+    assert cron.hours == {8, 10, 12, 14, 16, 18}
+    assert cron.days == {1, 15}
+    assert cron.months == set(range(1, 13))
+    assert cron.weekdays == {1, 2, 3, 4, 5}
+
+
+def test_sunday_is_0_or_7():
+    assert Cron("0 0 * * 7").weekdays == {0}
+    assert Cron("0 0 * * 0,7").weekdays == {0}
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["* * * *", "* * * * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *", "5-1 * * * *", "x * * * *"],
+)
+def test_rejects_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        Cron(expression)
+
+
+@pytest.mark.parametrize(
+    "expression, after, expected",
+    [
+        # Strictly after, with seconds dropped
+        ("* * * * *", dt.datetime(2026, 3, 1, 10, 0, 30), dt.datetime(2026, 3, 1, 10, 1)),
+        ("*/15 * * * *", dt.datetime(2026, 3, 1, 10, 0), dt.datetime(2026, 3, 1, 10, 15)),
+        ("*/15 * * * *", dt.datetime(2026, 3, 1, 10, 50), dt.datetime(2026, 3, 1, 11, 0)),
+        ("30 3 * * *", dt.datetime(2026, 3, 1, 3, 30), dt.datetime(2026, 3, 2, 3, 30)),
+        # Rolls over the end of a month and a year
+        ("0 0 1 * *", dt.datetime(2026, 1, 31, 12, 0), dt.datetime(2026, 2, 1, 0, 0)),
+        ("0 9 * 1 *", dt.datetime(2026, 12, 31, 23, 59), dt.datetime(2027, 1, 1, 9, 0)),
+        # 2026-03-06 is a Friday; 1-5 is Monday to Friday
+        ("0 8 * * 1-5", dt.datetime(2026, 3, 6, 9, 0), dt.datetime(2026, 3, 9, 8, 0)),
+        ("0 8 * * 0", dt.datetime(2026, 3, 6, 9, 0), dt.datetime(2026, 3, 8, 8, 0)),
+        # Both day fields restricted: either one fires (the 10th, or a Monday)
+        ("0 0 10 * 1", dt.datetime(2026, 3, 6, 0, 0), dt.datetime(2026, 3, 9, 0, 0)),
+        ("0 0 10 * 1", dt.datetime(2026, 3, 9, 0, 0), dt.datetime(2026, 3, 10, 0, 0)),
+        # Only months that have the day
+        ("0 0 31 * *", dt.datetime(2026, 4, 1, 0, 0), dt.datetime(2026, 5, 31, 0, 0)),
+        ("0 0 29 2 *", dt.datetime(2026, 1, 1, 0, 0), dt.datetime(2028, 2, 29, 0, 0)),
+    ],
+)
+def test_next_after(expression, after, expected):
+    assert Cron(expression).next_after(after) == expected
+
+
+def test_never_firing_expression():
+    with pytest.raises(ValueError):
+        Cron("0 0 31 2 *").next_after(dt.datetime(2026, 1, 1))
@@ -0,0 +1,126 @@
+import datetime as dt
+
+import pytest
+
+from app.config import settings
+from app.models.notification import EmailOutbox, EmailStatus
+from app.services import email_outbox
+from app.services.email import MemorySender, PermanentEmailError, is_permanent
+
+
+class RejectingSender(MemorySender):
+    """Rejects any batch with an address in ``bad`` as the provider would a 422."""
+
+    def __init__(self, *bad: str):
+        super().__init__()
+        self.bad = set(bad)
+        self.batches = 0
+
+    def send_batch(self, messages):
+        self.batches += 1
+        if any(m["to"] in self.bad for m in messages):
+            raise PermanentEmailError("422 invalid `to` field")
+        return super().send_batch(messages)
+
+
+class DownSender:
+    def __init__(self):
+        self.calls = 0
+
+    def send_batch(self, messages):
+        self.calls += 1
+        raise ConnectionError("provider unreachable")
+
+
+def _queue(db, *addresses):
+    db.add_all([EmailOutbox(to_email=a, subject="Уведомление", html_body="<p>hi</p>") for a in addresses])
+    db.commit()
+
+
+def _make_due(db):
+    db.query(EmailOutbox).update({"next_attempt_at": dt.datetime.utcnow() - dt.timedelta(seconds=1)})
+    db.commit()
+
+
+def _statuses(db):
+    return {m.to_email: m.status for m in db.query(EmailOutbox)}
+
+
+def test_drain_sends_everything_due(db):
+    _queue(db, "a@example.com", "b@example.com")
+    sender = MemorySender()
+
+    assert email_outbox.drain(db, sender) == {"sent": 2, "retry": 0, "dead": 0}
+    assert sorted(m["to"] for m in sender.sent) == ["a@example.com", "b@example.com"]
+    rows = db.query(EmailOutbox).all()
+    assert all(m.status == EmailStatus.sent and m.provider_id and m.attempts == 1 for m in rows)
+    assert email_outbox.drain(db, sender) == {"sent": 0, "retry": 0, "dead": 0}
+
+
+def test_rejected_message_does_not_poison_the_batch(db):
+    _queue(db, "a@example.com", "broken", "b@example.com")
+    sender = RejectingSender("broken")
+
+    assert email_outbox.drain(db, sender) == {"sent": 2, "retry": 0, "dead": 1}
+    assert _statuses(db) == {
+        "a@example.com": EmailStatus.sent,
+        "broken": EmailStatus.dead,
+        "b@example.com": EmailStatus.sent,
+    }
+    # The batch, then each message on its own
+    assert sender.batches == 4
+    assert db.query(EmailOutbox).filter_by(to_email="broken").one().last_error.startswith("422")
+
+
+def test_transient_failures_retry_then_dead_letter(db, monkeypatch):
+    monkeypatch.setattr(settings, "email_max_attempts", 3)
+    _queue(db, "a@example.com")
+    sender = DownSender()
+
+    for _ in range(2):
+        assert email_outbox.drain(db, sender) == {"sent": 0, "retry": 1, "dead": 0}
+        message = db.query(EmailOutbox).one()
+        assert message.status == EmailStatus.pending
+        assert message.next_attempt_at > dt.datetime.utcnow()
+        # Not due again until the backoff runs out
+        assert email_outbox.drain(db, sender) == {"sent": 0, "retry": 0, "dead": 0}
+        _make_due(db)
+
+    assert email_outbox.drain(db, sender) == {"sent": 0, "retry": 0, "dead": 1}
+    message = db.query(EmailOutbox).one()
+    assert (message.status, message.attempts) == (EmailStatus.dead, 3)
+    assert message.last_error == "provider unreachable"
+    assert sender.calls == 3
+
+
+def test_retry_succeeds_once_the_provider_is_back(db):
+    _queue(db, "a@example.com")
+    email_outbox.drain(db, DownSender())
+    _make_due(db)
+
+    assert email_outbox.drain(db, MemorySender()) == {"sent": 1, "retry": 0, "dead": 0}
+    message = db.query(EmailOutbox).one()
+    assert (message.status, message.attempts, message.last_error) == (EmailStatus.sent, 2, None)
+
+
+def test_claimed_rows_are_leased(db):
+    _queue(db, "a@example.com")
+    now = dt.datetime.utcnow()
+
+    first = email_outbox.claim(db, now, 10)
+    assert len(first) == 1
+    assert email_outbox.claim(db, now, 10) == []
+
+    # Once the lease runs out another run takes the message, and the first
+    # run's late result is ignored
+    later = now + dt.timedelta(seconds=settings.email_claim_seconds + 1)
+    second = email_outbox.claim(db, later, 10)
+    assert [c.attempt for c in second] == [2]
+    stale = email_outbox.record(db, first, [email_outbox.Outcome(provider_id="late")], later)
+    assert stale == {"sent": 0, "retry": 0, "dead": 0}
+    assert db.query(EmailOutbox).one().status == EmailStatus.pending
+
+
+@pytest.mark.parametrize("code, permanent", [(400, True), (422, True), (401, False), (429, False), (503, False), (None, False)])
+def test_is_permanent(code, permanent):
+    assert is_permanent(code) is permanent
@@ -0,0 +1,162 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.llm_scheduler import CircuitOpenError, LLMScheduler
+
+
+def _status_error(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://llm.test/chat/completions")
+    return httpx.HTTPStatusError(f"{code}", request=request, response=httpx.Response(code, request=request))
+
+
+def _scheduler(**overrides) -> LLMScheduler:
+    options = dict(
+        max_concurrency=2,
+        max_retries=3,
+        backoff_base=0.0,
+        backoff_max=0.0,
+        failure_threshold=3,
+        reset_timeout=30.0,
+    )
+    options.update(overrides)
+    return LLMScheduler(**options)
+
+
+class Provider:
+    """Fails with the given errors in turn, then answers "ok"."""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried():
+    scheduler = _scheduler()
+    provider = Provider(_status_error(429), httpx.ConnectError("reset"))
+
+    assert await scheduler.run("u1", provider) == "ok"
+    assert provider.calls == 3
+    snapshot = scheduler.snapshot()
+    assert snapshot["retries"] == 2
+    assert snapshot["consecutive_failures"] == 0
+    assert snapshot["circuit"] == "closed"
+    assert snapshot["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    scheduler = _scheduler()
+    provider = Provider(_status_error(400))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await scheduler.run("u1", provider)
+    assert provider.calls == 1
+    assert scheduler.snapshot()["consecutive_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    scheduler = _scheduler(max_retries=2, failure_threshold=10)
+    provider = Provider(*[_status_error(503)] * 5)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await scheduler.run("u1", provider)
+    assert provider.calls == 3
+    assert scheduler.circuit_state == "closed"
+    assert scheduler.snapshot()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_fails_fast():
+    scheduler = _scheduler(max_retries=10, failure_threshold=2)
+    provider = Provider(*[_status_error(502)] * 5)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await scheduler.run("u1", provider)
+    # Retrying stops as soon as the circuit opens
+    assert provider.calls == 2
+    assert scheduler.circuit_state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        await scheduler.run("u2", provider)
+    assert provider.calls == 2
+    assert scheduler.snapshot()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_closes_on_success():
+    scheduler = _scheduler(max_retries=0, failure_threshold=1)
+    with pytest.raises(httpx.HTTPStatusError):
+        await scheduler.run("u1", Provider(_status_error(500)))
+    assert scheduler.circuit_state == "open"
+
+    scheduler._opened_at -= scheduler.reset_timeout
+    assert scheduler.circuit_state == "half_open"
+    assert await scheduler.run("u1", Provider()) == "ok"
+    assert scheduler.circuit_state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_reopens_on_failure():
+    scheduler = _scheduler(max_retries=3, failure_threshold=1)
+    with pytest.raises(httpx.HTTPStatusError):
+        await scheduler.run("u1", Provider(_status_error(500)))
+
+    scheduler._opened_at -= scheduler.reset_timeout
+    provider = Provider(_status_error(500), _status_error(500))
+    with pytest.raises(httpx.HTTPStatusError):
+        await scheduler.run("u1", provider)
+    assert provider.calls == 1
+    assert scheduler.circuit_state == "open"
+
+
+@pytest.mark.asyncio
+async def test_half_open_lets_a_single_trial_through():
+    scheduler = _scheduler(max_retries=0, failure_threshold=1)
+    with pytest.raises(httpx.HTTPStatusError):
+        await scheduler.run("u1", Provider(_status_error(500)))
+    scheduler._opened_at -= scheduler.reset_timeout
+
+    answer = asyncio.Event()
+
+    async def slow_provider() -> str:
+        await answer.wait()
+        return "ok"
+
+    trial = asyncio.create_task(scheduler.run("u1", slow_provider))
+    await asyncio.sleep(0)
+    assert scheduler.snapshot()["probing"]
+
+    other = Provider()
+    with pytest.raises(CircuitOpenError):
+        await scheduler.run("u2", other)
+    assert other.calls == 0
+
+    answer.set()
+    assert await trial == "ok"
+    assert scheduler.circuit_state == "closed"
+    assert not scheduler.snapshot()["probing"]
+    assert await scheduler.run("u2", other) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_trial_ending_in_a_client_error_frees_the_probe():
+    scheduler = _scheduler(max_retries=0, failure_threshold=1)
+    with pytest.raises(httpx.HTTPStatusError):
+        await scheduler.run("u1", Provider(_status_error(500)))
+    scheduler._opened_at -= scheduler.reset_timeout
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await scheduler.run("u1", Provider(_status_error(400)))
+    assert scheduler.circuit_state == "half_open"
+    assert await scheduler.run("u2", Provider()) == "ok"
+    assert scheduler.circuit_state == "closed"
@@ -0,0 +1,92 @@
+import datetime as dt
+
+import pytest
+
+from app.config import settings
+from app.models.notification import Notification
+from app.models.task import StatusEnum, Task, TaskReminder
+from app.models.user import RoleEnum, User
+from app.services.task_reminders import sweep
+
+TODAY = dt.date(2026, 10, 14)
+
+
+@pytest.fixture
+def staff(db):
+    users = [
+        User(full_name="Анна", email="anna@example.com", role=RoleEnum.staff, password_hash="x"),
+        User(full_name="Борис", email="boris@example.com", role=RoleEnum.staff, password_hash="x"),
+    ]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def _task(db, user, title, days, status=StatusEnum.pending):
+    task = Task(assigned_to=user.id, title=title, due_date=TODAY + dt.timedelta(days=days), status=status)
+    db.add(task)
+    db.commit()
+    return task
+
+
+def _reminders(db):
+    return {t.title: t.reminder for t in db.query(Task)}
+
+
+def test_each_stage_is_sent_once(db, staff):
+    anna, boris = staff
+    _task(db, anna, "Полить цветы", -2)
+    _task(db, anna, "Вынести мусор", 0)
+    _task(db, boris, "Купить лампу", 1)
+    _task(db, boris, "Покрасить забор", 5)
+    _task(db, boris, "Убрать гараж", -1, status=StatusEnum.done)
+
+    assert sweep(db, TODAY) == {"overdue": 1, "due_soon": 2, "notified": 2}
+    assert _reminders(db) == {
+        "Полить цветы": TaskReminder.overdue,
+        "Вынести мусор": TaskReminder.due_soon,
+        "Купить лампу": TaskReminder.due_soon,
+        "Покрасить забор": None,
+        "Убрать гараж": None,
+    }
+    messages = {n.user_id: n.message for n in db.query(Notification)}
+    assert messages[anna.id].startswith("Просрочено (1):\n• Полить цветы")
+    assert "Скоро срок (1):\n• Вынести мусор — срок 14.10.2026" in messages[anna.id]
+    assert "Полить цветы" not in messages[boris.id]
+
+    # Nothing new the same day
+    assert sweep(db, TODAY) == {"overdue": 0, "due_soon": 0, "notified": 0}
+
+    # Once due-soon tasks are overdue they are announced again, and only then
+    assert sweep(db, TODAY + dt.timedelta(days=2)) == {"overdue": 2, "due_soon": 0, "notified": 2}
+    assert sweep(db, TODAY + dt.timedelta(days=2)) == {"overdue": 0, "due_soon": 0, "notified": 0}
+
+
+def test_new_due_date_earns_new_reminders(db, staff):
+    task = _task(db, staff[0], "Полить цветы", -1)
+    sweep(db, TODAY)
+
+    # As the tasks router does when the deadline moves
+    task.due_date = TODAY + dt.timedelta(days=1)
+    task.reminder = None
+    db.commit()
+    assert sweep(db, TODAY) == {"overdue": 0, "due_soon": 1, "notified": 1}
+
+
+def test_inactive_assignee_is_marked_but_not_notified(db, staff):
+    anna, _ = staff
+    anna.is_active = False
+    _task(db, anna, "Полить цветы", -1)
+
+    assert sweep(db, TODAY) == {"overdue": 1, "due_soon": 0, "notified": 0}
+    assert _reminders(db) == {"Полить цветы": TaskReminder.overdue}
+    assert db.query(Notification).count() == 0
+
+
+def test_sweeps_in_batches(db, staff, monkeypatch):
+    monkeypatch.setattr(settings, "task_sweep_batch", 2)
+    for i in range(5):
+        _task(db, staff[i % 2], f"Задача {i}", -1)
+
+    assert sweep(db, TODAY) == {"overdue": 5, "due_soon": 0, "notified": 5}
+    assert set(_reminders(db).values()) == {TaskReminder.overdue}
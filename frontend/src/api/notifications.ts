@@ -6,6 +6,21 @@ export async function getNotifications(params?: { type?: string }): Promise<Noti
   return response.data;
 }
 
+export async function getUnreadCount(): Promise<number> {
+  const response = await client.get<{ count: number }>("/notifications/unread-count");
+  return response.data.count;
+}
+
+export async function getPreferences(): Promise<{ email_digest: boolean }> {
+  const response = await client.get<{ email_digest: boolean }>("/notifications/preferences");
+  return response.data;
+}
+
+export async function updatePreferences(data: { email_digest: boolean }): Promise<{ email_digest: boolean }> {
+  const response = await client.put<{ email_digest: boolean }>("/notifications/preferences", data);
+  return response.data;
+}
+
 export async function markAsRead(id: number): Promise<void> {
   await client.put(`/notifications/${id}/read`);
 }
@@ -15,15 +15,17 @@ export default function ChatMessage({ role, content, timestamp, actions }: ChatM
   return (
     <div className={`flex ${isUser ? "justify-end" : "justify-start"}`}>
       <div className={`max-w-[85%] space-y-1.5`}>
-        <div
-          className={`px-3 py-2 rounded-xl text-sm whitespace-pre-wrap ${
-            isUser
-              ? "bg-blue-600 text-white rounded-br-sm"
-              : "bg-white/10 text-purple-200 rounded-bl-sm"
-          }`}
-        >
-          {content}
-        </div>
+        {content && (
+          <div
+            className={`px-3 py-2 rounded-xl text-sm whitespace-pre-wrap ${
+              isUser
+                ? "bg-blue-600 text-white rounded-br-sm"
+                : "bg-white/10 text-purple-200 rounded-bl-sm"
+            }`}
+          >
+            {content}
+          </div>
+        )}
 
         {actions && actions.length > 0 && <ActionCard actions={actions} />}
 
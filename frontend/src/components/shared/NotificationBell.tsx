@@ -1,22 +1,27 @@
 import { useState, useRef, useEffect } from "react";
-import { useQuery } from "@tanstack/react-query";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
 import { Bell } from "lucide-react";
 import { Link } from "react-router-dom";
 import { formatDistanceToNow, parseISO } from "date-fns";
 import { ru } from "date-fns/locale";
-import { getNotifications, markAsRead } from "../../api/notifications";
+import { getNotifications, getUnreadCount, markAsRead } from "../../api/notifications";
+import { useNotificationSocket } from "../../hooks/useNotificationSocket";
 
 export default function NotificationBell() {
   const [open, setOpen] = useState(false);
   const ref = useRef<HTMLDivElement>(null);
+  const queryClient = useQueryClient();
 
   const { data: notifications = [] } = useQuery({
     queryKey: ["notifications"],
     queryFn: () => getNotifications(),
-    refetchInterval: 30000,
   });
+  const { data: unreadCount = 0 } = useQuery({
+    queryKey: ["notifications", "unread-count"],
+    queryFn: getUnreadCount,
+  });
+  useNotificationSocket();
 
-  const unreadCount = notifications.filter((n) => !n.is_read).length;
   const recent = notifications.slice(0, 5);
 
   useEffect(() => {
@@ -59,7 +64,11 @@ export default function NotificationBell() {
               recent.map((n) => (
                 <button
                   key={n.id}
-                  onClick={() => { if (!n.is_read) markAsRead(n.id); }}
+                  onClick={async () => {
+                    if (n.is_read) return;
+                    await markAsRead(n.id);
+                    queryClient.invalidateQueries({ queryKey: ["notifications"] });
+                  }}
                   className={`w-full text-left px-4 py-3 hover:bg-white/[0.05] border-b border-white/[0.05] last:border-0 transition-colors ${
                     !n.is_read ? "bg-blue-500/[0.05]" : ""
                   }`}
@@ -0,0 +1,76 @@
+import { useEffect, useRef } from "react";
+import { useQueryClient } from "@tanstack/react-query";
+import type { Notification } from "../types";
+
+// Keeps the ["notifications"] cache current from /ws/notifications instead of polling
+export function useNotificationSocket() {
+  const queryClient = useQueryClient();
+  const wsRef = useRef<WebSocket | null>(null);
+  const reconnectTimeoutRef = useRef<ReturnType<typeof setTimeout>>(undefined);
+  const retriesRef = useRef(0);
+  const lastIdRef = useRef(0);
+
+  useEffect(() => {
+    let closed = false;
+
+    function connect() {
+      const tokens = localStorage.getItem("tokens");
+      if (!tokens) return;
+      const { access_token } = JSON.parse(tokens);
+
+      const cached = queryClient.getQueryData<Notification[]>(["notifications"]) || [];
+      for (const n of cached) lastIdRef.current = Math.max(lastIdRef.current, n.id);
+
+      const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
+      const host = window.location.host;
+      const ws = new WebSocket(
+        `${protocol}//${host}/ws/notifications?token=${access_token}&last_id=${lastIdRef.current}`
+      );
+
+      ws.onopen = () => {
+        retriesRef.current = 0;
+      };
+
+      ws.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+
+        if (data.type === "ping") {
+          ws.send(JSON.stringify({ type: "pong" }));
+          return;
+        }
+
+        if (data.type === "notification") {
+          const notification: Notification = data.notification;
+          lastIdRef.current = Math.max(lastIdRef.current, notification.id);
+          queryClient.setQueryData<Notification[]>(["notifications"], (old) => {
+            if (!old) return old;
+            if (old.some((n) => n.id === notification.id)) return old;
+            return [notification, ...old];
+          });
+          queryClient.invalidateQueries({ queryKey: ["notifications", "unread-count"] });
+        }
+      };
+
+      ws.onclose = () => {
+        wsRef.current = null;
+        if (closed) return;
+        const delay = Math.min(1000 * 2 ** retriesRef.current, 30000);
+        retriesRef.current++;
+        reconnectTimeoutRef.current = setTimeout(connect, delay);
+      };
+
+      ws.onerror = () => {
+        ws.close();
+      };
+
+      wsRef.current = ws;
+    }
+
+    connect();
+    return () => {
+      closed = true;
+      if (reconnectTimeoutRef.current) clearTimeout(reconnectTimeoutRef.current);
+      wsRef.current?.close();
+    };
+  }, [queryClient]);
+}
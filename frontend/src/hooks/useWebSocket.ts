@@ -6,7 +6,7 @@ export function useWebSocket() {
   const reconnectTimeoutRef = useRef<ReturnType<typeof setTimeout>>(undefined);
   const retriesRef = useRef(0);
 
-  const { addMessage, setTyping } = useChatStore();
+  const { addMessage, addStreamedAction, setTyping } = useChatStore();
 
   const connect = useCallback(() => {
     const tokens = localStorage.getItem("tokens");
@@ -25,11 +25,21 @@ export function useWebSocket() {
       try {
         const data = JSON.parse(event.data);
 
-        if (data.type === "typing") {
+        if (data.type === "ping") {
+          ws.send(JSON.stringify({ type: "pong" }));
+          return;
+        }
+
+        if (data.type === "typing" || data.type === "tool_started") {
           setTyping(true);
           return;
         }
 
+        if (data.type === "action") {
+          addStreamedAction({ tool: data.tool, args: data.args, result: data.result });
+          return;
+        }
+
         if (data.type === "message") {
           setTyping(false);
           addMessage({
@@ -79,7 +89,7 @@ export function useWebSocket() {
     };
 
     wsRef.current = ws;
-  }, [addMessage, setTyping]);
+  }, [addMessage, addStreamedAction, setTyping]);
 
   useEffect(() => {
     connect();
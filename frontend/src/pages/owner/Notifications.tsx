@@ -4,7 +4,7 @@ import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { formatDistanceToNow, parseISO } from "date-fns";
 import { ru } from "date-fns/locale";
 import { Calendar, CheckSquare, CreditCard, Settings } from "lucide-react";
-import { getNotifications, markAsRead, markAllAsRead } from "../../api/notifications";
+import { getNotifications, getPreferences, markAsRead, markAllAsRead, updatePreferences } from "../../api/notifications";
 import type { NotificationType } from "../../types";
 import Button from "../../components/ui/Button";
 import LoadingSpinner from "../../components/shared/LoadingSpinner";
@@ -44,6 +44,16 @@ export default function Notifications() {
     onSuccess: () => queryClient.invalidateQueries({ queryKey: ["notifications"] }),
   });
 
+  const { data: preferences } = useQuery({
+    queryKey: ["notification-preferences"],
+    queryFn: getPreferences,
+  });
+
+  const preferencesMut = useMutation({
+    mutationFn: updatePreferences,
+    onSuccess: (data) => queryClient.setQueryData(["notification-preferences"], data),
+  });
+
   const filtered = typeFilter
     ? notifications.filter((n) => n.type === typeFilter)
     : notifications;
@@ -58,11 +68,22 @@ export default function Notifications() {
         <h1 className="text-xl font-semibold text-purple-200">
           {t("notifications.title")}
         </h1>
-        {hasUnread && (
-          <Button variant="secondary" onClick={() => markAllMut.mutate()} loading={markAllMut.isPending}>
-            {t("notifications.markAllRead")}
-          </Button>
-        )}
+        <div className="flex items-center gap-3">
+          <label className="flex items-center gap-2 text-xs text-gray-400 cursor-pointer">
+            <input
+              type="checkbox"
+              checked={preferences?.email_digest ?? false}
+              disabled={!preferences || preferencesMut.isPending}
+              onChange={(e) => preferencesMut.mutate({ email_digest: e.target.checked })}
+            />
+            {t("notifications.emailDigest")}
+          </label>
+          {hasUnread && (
+            <Button variant="secondary" onClick={() => markAllMut.mutate()} loading={markAllMut.isPending}>
+              {t("notifications.markAllRead")}
+            </Button>
+          )}
+        </div>
       </div>
 
       <div className="flex gap-2 overflow-x-auto pb-1">
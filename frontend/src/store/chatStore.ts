@@ -7,6 +7,7 @@ export interface ChatMessage {
   content: string;
   actions?: Record<string, unknown>[];
   timestamp: string;
+  streaming?: boolean;
 }
 
 interface ChatState {
@@ -14,6 +15,7 @@ interface ChatState {
   activeConversationId: number | null;
   isTyping: boolean;
   addMessage: (msg: ChatMessage) => void;
+  addStreamedAction: (action: Record<string, unknown>) => void;
   clearMessages: () => void;
   setTyping: (typing: boolean) => void;
   setConversationId: (id: number) => void;
@@ -26,7 +28,36 @@ export const useChatStore = create<ChatState>((set) => ({
   isTyping: false,
 
   addMessage: (msg) =>
-    set((state) => ({ messages: [...state.messages, msg] })),
+    set((state) => {
+      // The reply takes over the bubble its action cards were streamed into
+      const last = state.messages[state.messages.length - 1];
+      if (msg.role === "assistant" && last?.streaming) {
+        return { messages: [...state.messages.slice(0, -1), { ...msg, actions: last.actions }] };
+      }
+      return { messages: [...state.messages, msg] };
+    }),
+
+  addStreamedAction: (action) =>
+    set((state) => {
+      const last = state.messages[state.messages.length - 1];
+      if (last?.streaming) {
+        const updated = { ...last, actions: [...(last.actions || []), action] };
+        return { messages: [...state.messages.slice(0, -1), updated] };
+      }
+      return {
+        messages: [
+          ...state.messages,
+          {
+            id: `stream-${Date.now()}`,
+            role: "assistant",
+            content: "",
+            actions: [action],
+            timestamp: new Date().toISOString(),
+            streaming: true,
+          },
+        ],
+      };
+    }),
 
   clearMessages: () => set({ messages: [], activeConversationId: null }),
 
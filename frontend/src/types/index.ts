@@ -23,6 +23,7 @@ export interface User {
   position: string | null;
   avatar_url: string | null;
   is_active: boolean;
+  email_digest: boolean;
   created_at: string;
 }
 
@@ -110,6 +111,7 @@ export interface Income {
   receipt_url: string | null;
   payment_source: string | null;
   is_recurring: boolean;
+  recurring_source_id: number | null;
 }
 
 export interface AiMessage {